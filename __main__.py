@@ -1,11 +1,63 @@
-import tkinter as tk
-from gui.main_app import CNCVisionApp
+import argparse
+import logging
 
+# First import: the start-up clock runs from here
+from utils.startup_profiler import startup
 
-def main():
-    root = tk.Tk()
+with startup.phase('imports'):
+    import tkinter as tk
+    from config import LOG_SETTINGS, METRICS_SETTINGS
+    from gui.main_app import CNCVisionApp
+    from utils.log_utils import setup_logging, shutdown_logging
+    from utils.trace_utils import tracer
+    from utils.metrics import exporter
+
+log = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m azvision',
+                                     description="Camera-to-DXF station for the CNC table")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="log the start-up timeline and append it to the history file")
+    parser.add_argument('--trace', nargs='?', const='', metavar='FILE',
+                        help="record spans from start-up on and save them as a Chrome trace on exit "
+                             "(default file: traces/trace_<timestamp>.json)")
+    parser.add_argument('--metrics-port', type=int, default=METRICS_SETTINGS['port'], metavar='PORT',
+                        help="serve Prometheus metrics on this port")
+    parser.add_argument('--metrics-file', default=METRICS_SETTINGS['snapshot_file'], metavar='FILE',
+                        help="write JSON metrics snapshots to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    module_levels = dict(LOG_SETTINGS['module_levels'])
+    if args.profile_startup:
+        startup.enable()
+    if args.trace is not None:
+        tracer.start()
+    if startup.enabled:
+        module_levels['utils.startup_profiler'] = 'INFO'
+    setup_logging(module_levels=module_levels)
+    if args.metrics_port:
+        try:
+            exporter.serve(args.metrics_port)
+        except OSError as e:
+            log.warning("Metrics endpoint not started: %s", e)
+    if args.metrics_file:
+        exporter.start_snapshots(args.metrics_file)
+    with startup.phase('window'):
+        root = tk.Tk()
     app = CNCVisionApp(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        startup.report()
+        if args.trace is not None:
+            tracer.save(args.trace or None)
+        exporter.stop()
+        shutdown_logging()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
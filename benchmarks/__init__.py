@@ -0,0 +1,8 @@
+"""
+Headless micro-benchmarks for the image and geometry hot paths
+
+    python -m benchmarks [--quick] [-k 'contours*'] [--baseline FILE]
+
+Every run is saved under benchmarks/results/ and compared against the
+previous one (or --baseline); see python -m benchmarks --help.
+"""
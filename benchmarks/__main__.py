@@ -0,0 +1,52 @@
+import argparse
+import fnmatch
+import sys
+
+from benchmarks.cases import build_cases
+from benchmarks.frames import frame_sources
+from benchmarks.runner import run_cases, save_results, latest_results, load_results, format_report
+from utils.log_utils import setup_logging, shutdown_logging
+
+RESOLUTIONS = [(640, 480), (1296, 972), (2592, 1944)]
+EDGE_SCALES = [1.0, 2.0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Headless micro-benchmarks for the image and geometry hot paths")
+    parser.add_argument('-k', '--filter', default='*', help="only cases whose name matches this glob")
+    parser.add_argument('--quick', action='store_true', help="smallest resolution and edge_scale 1 only")
+    parser.add_argument('--synthetic-only', action='store_true', help="skip the stored captures")
+    parser.add_argument('--repeat', type=int, default=5, help="minimum timed calls per case")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum timed seconds per case")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak-memory pass")
+    parser.add_argument('--baseline', help="result file to compare against (default: the newest saved run)")
+    parser.add_argument('--threshold', type=float, default=0.1, help="slowdown that counts as a regression")
+    parser.add_argument('--no-save', action='store_true', help="do not save this run as the next baseline")
+    parser.add_argument('--fail-on-regression', action='store_true', help="exit with status 1 on regressions")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    try:
+        resolutions = RESOLUTIONS[:1] if args.quick else RESOLUTIONS
+        edge_scales = EDGE_SCALES[:1] if args.quick else EDGE_SCALES
+        frames = frame_sources(resolutions, use_stored=not args.synthetic_only)
+        cases = [c for c in build_cases(frames, edge_scales) if fnmatch.fnmatch(c.name, args.filter)]
+
+        baseline_path = args.baseline or latest_results()
+        baseline = load_results(baseline_path) if baseline_path else None
+
+        results = run_cases(cases, args.repeat, args.min_time, memory=not args.no_memory)
+        report, regressed = format_report(results, baseline, args.threshold)
+        print(report)
+        if baseline_path:
+            print(f"\nCompared against {baseline_path}: {len(regressed)} regression(s) over {args.threshold:.0%}")
+        if not args.no_save:
+            print(f"Saved as {save_results(results)}")
+        return 1 if regressed and args.fail_on_regression else 0
+    finally:
+        shutdown_logging()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
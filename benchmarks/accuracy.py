@@ -0,0 +1,221 @@
+"""
+Accuracy-vs-speed harness on synthetic scenes with known geometry
+
+    python -m benchmarks.accuracy [--scenes 3] [--size 1920x1080] [-k 'edge*']
+
+Every pipeline configuration runs the full capture-to-DXF export on each
+scene (cold cache) and is scored by the Hausdorff distance, in inches,
+between the exported outlines and the true part outlines.
+"""
+import argparse
+import fnmatch
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.scenes import make_scene, PART_COLOR
+from config import DXF_SETTINGS
+from utils.export_pipeline import ExportPipeline
+from utils.log_utils import setup_logging, shutdown_logging
+from utils.undistort_utils import UndistortMapCache
+
+# Name -> overrides of the default export parameters (plus 'downscale' for the coarse pass)
+CONFIGURATIONS = {
+    'default': {},
+    'coarse_pass': {'downscale': DXF_SETTINGS['coarse_scale']},
+    'edge_scale_2': {'edge_scale': 2.0},
+    'tolerance_0.01': {'simplify_tolerance': 0.01},
+    'tolerance_0.1': {'simplify_tolerance': 0.1},
+    'visvalingam': {'simplify_method': 'vw'},
+    'centerline': {'vectorizer': 'centerline'},
+    'undistort_points': {'undistort_mode': 'points'},
+    'color': {'target_color': PART_COLOR},
+    'no_lens_correction': {'camera_matrix': None, 'dist_coeffs': None},
+}
+
+
+def export_params(scene, image_path, overrides):
+    """Export parameters for a scene with a perfect calibration, then the overrides"""
+    params = {
+        'image_path': image_path,
+        'camera_matrix': scene.camera_matrix,
+        'dist_coeffs': scene.dist_coeffs,
+        'calibration_size': scene.image_size,
+        'camera': 'synthetic',
+        'inches_per_pixel': scene.inches_per_pixel,
+        'edge_scale': 1.0,
+        'target_color': None,
+        'color_tolerance_h': 15,
+        'color_tolerance_s': 100,
+        'color_tolerance_v': 100,
+        'canny_low': 50,
+        'canny_high': 150,
+        'undistort_mode': 'image',
+        'background_edges': None,
+        'vectorizer': DXF_SETTINGS['vectorizer'],
+        'simplify_method': DXF_SETTINGS['simplify_method'],
+        'simplify_tolerance': DXF_SETTINGS['simplify_tolerance'],
+        'max_vertices': DXF_SETTINGS['max_vertices'],
+        'dxf_rotation': scene.rotation,
+        'reference': scene.reference,
+        'fiducial_markers': None,
+        'table_size': scene.table_size,
+        'debug': False,
+    }
+    params.update({k: v for k, v in overrides.items() if k != 'downscale'})
+    return params
+
+
+def densify(polylines, closed, spacing):
+    """Points every `spacing` along a list of polylines"""
+    samples = []
+    for line, is_closed in zip(polylines, closed):
+        if is_closed:
+            line = np.vstack([line, line[:1]])
+        if len(line) < 2:
+            samples.append(line)
+            continue
+        segments = np.diff(line, axis=0)
+        lengths = np.hypot(segments[:, 0], segments[:, 1])
+        steps = np.maximum(1, np.ceil(lengths / spacing)).astype(np.int64)
+        index = np.repeat(np.arange(len(segments)), steps)
+        t = (np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)) / steps[index]
+        samples.append(line[index] + segments[index] * t[:, None])
+        if not is_closed:
+            samples.append(line[-1:])
+    return np.vstack(samples) if samples else np.zeros((0, 2))
+
+
+def _grid_nearest(query, reference, cell):
+    """Nearest reference distance for each query point, exact where it is <= cell and inf beyond"""
+    origin = np.minimum(query.min(axis=0), reference.min(axis=0))
+    ref_cells = np.floor((reference - origin) / cell).astype(np.int64) + 1
+    query_cells = np.floor((query - origin) / cell).astype(np.int64) + 1
+    rows = max(ref_cells[:, 1].max(), query_cells[:, 1].max()) + 2
+    codes = ref_cells[:, 0] * rows + ref_cells[:, 1]
+    order = np.argsort(codes, kind='stable')
+    codes, reference = codes[order], reference[order]
+
+    best = np.full(len(query), np.inf)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            target = (query_cells[:, 0] + dx) * rows + query_cells[:, 1] + dy
+            start = np.searchsorted(codes, target, 'left')
+            counts = np.searchsorted(codes, target, 'right') - start
+            hit = np.flatnonzero(counts)
+            if not len(hit):
+                continue
+            counts, start = counts[hit], start[hit]
+            offsets = np.cumsum(counts) - counts
+            ref_index = np.arange(counts.sum()) - np.repeat(offsets - start, counts)
+            distance = np.hypot(*(np.repeat(query[hit], counts, axis=0) - reference[ref_index]).T)
+            best[hit] = np.minimum(best[hit], np.minimum.reduceat(distance, offsets))
+    best[best > cell] = np.inf
+    return best
+
+
+def nearest_distances(query, reference, cell=0.1):
+    """
+    Exact distance from every query point to its nearest reference point
+    Reference points are bucketed into square cells, so any match within one
+    cell size is found in the 3x3 neighbouring cells; points with no match
+    that close are searched again on a 4x coarser grid until all are found.
+    """
+    best = np.full(len(query), np.inf)
+    if len(reference) == 0 or len(query) == 0:
+        return best
+    pending = np.arange(len(query))
+    while len(pending):
+        best[pending] = _grid_nearest(query[pending], reference, cell)
+        pending = pending[np.isinf(best[pending])]
+        cell *= 4
+    return best
+
+
+def geometric_error(table_set, shapes, spacing=0.01):
+    """
+    Error of exported geometry against the ground truth, in inches
+    hausdorff: the symmetric Hausdorff distance; spurious: farthest exported
+    point from any true outline; missed: farthest true point from any export;
+    mean: mean distance of exported points to the truth.
+    """
+    truth = densify(shapes, [True] * len(shapes), spacing)
+    exported = densify([table_set.contour(k) for k in range(len(table_set))], table_set.closed, spacing)
+    if len(exported) == 0:
+        return {'hausdorff': np.inf, 'spurious': 0.0, 'missed': np.inf, 'mean': np.inf}
+    to_truth = nearest_distances(exported, truth)
+    to_export = nearest_distances(truth, exported)
+    return {
+        'hausdorff': float(max(to_truth.max(), to_export.max())),
+        'spurious': float(to_truth.max()),
+        'missed': float(to_export.max()),
+        'mean': float(to_truth.mean()),
+    }
+
+
+def run_configuration(scene, image_path, overrides):
+    """Wall time (s), geometric error and vertex count of one cold export"""
+    # Fresh stage and remap caches; the maps stay in memory so nothing is written next to the repo
+    pipeline = ExportPipeline(maps=UndistortMapCache(directory=None))
+    params = export_params(scene, image_path, overrides)
+    start = time.perf_counter()
+    result = pipeline.run(params, downscale=overrides.get('downscale', 1.0))
+    result.doc.write(io.StringIO())
+    elapsed = time.perf_counter() - start
+    error = geometric_error(result.table_set, scene.shapes)
+    return elapsed, error, result.table_set.n_vertices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.accuracy',
+                                     description="Accuracy-vs-speed of export configurations on synthetic scenes")
+    parser.add_argument('-k', '--filter', default='*', help="only configurations whose name matches this glob")
+    parser.add_argument('--scenes', type=int, default=3, help="number of random scenes")
+    parser.add_argument('--size', default='1920x1080', help="frame size WIDTHxHEIGHT")
+    parser.add_argument('--distortion', type=float, default=-0.12, help="radial k1 of the simulated lens")
+    parser.add_argument('--noise', type=float, default=4.0, help="sensor noise in gray levels")
+    parser.add_argument('--blur', type=float, default=0.8, help="defocus sigma in pixels")
+    parser.add_argument('--rotation', type=float, default=0.5, help="camera rotation in degrees")
+    parser.add_argument('--save-scenes', help="also write the scene images to this directory")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    try:
+        size = tuple(int(v) for v in args.size.lower().split('x'))
+        configurations = {n: o for n, o in CONFIGURATIONS.items() if fnmatch.fnmatch(n, args.filter)}
+        rows = {name: [] for name in configurations}
+        with tempfile.TemporaryDirectory() as directory:
+            for seed in range(args.scenes):
+                scene = make_scene(seed, size, rotation=args.rotation, distortion=args.distortion,
+                                   noise=args.noise, blur=args.blur)
+                image_path = os.path.join(directory, f"scene_{seed}.png")
+                cv2.imwrite(image_path, scene.image)
+                if args.save_scenes:
+                    os.makedirs(args.save_scenes, exist_ok=True)
+                    cv2.imwrite(os.path.join(args.save_scenes, f"scene_{seed}.png"), scene.image)
+                for name, overrides in configurations.items():
+                    rows[name].append(run_configuration(scene, image_path, overrides))
+
+        print(f"{args.scenes} scene(s) at {size[0]}x{size[1]}, "
+              f"{scene.inches_per_pixel:.4f} in/px; errors in inches (worst scene), times median")
+        print(f"{'configuration':<20} {'time':>9} {'hausdorff':>10} {'spurious':>9} {'missed':>9} "
+              f"{'mean':>8} {'vertices':>9}")
+        for name, runs in rows.items():
+            elapsed = statistics.median(r[0] for r in runs)
+            worst = {key: max(r[1][key] for r in runs) for key in ('hausdorff', 'spurious', 'missed', 'mean')}
+            vertices = statistics.median(r[2] for r in runs)
+            print(f"{name:<20} {elapsed * 1000:>7.0f}ms {worst['hausdorff']:>10.4f} {worst['spurious']:>9.4f} "
+                  f"{worst['missed']:>9.4f} {worst['mean']:>8.4f} {vertices:>9.0f}")
+        return 0
+    finally:
+        shutdown_logging()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import io
+
+import cv2
+import numpy as np
+
+from benchmarks.frames import PART_COLOR
+from utils.export_pipeline import normalize_stage, detect_stage, contours_stage, transform_stage, write_stage
+from utils.geometry_utils import table_transform
+from utils.image_utils import color_based_edge_detection, normalize_image_safe, simplify_contour, preview_edges
+from utils.pipeline_params import PipelineParams
+
+PREVIEW_WIDTH = 440        # One of the two preview panes on a 900 px wide window
+TABLE_SIZE = (144.0, 61.0)
+
+
+class Case:
+    """
+    One benchmark: func() is timed, setup has already run
+    work: amount processed per call, in unit (e.g. 'Mpx', 'kvertices'), for throughput
+    """
+
+    def __init__(self, name, func, work, unit):
+        self.name = name
+        self.func = func
+        self.work = work
+        self.unit = unit
+
+
+def _megapixels(image):
+    return image.shape[0] * image.shape[1] / 1e6
+
+
+def _preview_size(frame):
+    h, w = frame.shape[:2]
+    return PREVIEW_WIDTH, int(PREVIEW_WIDTH * h / w)
+
+
+def _target_color(source, frame):
+    """Color to detect: the synthetic part color, or the median of the capture's centre"""
+    if source == 'synthetic':
+        return np.array(PART_COLOR)
+    h, w = frame.shape[:2]
+    return np.median(frame[h // 2 - 5:h // 2 + 5, w // 2 - 5:w // 2 + 5].reshape(-1, 3), axis=0).astype(np.uint8)
+
+
+def build_cases(frames, edge_scales):
+    """
+    Every benchmark case for the given frames
+    frames: {(source, (width, height)): frame} from frame_sources
+    edge_scales: edge_scale values for the resolution-dependent paths
+    """
+    cases = []
+    for (source, (width, height)), frame in frames.items():
+        tag = f"{source}-{width}x{height}"
+        target = _target_color(source, frame)
+        preview = cv2.resize(frame, _preview_size(frame))
+
+        cases.append(Case(f"normalize_image_safe[{tag}]", lambda f=frame: normalize_image_safe(f),
+                          _megapixels(frame), 'Mpx'))
+        cases.append(Case(f"color_based_edge_detection[{tag}]",
+                          lambda f=frame, t=target: color_based_edge_detection(f, t, 15, 100, 100),
+                          _megapixels(frame), 'Mpx'))
+
+        for scale in edge_scales:
+            stag = f"{tag}@{scale:g}"
+            scaled = normalize_stage(frame, scale)
+            cases.append(Case(f"normalize_stage[{stag}]", lambda f=frame, s=scale: normalize_stage(f, s),
+                              _megapixels(scaled), 'Mpx'))
+            # The preview detects at preview size, or on the upscaled full frame when edge_scale > 1
+            preview_work = _megapixels(preview) if scale <= 1.0 else _megapixels(frame) * scale * scale
+            params = PipelineParams(edge_scale=scale)
+            cases.append(Case(f"canny_preview[{stag}]",
+                              lambda f=frame, p=preview, q=params: preview_edges(f, p.copy(), q),
+                              preview_work, 'Mpx'))
+            color_params = PipelineParams(edge_scale=scale, color_mode=True,
+                                          target_color=tuple(int(c) for c in target))
+            cases.append(Case(f"color_preview[{stag}]",
+                              lambda f=frame, p=preview, q=color_params: preview_edges(f, p.copy(), q),
+                              preview_work, 'Mpx'))
+
+            # Geometry paths start from the export's own edge image
+            _, thresh = detect_stage(scaled, debug=False)
+            cases.append(Case(f"detect_canny[{stag}]", lambda f=scaled: detect_stage(f, debug=False),
+                              _megapixels(scaled), 'Mpx'))
+            cases.append(Case(f"contours[{stag}]", lambda t=thresh: contours_stage(t),
+                              _megapixels(thresh), 'Mpx'))
+            cases.append(Case(f"centerlines[{stag}]", lambda t=thresh: contours_stage(t, 'centerline'),
+                              _megapixels(thresh), 'Mpx'))
+
+            contour_set = contours_stage(thresh)
+            raw_contours, _ = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+            raw_vertices = sum(len(c) for c in raw_contours) / 1e3
+            cases.append(Case(f"simplify_contour[{stag}]",
+                              lambda c=raw_contours: [simplify_contour(k, 0.1) for k in c],
+                              raw_vertices, 'kvertices'))
+            cases.append(Case(f"simplify_set[{stag}]", lambda c=contour_set: c.simplify(tolerance=1.0),
+                              contour_set.n_vertices / 1e3, 'kvertices'))
+
+            simplified = contour_set.simplify(tolerance=1.0)
+            matrix = table_transform((width, height), 144.0 / (width * 1.5), -0.25, scale=scale)
+            cases.append(Case(f"transform[{stag}]", lambda c=simplified, m=matrix: transform_stage(c, m, TABLE_SIZE),
+                              simplified.n_vertices / 1e3, 'kvertices'))
+
+            table_set = transform_stage(simplified, matrix, TABLE_SIZE)
+            cases.append(Case(f"dxf_write[{stag}]",
+                              lambda t=table_set: write_stage(t, TABLE_SIZE)[0].write(io.StringIO()),
+                              table_set.n_vertices / 1e3, 'kvertices'))
+    return cases
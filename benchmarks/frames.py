@@ -0,0 +1,72 @@
+import glob
+import logging
+import os
+
+import cv2
+import numpy as np
+
+from config import CAPTURE_DIRECTORY
+
+log = logging.getLogger(__name__)
+
+# Parts drawn on synthetic frames (BGR); also the color-detection target
+PART_COLOR = (40, 40, 200)
+
+
+def synthetic_frame(width, height, seed=0, parts=40):
+    """
+    Deterministic stand-in for a table capture
+    A lit, noisy grey table with filled rectangles, circles and polygons in
+    PART_COLOR, so Canny and color detection both find real contours.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    lighting = 150 + 40 * np.sin(xx / width * np.pi) * np.cos(yy / height * np.pi / 2)
+    frame = np.repeat(lighting[:, :, None], 3, axis=2)
+    frame += rng.normal(0, 6, frame.shape).astype(np.float32)
+    frame = frame.clip(0, 255).astype(np.uint8)
+
+    unit = min(width, height) / 20.0
+    for _ in range(parts):
+        x, y = int(rng.uniform(0, width)), int(rng.uniform(0, height))
+        size = rng.uniform(0.5, 2.5) * unit
+        kind = rng.integers(3)
+        if kind == 0:
+            cv2.rectangle(frame, (x, y), (int(x + size), int(y + size * rng.uniform(0.3, 1.5))), PART_COLOR, -1)
+        elif kind == 1:
+            cv2.circle(frame, (x, y), int(size / 2), PART_COLOR, -1, lineType=cv2.LINE_AA)
+        else:
+            angles = np.sort(rng.uniform(0, 2 * np.pi, 7))
+            radii = rng.uniform(0.4, 1.0, 7) * size
+            polygon = np.stack([x + radii * np.cos(angles), y + radii * np.sin(angles)], axis=1)
+            cv2.fillPoly(frame, [polygon.astype(np.int32)], PART_COLOR, lineType=cv2.LINE_AA)
+    return frame
+
+
+def stored_frame():
+    """First PNG capture with any content in the capture directory, or None"""
+    for path in sorted(glob.glob(os.path.join(CAPTURE_DIRECTORY, '*.png'))):
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        if frame.min() == frame.max():
+            log.warning("Skipping blank stored frame %s", path)
+        else:
+            log.info("Using stored frame %s (%dx%d)", path, frame.shape[1], frame.shape[0])
+            return frame
+    return None
+
+
+def frame_sources(resolutions, use_stored=True):
+    """
+    {(source, (width, height)): frame} for every resolution
+    source is 'capture' (the stored PNG resized) when one exists, and always
+    'synthetic'.
+    """
+    frames = {}
+    stored = stored_frame() if use_stored else None
+    for size in resolutions:
+        if stored is not None:
+            frames[('capture', size)] = cv2.resize(stored, size, interpolation=cv2.INTER_AREA)
+        frames[('synthetic', size)] = synthetic_frame(*size)
+    return frames
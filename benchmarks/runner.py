@@ -0,0 +1,122 @@
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def time_case(case, repeat=5, min_time=0.2):
+    """
+    Wall-clock timings of one case in seconds
+    One warm-up call, then at least `repeat` calls and at least min_time seconds.
+    """
+    case.func()
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < repeat or time.perf_counter() - start < min_time:
+        t0 = time.perf_counter()
+        case.func()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def peak_memory(case):
+    """
+    Peak memory allocated by one call, in bytes
+    Measured with tracemalloc, which sees Python objects and numpy/OpenCV
+    result arrays but not OpenCV's internal scratch buffers.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        case.func()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def run_cases(cases, repeat=5, min_time=0.2, memory=True):
+    """Time every case; returns {name: result dict}"""
+    results = {}
+    for case in cases:
+        timings = time_case(case, repeat, min_time)
+        median = statistics.median(timings)
+        results[case.name] = {
+            'median_ms': median * 1000,
+            'min_ms': min(timings) * 1000,
+            'runs': len(timings),
+            'throughput': case.work / median if median > 0 else None,
+            'unit': f"{case.unit}/s",
+            'peak_mb': peak_memory(case) / 2 ** 20 if memory else None,
+        }
+        log.debug("%s: %.2f ms", case.name, median * 1000)
+    return results
+
+
+def environment():
+    """Machine and library versions a result set was measured with"""
+    return {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def save_results(results, directory=RESULTS_DIRECTORY):
+    """Write a result set as <directory>/<timestamp>.json; returns the path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, datetime.now().strftime("%Y%m%d_%H%M%S") + '.json')
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    return path
+
+
+def latest_results(directory=RESULTS_DIRECTORY):
+    """Path of the newest saved result set, or None"""
+    paths = sorted(glob.glob(os.path.join(directory, '*.json')))
+    return paths[-1] if paths else None
+
+
+def load_results(path):
+    """Results dict of a saved result set"""
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def format_report(results, baseline=None, threshold=0.1):
+    """
+    Text table of results, compared against a baseline result set if given
+    Returns (text, regressed names); a case regresses when its median is
+    more than `threshold` slower than the baseline's.
+    """
+    lines = [f"{'case':<52} {'median':>10} {'min':>10} {'throughput':>18} {'peak':>9} {'vs base':>8}"]
+    regressed = []
+    for name, r in results.items():
+        throughput = f"{r['throughput']:.4g} {r['unit']}" if r['throughput'] is not None else '-'
+        peak = f"{r['peak_mb']:.1f} MB" if r['peak_mb'] is not None else '-'
+        change = ''
+        if baseline and name in baseline:
+            ratio = r['median_ms'] / baseline[name]['median_ms'] - 1.0
+            change = f"{ratio:+.0%}"
+            if ratio > threshold:
+                regressed.append(name)
+                change += ' !'
+        lines.append(f"{name:<52} {r['median_ms']:>8.2f}ms {r['min_ms']:>8.2f}ms {throughput:>18} {peak:>9} {change:>8}")
+    return "\n".join(lines), regressed
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+
+from utils.geometry_utils import table_transform
+
+# BGR colors of the table surface and of the parts lying on it
+TABLE_COLOR = (175, 185, 190)
+PART_COLOR = (40, 45, 170)
+
+
+class Scene:
+    """
+    One synthetic capture with its ground truth
+    image: BGR camera frame (distorted like the real lens when dist_coeffs is set)
+    shapes: list of closed (N, 2) outlines in table inches
+    The remaining attributes are the camera and table settings that map the
+    frame back to the table exactly, i.e. a perfect calibration.
+    """
+
+    def __init__(self, image, shapes, inches_per_pixel, rotation, reference, table_size,
+                 camera_matrix=None, dist_coeffs=None):
+        self.image = image
+        self.shapes = shapes
+        self.inches_per_pixel = inches_per_pixel
+        self.rotation = rotation
+        self.reference = reference
+        self.table_size = table_size
+        self.camera_matrix = camera_matrix
+        self.dist_coeffs = dist_coeffs
+
+    @property
+    def image_size(self):
+        return self.image.shape[1], self.image.shape[0]
+
+
+def _rectangle(rng, centre, size):
+    w, h = size * rng.uniform(0.5, 1.0), size * rng.uniform(0.3, 1.0)
+    angle = rng.uniform(0, np.pi)
+    corners = np.array([(-w, -h), (w, -h), (w, h), (-w, h)]) / 2
+    rotate = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    return centre + corners @ rotate.T
+
+
+def _circle(rng, centre, size):
+    t = np.linspace(0, 2 * np.pi, 360, endpoint=False)
+    radius = size / 2 * rng.uniform(0.5, 1.0)
+    return centre + radius * np.stack([np.cos(t), np.sin(t)], axis=1)
+
+
+def _star(rng, centre, size):
+    points = 2 * rng.integers(4, 8)
+    t = np.linspace(0, 2 * np.pi, points, endpoint=False) + rng.uniform(0, np.pi)
+    radii = size / 2 * np.where(np.arange(points) % 2 == 0, 1.0, rng.uniform(0.4, 0.7))
+    return centre + radii[:, None] * np.stack([np.cos(t), np.sin(t)], axis=1)
+
+
+SHAPES = (_rectangle, _circle, _star)
+
+
+def _place_shapes(rng, count, bounds, min_size, max_size):
+    """Non-overlapping shapes inside bounds ((x0, y0), (x1, y1)) in inches"""
+    (x0, y0), (x1, y1) = bounds
+    shapes, circles = [], []
+    for _ in range(count * 20):
+        if len(shapes) == count:
+            break
+        size = rng.uniform(min_size, max_size)
+        centre = np.array([rng.uniform(x0 + size, x1 - size), rng.uniform(y0 + size, y1 - size)])
+        # Keep a gap of half a shape between neighbours so outlines never merge
+        if any(np.hypot(*(centre - c)) < (size + s) * 0.75 for c, s in circles):
+            continue
+        circles.append((centre, size))
+        shapes.append(SHAPES[len(shapes) % len(SHAPES)](rng, centre, size))
+    return shapes
+
+
+def _distort(image, camera_matrix, dist_coeffs):
+    """Warp an ideal pinhole image into what the distorting lens would record"""
+    h, w = image.shape[:2]
+    grid = np.stack(np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32)), axis=2)
+    # Every recorded pixel looks at the ideal pixel its ray would hit without distortion
+    ideal = cv2.undistortPoints(grid.reshape(-1, 1, 2), camera_matrix, dist_coeffs, P=camera_matrix,
+                                criteria=(cv2.TERM_CRITERIA_COUNT | cv2.TERM_CRITERIA_EPS, 20, 1e-6))
+    maps = ideal.reshape(h, w, 2)
+    return cv2.remap(image, maps[..., 0], maps[..., 1], cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def make_scene(seed=0, image_size=(1920, 1080), table_size=(144.0, 61.0), shapes=12, rotation=0.5,
+               distortion=-0.12, noise=4.0, blur=0.8, lighting=0.25, supersample=4):
+    """
+    Render a table scene with known parts
+    rotation: camera rotation against the table in degrees (dxf_rotation undoes it)
+    distortion: radial k1 of the simulated lens (0 for a perfect pinhole)
+    noise: sensor noise standard deviation in gray levels
+    blur: Gaussian defocus sigma in pixels
+    lighting: brightness falloff across the frame (0 = even lighting)
+    supersample: parts are drawn at this many sub-pixels per pixel and area-averaged
+    """
+    rng = np.random.default_rng(seed)
+    width, height = image_size
+    # The table fills the frame with a small margin
+    inches_per_pixel = max(table_size[0] / (0.95 * width), table_size[1] / (0.95 * height))
+    reference = ((width / 2, height / 2), (table_size[0] / 2, table_size[1] / 2))
+    to_table = table_transform(image_size, inches_per_pixel, rotation, reference)
+    to_pixels = np.linalg.inv(to_table)
+
+    unit = min(table_size) / 12
+    outlines = _place_shapes(rng, shapes, ((2.0, 2.0), (table_size[0] - 2.0, table_size[1] - 2.0)),
+                             unit * 0.6, unit * 2.0)
+
+    # Draw at sub-pixel precision on a supersampled canvas, then average down
+    shift = 4
+    canvas = np.zeros((height * supersample, width * supersample), dtype=np.uint8)
+    for outline in outlines:
+        pixels = cv2.perspectiveTransform(outline.reshape(-1, 1, 2), to_pixels).reshape(-1, 2)
+        # Camera pixel centres are at integer coordinates
+        fine = ((pixels + 0.5) * supersample - 0.5) * (1 << shift)
+        cv2.fillPoly(canvas, [np.round(fine).astype(np.int32)], 255, lineType=cv2.LINE_8, shift=shift)
+    coverage = cv2.resize(canvas, image_size, interpolation=cv2.INTER_AREA).astype(np.float32)[..., None] / 255
+    image = (1.0 - coverage) * np.float32(TABLE_COLOR) + coverage * np.float32(PART_COLOR)
+
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    image *= (1.0 - lighting * (0.6 * xx / width + 0.4 * yy / height))[..., None]
+
+    camera_matrix = dist_coeffs = None
+    if distortion:
+        focal = float(width)
+        camera_matrix = np.array([[focal, 0, (width - 1) / 2], [0, focal, (height - 1) / 2], [0, 0, 1]])
+        dist_coeffs = np.array([[distortion, distortion * 0.1, 0.0, 0.0, 0.0]])
+        image = _distort(image, camera_matrix, dist_coeffs)
+
+    if blur:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    if noise:
+        image += rng.normal(0, noise, image.shape).astype(np.float32)
+    image = image.clip(0, 255).astype(np.uint8)
+
+    return Scene(image, outlines, inches_per_pixel, rotation, reference, table_size, camera_matrix, dist_coeffs)
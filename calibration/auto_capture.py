@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config import CALIBRATION_SETTINGS
+from calibration.pattern_detection import ChessboardDetector, refine_corners
+from utils.trace_utils import tracer
+
+log = logging.getLogger(__name__)
+
+
+def board_outline(corners, pattern_size):
+    """The four outer corners of a detected board, in detection order"""
+    cols, rows = pattern_size
+    pts = corners.reshape(-1, 2)
+    return pts[[0, cols - 1, cols * rows - 1, cols * (rows - 1)]]
+
+
+def pose_bin(outline, frame_size, size_bins=3, tilt_bins=3):
+    """
+    Coarse pose descriptor of a board: apparent size and perspective tilt
+    Tilt is the length ratio of opposite outline edges, which moves away
+    from 1 as the board leans towards or away from the camera.
+    """
+    w, h = frame_size
+    area = cv2.contourArea(outline.astype(np.float32))
+    size = np.sqrt(area / float(w * h))
+    edges = np.linalg.norm(np.roll(outline, -1, axis=0) - outline, axis=1) + 1e-9
+    tilt_x = np.log(edges[0] / edges[2])
+    tilt_y = np.log(edges[1] / edges[3])
+
+    def quantise(value, lo, hi, bins):
+        return int(np.clip((value - lo) / (hi - lo) * bins, 0, bins - 1))
+
+    return (quantise(size, 0.1, 0.6, size_bins),
+            quantise(tilt_x, -0.3, 0.3, tilt_bins),
+            quantise(tilt_y, -0.3, 0.3, tilt_bins))
+
+
+class CalibrationAutoCapture:
+    """
+    Hands-free collection of lens calibration frames
+    Preview frames are submitted from the capture thread; a worker thread
+    runs the downscaled pattern search on the newest one and keeps the frame
+    only when the board is sharp, has stopped moving, and either lands on
+    table area that is not covered yet or shows a new pose. Coverage is
+    accumulated into a coarse heat map of the frame.
+    """
+
+    def __init__(self, detector=None, settings=CALIBRATION_SETTINGS):
+        self.detector = detector if detector is not None else ChessboardDetector()
+        self.grid_rows, self.grid_cols = settings['coverage_grid']
+        self.min_coverage = settings['min_coverage']
+        self.min_images = settings['min_images']
+        self.min_sharpness = settings['min_sharpness']
+        self.max_motion = settings['max_motion_px']
+        self.min_interval = settings['min_capture_interval']
+
+        self.heat = np.zeros((self.grid_rows, self.grid_cols), dtype=np.float32)
+        self.pose_bins = set()
+        self.frame_size = None
+        self.pattern_size = None
+        self.last_status = "Waiting for board"
+
+        self._count = 0
+        self._new = []
+        self._previous = None
+        self._last_accept = 0.0
+        self._frame = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the detection worker"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="calibration-auto-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the detection worker"""
+        self._running = False
+        self._wake.set()
+
+    def submit(self, frame):
+        """Offer a preview frame; older unprocessed frames are dropped"""
+        if not self._running:
+            return
+        with self._lock:
+            self._frame = frame
+        self._wake.set()
+
+    def take_new(self):
+        """Return the (frame, corners) pairs accepted since the last call"""
+        with self._lock:
+            new, self._new = self._new, []
+        return new
+
+    @property
+    def image_count(self):
+        """Number of frames kept so far"""
+        return self._count
+
+    @property
+    def coverage(self):
+        """Fraction of the coverage grid touched by at least one kept board"""
+        return float(np.count_nonzero(self.heat)) / self.heat.size
+
+    @property
+    def ready(self):
+        """Enough frames and coverage to calibrate"""
+        return self.image_count >= self.min_images and self.coverage >= self.min_coverage
+
+    def _worker(self):
+        while self._running:
+            self._wake.wait(0.5)
+            self._wake.clear()
+            with self._lock:
+                frame, self._frame = self._frame, None
+            if frame is None:
+                continue
+            try:
+                with tracer.span('auto_capture_detect') as span:
+                    self._process(frame)
+                    span.set(status=self.last_status)
+            except Exception as e:
+                log.exception("Auto-capture error: %s", e)
+
+    def _process(self, frame):
+        """Detect, test and possibly keep one frame"""
+        h, w = frame.shape[:2]
+        self.frame_size = (w, h)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+        # Coarse corners only; sub-pixel refinement is paid for kept frames alone
+        pattern_size, corners, search_scale = self.detector.search(gray)
+        previous, self._previous = self._previous, (pattern_size, corners)
+        if pattern_size is None:
+            self.last_status = "No board"
+            return
+        if self.pattern_size is not None and pattern_size != self.pattern_size:
+            self.last_status = f"Board {pattern_size} differs from {self.pattern_size}"
+            return
+
+        # Still: corners moved little since the previous preview frame
+        if previous is None or previous[0] != pattern_size:
+            self.last_status = "Hold still"
+            return
+        motion = float(np.mean(np.linalg.norm((corners - previous[1]).reshape(-1, 2), axis=1)))
+        if motion > self.max_motion:
+            self.last_status = f"Hold still ({motion:.1f} px motion)"
+            return
+
+        # Sharp: variance of the Laplacian inside the board's bounding box
+        outline = board_outline(corners, pattern_size)
+        x0, y0 = np.maximum(outline.min(axis=0).astype(int), 0)
+        x1, y1 = np.minimum(outline.max(axis=0).astype(int) + 1, (w, h))
+        sharpness = cv2.Laplacian(gray[y0:y1, x0:x1], cv2.CV_64F).var()
+        if sharpness < self.min_sharpness:
+            self.last_status = f"Blurry (sharpness {sharpness:.0f})"
+            return
+
+        # Novel: covers new grid cells or shows a pose not seen yet
+        cells = np.zeros_like(self.heat, dtype=np.uint8)
+        grid_outline = outline * (self.grid_cols / float(w), self.grid_rows / float(h))
+        cv2.fillConvexPoly(cells, np.round(grid_outline - 0.5).astype(np.int32), 1)
+        new_cells = int(np.count_nonzero(cells & (self.heat == 0)))
+        pose = pose_bin(outline, (w, h))
+        if new_cells == 0 and pose in self.pose_bins:
+            self.last_status = "Move board to an uncovered area or tilt it"
+            return
+        if time.monotonic() - self._last_accept < self.min_interval:
+            return
+
+        corners = refine_corners(gray, corners, search_scale)
+        self.pattern_size = pattern_size
+        self.pose_bins.add(pose)
+        self.heat += cells
+        self._last_accept = time.monotonic()
+        # Submitted frames are private copies, so they can be kept as they are
+        with self._lock:
+            self._new.append((frame, corners))
+            self._count += 1
+        self.last_status = f"Captured ({new_cells} new cells)"
+        log.info("Auto-captured calibration frame %d: %d new cells, pose %s, coverage %.0f%%",
+                 self.image_count, new_cells, pose, self.coverage * 100)
+
+    def render_heat_map(self, frame, width):
+        """Overlay the coverage heat map on a frame resized to the given width"""
+        h, w = frame.shape[:2]
+        height = max(1, int(round(width * h / float(w))))
+        preview = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        if preview.ndim == 2:
+            preview = cv2.cvtColor(preview, cv2.COLOR_GRAY2BGR)
+
+        peak = max(1.0, float(self.heat.max()))
+        heat = (np.clip(self.heat / peak, 0, 1) * 255).astype(np.uint8)
+        heat = cv2.resize(cv2.applyColorMap(heat, cv2.COLORMAP_JET), (width, height),
+                          interpolation=cv2.INTER_NEAREST)
+        covered = cv2.resize((self.heat > 0).astype(np.uint8), (width, height),
+                             interpolation=cv2.INTER_NEAREST).astype(bool)
+        preview[covered] = cv2.addWeighted(preview, 0.5, heat, 0.5, 0)[covered]
+
+        # Grid lines
+        for r in range(1, self.grid_rows):
+            y = r * height // self.grid_rows
+            cv2.line(preview, (0, y), (width, y), (255, 255, 255), 1)
+        for c in range(1, self.grid_cols):
+            x = c * width // self.grid_cols
+            cv2.line(preview, (x, 0), (x, height), (255, 255, 255), 1)
+        return preview
@@ -3,18 +3,32 @@ from tkinter import ttk, messagebox
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
-import traceback
+import logging
+import threading
+
+from config import SNAP_SETTINGS
+from utils.snap_utils import EdgeSnapIndex
+from utils.pyramid_utils import ImagePyramid
+from gui.zoom_loupe import ZoomLoupe
+
+log = logging.getLogger(__name__)
+
+
+def _log_frame_buffer(context, parent):
+    """Log the state of the parent's frame buffer (debug level only)"""
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    frame_buffer = getattr(parent, 'frame_buffer', None)
+    latest = frame_buffer[-1] if frame_buffer else None
+    log.debug("%s: parent %s, frame buffer %s with %d frames, latest frame shape %s",
+              context, type(parent).__name__, type(frame_buffer).__name__,
+              len(frame_buffer) if frame_buffer else 0, getattr(latest, 'shape', None))
+
 
 class CalibrationWindow:
     def __init__(self, parent, inches_per_pixel, on_calibration_complete):
         try:
-            print("\nCalibrationWindow Initialization Debug:")
-            print(f"Parent type: {type(parent)}")
-            print(f"Parent has frame_buffer: {hasattr(parent, 'frame_buffer')}")
-            if hasattr(parent, 'frame_buffer'):
-                print(f"Frame buffer length: {len(parent.frame_buffer) if parent.frame_buffer else 0}")
-                if parent.frame_buffer:
-                    print(f"Latest frame shape: {parent.frame_buffer[-1].shape if hasattr(parent.frame_buffer[-1], 'shape') else 'No shape'}")
+            _log_frame_buffer("CalibrationWindow initialization", parent)
             
             # Create window with parent's master as the parent
             self.window = tk.Toplevel(parent.master)
@@ -92,23 +106,15 @@ class CalibrationWindow:
             # Bind window close event
             self.window.protocol("WM_DELETE_WINDOW", self.close_window)
             
-            print("CalibrationWindow initialization completed successfully")
+            log.debug("CalibrationWindow initialization completed successfully")
             
         except Exception as e:
-            print(f"Error in CalibrationWindow initialization: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            log.exception("Error in CalibrationWindow initialization: %s", e)
             raise  # Re-raise the exception to be caught by the caller
 
     def start_calibration(self):
         """Start the calibration process"""
-        print("\nCalibration Debug:")
-        print(f"Parent type: {type(self.parent)}")
-        print(f"Has frame_buffer attribute: {hasattr(self.parent, 'frame_buffer')}")
-        if hasattr(self.parent, 'frame_buffer'):
-            print(f"Frame buffer length: {len(self.parent.frame_buffer) if self.parent.frame_buffer else 0}")
-            print(f"Frame buffer type: {type(self.parent.frame_buffer)}")
-            if self.parent.frame_buffer:
-                print(f"Latest frame shape: {self.parent.frame_buffer[-1].shape if hasattr(self.parent.frame_buffer[-1], 'shape') else 'No shape'}")
+        _log_frame_buffer("Calibration start", self.parent)
         
         if not hasattr(self.parent, 'frame_buffer') or not self.parent.frame_buffer:
             messagebox.showerror("Error", "No camera feed available")
@@ -118,13 +124,7 @@ class CalibrationWindow:
 
     def show_calibration_picker(self):
         """Show the calibration picker window"""
-        print("\nCalibration Picker Debug:")
-        print(f"Parent type: {type(self.parent)}")
-        print(f"Has frame_buffer attribute: {hasattr(self.parent, 'frame_buffer')}")
-        if hasattr(self.parent, 'frame_buffer'):
-            print(f"Frame buffer length: {len(self.parent.frame_buffer) if self.parent.frame_buffer else 0}")
-            if self.parent.frame_buffer:
-                print(f"Latest frame shape: {self.parent.frame_buffer[-1].shape if hasattr(self.parent.frame_buffer[-1], 'shape') else 'No shape'}")
+        _log_frame_buffer("Calibration picker", self.parent)
         
         if self.picker_window:
             try:
@@ -186,6 +186,10 @@ class CalibrationPicker:
         frame = app_instance.frame_buffer[-1].copy()
         height, width = frame.shape[:2]
         
+        # Clicks snap to full-resolution edges and corners once the index is built
+        self.snap_index = None
+        threading.Thread(target=self._build_snap_index, args=(frame,), daemon=True).start()
+        
         # Calculate preview size to be 80% of screen height while maintaining aspect ratio
         max_preview_height = int(screen_height * 0.8)
         max_preview_width = int(screen_width * 0.8)
@@ -199,16 +203,16 @@ class CalibrationPicker:
             preview_width = max_preview_width
             preview_height = int(height * (preview_width / width))
         
-        # Resize frame for preview
-        preview_frame = cv2.resize(frame, (preview_width, preview_height))
+        # Preview from the pyramid that also feeds the full-resolution loupe
+        self.pyramid = ImagePyramid(frame)
+        guide_frame = self.pyramid.display(preview_width, preview_height).copy()
         
         # Draw measurement guide
-        guide_frame = preview_frame.copy()
         cv2.putText(guide_frame, 
                    f"Click start and end points of {known_distance} inch dimension",
                    (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
         
-        preview_image = Image.fromarray(cv2.cvtColor(guide_frame, cv2.COLOR_BGR2RGB))
+        preview_image = Image.fromarray(guide_frame)
         self.imgtk = ImageTk.PhotoImage(image=preview_image)
         
         # Create main frame with minimal padding
@@ -231,6 +235,7 @@ class CalibrationPicker:
         self.canvas.pack(pady=2)
         
         self.canvas.create_image(0, 0, anchor="nw", image=self.imgtk)
+        self.loupe = ZoomLoupe(self.canvas, self.pyramid, (preview_width, preview_height))
         
         # Button frame immediately after canvas
         btn_frame = ttk.Frame(main_frame)
@@ -251,8 +256,9 @@ class CalibrationPicker:
         self.preview_width = preview_width
         self.preview_height = preview_height
         
-        # Bind click event
+        # Bind click and hover events
         self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Motion>", self.on_motion)
         
         # Make window modal
         self.window.transient(parent)
@@ -277,18 +283,49 @@ class CalibrationPicker:
             text=f"Click the start point of your {self.known_distance} inch measurement"
         )
 
-    def on_click(self, event):
+    def _build_snap_index(self, frame):
+        """Build the snap index off the Tk thread"""
+        self.snap_index = EdgeSnapIndex(frame)
+
+    def snap_event(self, event):
+        """
+        Full-resolution position for a mouse event, snapped to the nearest edge
+        or corner unless Shift is held. Returns (x, y, kind).
+        """
         # Map preview coordinates to original image coordinates
         x = event.x * (self.orig_width / self.preview_width)
         y = event.y * (self.orig_height / self.preview_height)
-        
+        if self.snap_index is None or event.state & 0x0001:
+            return x, y, None
+        radius = SNAP_SETTINGS['radius'] * self.orig_width / self.preview_width
+        (x, y), kind = self.snap_index.snap(x, y, radius)
+        return x, y, kind
+
+    def on_motion(self, event):
+        """Show where a click would snap to, and the loupe"""
+        self.canvas.delete("snap")
+        self.loupe.move(event.x, event.y)
+        x, y, kind = self.snap_event(event)
+        if kind is None:
+            return
+        px = x * (self.preview_width / self.orig_width)
+        py = y * (self.preview_height / self.orig_height)
+        color = 'yellow' if kind == 'corner' else 'cyan'
+        self.canvas.create_oval(px - 5, py - 5, px + 5, py + 5, outline=color, width=1, tags="snap")
+
+    def on_click(self, event):
+        x, y, _ = self.snap_event(event)
         self.points.append((x, y))
         
+        # Draw at the snapped position
+        px = x * (self.preview_width / self.orig_width)
+        py = y * (self.preview_height / self.orig_height)
+        
         # Draw point with smaller radius
         radius = 3
         self.canvas.create_oval(
-            event.x-radius, event.y-radius,
-            event.x+radius, event.y+radius,
+            px-radius, py-radius,
+            px+radius, py+radius,
             fill='red',
             outline='white',
             width=1,
@@ -301,7 +338,7 @@ class CalibrationPicker:
             )
             # Draw start point label
             self.canvas.create_text(
-                event.x + 8, event.y + 8,
+                px + 8, py + 8,
                 text="Start",
                 fill='red',
                 font=('Arial', 6),
@@ -310,7 +347,7 @@ class CalibrationPicker:
         elif len(self.points) == 2:
             # Draw end point label
             self.canvas.create_text(
-                event.x + 8, event.y + 8,
+                px + 8, py + 8,
                 text="End",
                 fill='red',
                 font=('Arial', 6),
@@ -322,7 +359,7 @@ class CalibrationPicker:
             start_y = self.points[0][1] * (self.preview_height / self.orig_height)
             self.canvas.create_line(
                 start_x, start_y,
-                event.x, event.y,
+                px, py,
                 fill='red',
                 width=3,
                 tags="line"
@@ -336,16 +373,14 @@ class CalibrationPicker:
             # Calculate new scale (inches per pixel)
             new_scale = self.known_distance / pixel_distance
             
-            print("\nCalibration Debug:")
-            print(f"Point 1: ({self.points[0][0]:.2f}, {self.points[0][1]:.2f})")
-            print(f"Point 2: ({self.points[1][0]:.2f}, {self.points[1][1]:.2f})")
-            print(f"Pixel distance: {pixel_distance:.2f}")
-            print(f"Known distance: {self.known_distance:.2f} inches")
-            print(f"Calculated scale: {new_scale:.6f} inches/pixel")
+            log.info("Calibration: points (%.2f, %.2f) and (%.2f, %.2f), pixel distance %.2f, "
+                     "known distance %.2f inches, scale %.6f inches/pixel",
+                     self.points[0][0], self.points[0][1], self.points[1][0], self.points[1][1],
+                     pixel_distance, self.known_distance, new_scale)
             
             # Add verification calculation
             expected_distance = pixel_distance * new_scale
-            print(f"Verification - measured distance: {expected_distance:.2f} inches")
+            log.debug("Verification - measured distance: %.2f inches", expected_distance)
             
             # Update instruction label to show measurement
             self.instruction_label.config(
@@ -0,0 +1,154 @@
+import logging
+
+import cv2
+import numpy as np
+
+from config import FIDUCIAL_SETTINGS
+from calibration.pattern_detection import refine_corners
+from utils.undistort_utils import undistort_points
+
+log = logging.getLogger(__name__)
+
+
+class FiducialDetector:
+    """
+    ArUco/AprilTag marker finder for table registration
+    Markers are searched on a downscaled copy of the frame and their corners
+    refined with cornerSubPix on the full-resolution image, so a detection
+    costs a few milliseconds even on large captures.
+    """
+
+    def __init__(self, dictionary=FIDUCIAL_SETTINGS['dictionary'],
+                 search_max_dimension=FIDUCIAL_SETTINGS['search_max_dimension']):
+        self.dictionary = cv2.aruco.getPredefinedDictionary(getattr(cv2.aruco, dictionary))
+        parameters = cv2.aruco.DetectorParameters()
+        # Sub-pixel refinement happens on the full-resolution image instead
+        parameters.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_NONE
+        self._detector = cv2.aruco.ArucoDetector(self.dictionary, parameters)
+        self.search_max_dimension = search_max_dimension
+
+    def detect(self, frame, refine=True):
+        """
+        Find markers in a BGR or grayscale frame
+        Returns {marker_id: (4, 2) corners} in full-resolution pixels, corners
+        in the marker's own order (top-left, top-right, bottom-right, bottom-left)
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape[:2]
+        scale = min(1.0, self.search_max_dimension / max(h, w))
+        small = cv2.resize(gray, (round(w * scale), round(h * scale)),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+        corners, ids, _ = self._detector.detectMarkers(small)
+        if ids is None or len(ids) == 0:
+            log.debug("No fiducial markers found (searched %dx%d)", small.shape[1], small.shape[0])
+            return {}
+
+        ids = ids.ravel()
+        points = (np.concatenate(corners).reshape(-1, 1, 2) / scale).astype(np.float32)
+        if refine:
+            points = refine_corners(gray, points, scale)
+        points = points.reshape(-1, 4, 2).astype(np.float64)
+
+        markers = {}
+        for marker_id, marker_corners in zip(ids, points):
+            # A duplicated id is ambiguous; keep neither copy
+            if int(marker_id) in markers:
+                log.warning("Fiducial marker %d seen more than once; ignoring it", marker_id)
+                markers[int(marker_id)] = None
+            else:
+                markers[int(marker_id)] = marker_corners
+        markers = {k: v for k, v in markers.items() if v is not None}
+        log.debug("Fiducial markers found: %s (search scale %.2f)", sorted(markers), scale)
+        return markers
+
+
+def marker_table_points(position, marker_size=None):
+    """
+    Table coordinates (inches) of one marker: its centre, or its four corners
+    when the printed size is known. Markers are assumed laid square to the
+    table axes, upright with respect to table Y.
+    """
+    x, y = position
+    if not marker_size:
+        return np.array([[x, y]], dtype=np.float64)
+    half = marker_size / 2.0
+    return np.array([[x - half, y + half], [x + half, y + half],
+                     [x + half, y - half], [x - half, y - half]], dtype=np.float64)
+
+
+def solve_table_registration(markers, marker_positions, marker_size=None, model='similarity'):
+    """
+    Fit the camera-pixel -> table-inch transform from detected markers
+    markers: {marker_id: (4, 2) corners} in (undistorted) camera pixels
+    marker_positions: {marker_id: (table_x, table_y)} marker centres in inches
+    model: 'similarity' (scale, rotation, translation) or 'homography'
+    Returns (3x3 matrix, rms residual in inches, marker ids used) or None if
+    too few known markers were seen.
+    """
+    image_points, table_points, used = [], [], []
+    for marker_id, corners in sorted(markers.items()):
+        position = marker_positions.get(marker_id)
+        if position is None:
+            continue
+        image_points.append(corners if marker_size else corners.mean(axis=0, keepdims=True))
+        table_points.append(marker_table_points(position, marker_size))
+        used.append(marker_id)
+    if not used:
+        return None
+    image_points = np.concatenate(image_points)
+    table_points = np.concatenate(table_points)
+
+    if model == 'homography':
+        if len(image_points) < 4:
+            return None
+        matrix, _ = cv2.findHomography(image_points, table_points, 0)
+        if matrix is None:
+            return None
+    else:
+        if len(image_points) < 2:
+            return None
+        # Image Y points down and table Y up; a similarity cannot reflect, so
+        # fit against Y-flipped pixels and fold the flip back into the matrix
+        flip = np.diag([1.0, -1.0, 1.0])
+        affine, _ = cv2.estimateAffinePartial2D(image_points * (1.0, -1.0), table_points, method=cv2.LMEDS)
+        if affine is None:
+            return None
+        matrix = np.vstack([affine, (0.0, 0.0, 1.0)]) @ flip
+
+    projected = cv2.perspectiveTransform(image_points.reshape(-1, 1, 2), matrix).reshape(-1, 2)
+    residual = float(np.sqrt(np.mean(np.sum((projected - table_points) ** 2, axis=1))))
+    return matrix, residual, used
+
+
+def register_table(image, marker_positions, camera_matrix=None, dist_coeffs=None, calibration_size=None,
+                   downscale=1.0, detector=None, settings=FIDUCIAL_SETTINGS):
+    """
+    Detect fiducials on a raw capture and solve its table registration
+    Marker corners are lens-corrected as sparse points, so the result maps
+    undistorted camera pixels (the export's frame) to table inches.
+    downscale: the image is a reduced copy of the camera image
+    Returns a dict with matrix, residual, markers (ids used) and found (ids seen),
+    or None when the markers do not determine a transform within max_residual.
+    """
+    detector = detector if detector is not None else FiducialDetector(settings['dictionary'],
+                                                                      settings['search_max_dimension'])
+    markers = detector.detect(image)
+    found = sorted(markers)
+
+    camera_size = (image.shape[1] / downscale, image.shape[0] / downscale)
+    markers = {k: undistort_points(v / downscale, camera_matrix, dist_coeffs, camera_size, calibration_size)
+               for k, v in markers.items()}
+
+    solution = solve_table_registration(markers, marker_positions, settings['marker_size'], settings['model'])
+    if solution is None:
+        log.warning("Fiducial registration failed: markers %s found, positions known for %s",
+                    found, sorted(marker_positions))
+        return None
+    matrix, residual, used = solution
+    if residual > settings['max_residual']:
+        log.warning("Fiducial registration rejected: residual %.4f in exceeds %.4f in (markers %s)",
+                    residual, settings['max_residual'], used)
+        return None
+    log.info("Table registered from fiducials %s, residual %.4f in", used, residual)
+    return {'matrix': matrix, 'residual': residual, 'markers': used, 'found': found}
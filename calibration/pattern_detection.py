@@ -0,0 +1,129 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from config import CALIBRATION_SETTINGS
+
+log = logging.getLogger(__name__)
+
+# Coarse search: adaptive threshold copes with uneven table lighting and
+# FAST_CHECK bails out early when there is no board at all
+SEARCH_FLAGS = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE + cv2.CALIB_CB_FAST_CHECK
+
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+
+class ChessboardDetector:
+    """
+    Chessboard finder for lens calibration captures
+    Searches a downscaled copy of the frame, trying the last successful
+    pattern size first and the remaining sizes in parallel, then refines
+    the coarse corners with cornerSubPix on the full-resolution image.
+    """
+
+    def __init__(self, pattern_sizes=CALIBRATION_SETTINGS['pattern_sizes'],
+                 search_max_dimension=CALIBRATION_SETTINGS['search_max_dimension'],
+                 workers=CALIBRATION_SETTINGS['detection_workers']):
+        self.pattern_sizes = [tuple(size) for size in pattern_sizes]
+        self.search_max_dimension = search_max_dimension
+        self.last_pattern_size = None
+        self._executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def _candidates(self):
+        """Pattern sizes in search order, last successful size first"""
+        if self.last_pattern_size in self.pattern_sizes:
+            return [self.last_pattern_size] + [s for s in self.pattern_sizes if s != self.last_pattern_size]
+        return list(self.pattern_sizes)
+
+    @staticmethod
+    def _find(gray, pattern_size):
+        """Search one pattern size on the raw and the equalised image"""
+        for image in (gray, cv2.equalizeHist(gray)):
+            # checkChessboard is a cheap, permissive pre-test; the full search can
+            # take seconds on textured images without a board
+            if not cv2.checkChessboard(image, pattern_size):
+                continue
+            found, corners = cv2.findChessboardCorners(image, pattern_size, SEARCH_FLAGS)
+            if found:
+                return corners
+        return None
+
+    def _search(self, gray, sizes):
+        """First pattern size (in order) found on the image, with its corners"""
+        if not sizes:
+            return None, None
+
+        # The remembered size usually hits; only fan out when it does not
+        corners = self._find(gray, sizes[0])
+        if corners is not None:
+            return sizes[0], corners
+
+        rest = sizes[1:]
+        if self._executor is not None and len(rest) > 1:
+            results = list(self._executor.map(lambda size: self._find(gray, size), rest))
+        else:
+            results = [self._find(gray, size) for size in rest]
+        for size, corners in zip(rest, results):
+            if corners is not None:
+                return size, corners
+        return None, None
+
+    def detect(self, frame):
+        """
+        Find a chessboard in a BGR or grayscale frame
+        Returns (pattern_size, corners) with sub-pixel corners in full-resolution
+        coordinates, or (None, None) if no board was found.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        pattern_size, corners, scale = self.search(gray)
+        if pattern_size is None:
+            return None, None
+        return pattern_size, refine_corners(gray, corners, scale)
+
+    def search(self, frame):
+        """
+        Coarse chessboard search without sub-pixel refinement
+        Returns (pattern_size, corners, scale), or (None, None, None) if no board
+        was found. Corners are in full-resolution coordinates but only as precise
+        as the search at scale; pass scale to refine_corners. Safe to call from
+        several threads at once.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape[:2]
+        scale = min(1.0, self.search_max_dimension / max(h, w))
+        small = cv2.resize(gray, (round(w * scale), round(h * scale)),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+        sizes = self._candidates()
+        pattern_size, corners = self._search(small, sizes)
+
+        # Small or distant boards may vanish when downscaled; give the preferred
+        # size one full-resolution try when the coarse image looks like a board
+        if pattern_size is None and scale < 1.0 and any(
+                cv2.checkChessboard(small, size) for size in sizes):
+            corners = self._find(gray, sizes[0])
+            if corners is not None:
+                pattern_size, scale = sizes[0], 1.0
+
+        if pattern_size is None:
+            log.debug("No chessboard found (searched %dx%d, sizes %s)", small.shape[1], small.shape[0], sizes)
+            return None, None, None
+
+        corners = (corners / scale).astype(np.float32)
+        self.last_pattern_size = pattern_size
+        log.debug("Chessboard %s found (search scale %.2f)", pattern_size, scale)
+        return pattern_size, corners, scale
+
+
+def refine_corners(gray, corners, search_scale=1.0):
+    """
+    Sub-pixel refinement of coarse corners on the full-resolution image
+    The window covers the quantisation error of a search at search_scale
+    but stays inside one square.
+    """
+    corners = np.array(corners, dtype=np.float32)
+    spacing = np.median(np.linalg.norm(np.diff(corners.reshape(-1, 2), axis=0), axis=1))
+    half = int(max(2, min(max(5, np.ceil(2.0 / search_scale) + 3), spacing * 0.4)))
+    return cv2.cornerSubPix(gray, corners, (half, half), (-1, -1), SUBPIX_CRITERIA)
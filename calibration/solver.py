@@ -0,0 +1,170 @@
+import logging
+import multiprocessing
+import queue
+
+import cv2
+import numpy as np
+
+from config import CALIBRATION_SETTINGS
+
+log = logging.getLogger(__name__)
+
+
+class CalibrationView:
+    """
+    One accepted calibration capture
+    Only the detected corners are needed to solve; the frame is kept as a
+    small thumbnail for display.
+    """
+
+    def __init__(self, frame, corners, thumbnail_width=CALIBRATION_SETTINGS['thumbnail_width']):
+        h, w = frame.shape[:2]
+        self.image_size = (w, h)
+        self.corners = np.asarray(corners, dtype=np.float32).reshape(-1, 1, 2)
+        scale = min(1.0, thumbnail_width / float(w))
+        self.thumbnail = cv2.resize(frame, (max(1, round(w * scale)), max(1, round(h * scale))),
+                                    interpolation=cv2.INTER_AREA)
+
+
+def board_object_points(pattern_size):
+    """Planar board corner coordinates in units of one square"""
+    objp = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:pattern_size[0], 0:pattern_size[1]].T.reshape(-1, 2)
+    return objp
+
+
+def _rodrigues(rvecs):
+    """Rotation matrices (V, 3, 3) from rotation vectors (V, 3)"""
+    theta = np.linalg.norm(rvecs, axis=1)
+    safe = np.where(theta > 1e-12, theta, 1.0)
+    k = rvecs / safe[:, None]
+    zeros = np.zeros(len(rvecs))
+    K = np.stack([
+        np.stack([zeros, -k[:, 2], k[:, 1]], axis=1),
+        np.stack([k[:, 2], zeros, -k[:, 0]], axis=1),
+        np.stack([-k[:, 1], k[:, 0], zeros], axis=1),
+    ], axis=1)
+    sin = np.sin(theta)[:, None, None]
+    cos = np.cos(theta)[:, None, None]
+    R = np.eye(3)[None] + sin * K + (1 - cos) * (K @ K)
+    R[theta <= 1e-12] = np.eye(3)
+    return R
+
+
+def project_points(object_points, rvecs, tvecs, camera_matrix, dist_coeffs):
+    """
+    Project (V, N, 3) board points for all V views at once
+    Implements OpenCV's pinhole model with radial (k1, k2, k3[, k4-k6 rational])
+    and tangential (p1, p2) distortion. Returns (V, N, 2).
+    """
+    rvecs = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3)
+    tvecs = np.asarray(tvecs, dtype=np.float64).reshape(-1, 3)
+    cam = np.einsum('vij,vnj->vni', _rodrigues(rvecs), object_points) + tvecs[:, None, :]
+    x = cam[..., 0] / cam[..., 2]
+    y = cam[..., 1] / cam[..., 2]
+
+    d = np.zeros(8)
+    coeffs = np.asarray(dist_coeffs, dtype=np.float64).ravel()[:8]
+    d[:len(coeffs)] = coeffs
+    k1, k2, p1, p2, k3, k4, k5, k6 = d
+
+    r2 = x * x + y * y
+    radial = (1 + r2 * (k1 + r2 * (k2 + r2 * k3))) / (1 + r2 * (k4 + r2 * (k5 + r2 * k6)))
+    xd = x * radial + 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+    yd = y * radial + p1 * (r2 + 2 * y * y) + 2 * p2 * x * y
+
+    fx, fy = camera_matrix[0, 0], camera_matrix[1, 1]
+    cx, cy = camera_matrix[0, 2], camera_matrix[1, 2]
+    return np.stack([fx * xd + camera_matrix[0, 1] * yd + cx, fy * yd + cy], axis=-1)
+
+
+def reprojection_errors(object_points, image_points, rvecs, tvecs, camera_matrix, dist_coeffs):
+    """RMS reprojection error of every view in pixels, in one pass"""
+    projected = project_points(object_points, rvecs, tvecs, camera_matrix, dist_coeffs)
+    residual = projected - image_points
+    return np.sqrt(np.mean(np.sum(residual * residual, axis=-1), axis=1))
+
+
+def solve_calibration(object_points, image_points, image_size, progress=None,
+                      settings=CALIBRATION_SETTINGS):
+    """
+    Calibrate, then repeatedly drop the worst views and re-solve
+    object_points: (V, N, 3); image_points: (V, N, 2)
+    progress: optional callable(fraction, message)
+    Returns a dict with camera_matrix, dist_coeffs, rms, view_errors, kept (view indices).
+    """
+    object_points = np.asarray(object_points, dtype=np.float32)
+    image_points = np.asarray(image_points, dtype=np.float32)
+    kept = np.arange(len(object_points))
+    rounds = settings['outlier_rounds']
+    report = progress or (lambda fraction, message: None)
+
+    for round_index in range(rounds + 1):
+        report(round_index / (rounds + 1.0), f"Solving with {len(kept)} views (pass {round_index + 1})")
+        rms, camera_matrix, dist_coeffs, rvecs, tvecs = cv2.calibrateCamera(
+            list(object_points[kept]), list(image_points[kept]), tuple(image_size), None, None)
+        errors = reprojection_errors(object_points[kept], image_points[kept],
+                                     np.array(rvecs), np.array(tvecs), camera_matrix, dist_coeffs)
+
+        # Outliers: well above the typical view error; never go below the minimum view count
+        limit = max(settings['outlier_factor'] * float(np.median(errors)), settings['outlier_min_error'])
+        worst = np.argsort(errors)[::-1]
+        droppable = len(kept) - settings['min_views']
+        drop = [i for i in worst[:max(0, droppable)] if errors[i] > limit]
+        drop = drop[:max(1, int(len(kept) * settings['outlier_drop_fraction']))]
+        if round_index == rounds or not drop:
+            break
+        log.info("Dropping %d views with reprojection error above %.3f px", len(drop), limit)
+        kept = np.delete(kept, drop)
+
+    report(1.0, "Done")
+    return {
+        'camera_matrix': camera_matrix,
+        'dist_coeffs': dist_coeffs,
+        'rms': float(rms),
+        'view_errors': errors,
+        'kept': kept,
+    }
+
+
+def _solve_worker(object_points, image_points, image_size, messages):
+    """Entry point of the solver process; reports through the messages queue"""
+    try:
+        result = solve_calibration(object_points, image_points, image_size,
+                                   progress=lambda f, m: messages.put(('progress', f, m)))
+        messages.put(('result', result, None))
+    except Exception as e:
+        messages.put(('error', str(e), None))
+
+
+class CalibrationSolverProcess:
+    """
+    Runs solve_calibration in a separate process so the Tk thread stays responsive
+    Call poll() from the Tk thread; it returns ('progress', fraction, message),
+    ('result', result, None), ('error', message, None) or None.
+    """
+
+    def __init__(self, object_points, image_points, image_size):
+        context = multiprocessing.get_context('spawn')
+        self._messages = context.Queue()
+        self._process = context.Process(target=_solve_worker, daemon=True,
+                                        args=(np.asarray(object_points), np.asarray(image_points),
+                                              tuple(image_size), self._messages))
+        self._process.start()
+
+    def poll(self):
+        """Latest message from the solver, or None if there is nothing new"""
+        try:
+            message = self._messages.get_nowait()
+        except queue.Empty:
+            if not self._process.is_alive() and self._process.exitcode not in (0, None):
+                return ('error', f"Calibration process exited with code {self._process.exitcode}", None)
+            return None
+        if message[0] in ('result', 'error'):
+            self._process.join(timeout=1.0)
+        return message
+
+    def cancel(self):
+        """Stop the solver process"""
+        if self._process.is_alive():
+            self._process.terminate()
@@ -28,15 +28,110 @@ DEFAULT_CAMERA_SETTINGS = {
 # DXF export settings
 DXF_SETTINGS = {
     'min_contour_area': 3,
-    'large_contour_tolerance': 0.3,
-    'medium_contour_tolerance': 0.4,
-    'small_contour_tolerance': 0.5,
-    'large_contour_threshold': 1000,
-    'medium_contour_threshold': 100
+    'simplify_method': 'dp',        # 'dp' = Douglas-Peucker, 'vw' = Visvalingam-Whyatt
+    'simplify_tolerance': 0.03,     # Maximum deviation in inches
+    'max_vertices': 200000,         # Global vertex budget for one export
+    'vectorizer': 'contours',       # 'contours' = findContours, 'centerline' = linked Canny edges
+    'edge_link_gap': 3,             # Join centerline ends closer than this (pixels)
+    'min_polyline_length': 5,       # Drop centerlines shorter than this (pixels)
+    'progressive_export': True,     # Show a coarse preview first, refine in the background
+    'coarse_scale': 0.25,           # Image scale of the coarse preview pass
+    'undistort_mode': 'image'       # 'image' = remap the frame, 'points' = correct simplified vertices only
+}
+
+# Export pipeline stage cache (total bytes of cached stage outputs)
+EXPORT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Lens calibration
+CALIBRATION_SETTINGS = {
+    'pattern_sizes': [(8, 6), (6, 8), (7, 5), (5, 7), (9, 7), (7, 9)],  # Inner corners
+    'search_max_dimension': 640,    # Chessboard search runs on a copy at most this large
+    'detection_workers': 4,         # Threads for trying pattern sizes in parallel
+    # Auto-capture: keep sharp, still boards that add coverage or a new pose
+    'coverage_grid': (4, 6),        # Rows, columns of the coverage heat map
+    'min_coverage': 0.75,           # Fraction of grid cells needed before calibrating
+    'min_images': 10,
+    'min_sharpness': 50.0,          # Variance of the Laplacian over the board
+    'max_motion_px': 2.0,           # Mean corner motion between preview frames
+    'min_capture_interval': 0.5,    # Seconds between kept frames
+    # Solver: drop views whose reprojection error is far above the median and re-solve
+    'thumbnail_width': 160,         # Only corners and a thumbnail are kept per view
+    'min_views': 5,
+    'outlier_rounds': 2,
+    'outlier_factor': 2.5,          # Drop views above this multiple of the median error
+    'outlier_min_error': 0.5,       # ... but never views below this error (pixels)
+    'outlier_drop_fraction': 0.2    # At most this fraction of views per round
+}
+
+# Table registration from fiducial markers at known table positions
+FIDUCIAL_SETTINGS = {
+    'dictionary': 'DICT_4X4_50',    # Any cv2.aruco dictionary, e.g. 'DICT_APRILTAG_36h11'
+    'markers': {},                  # Marker id -> (table_x, table_y) of its centre in inches
+    'marker_size': None,            # Printed side length in inches; enables corner points
+    'model': 'similarity',          # 'similarity' (needs 2 markers) or 'homography' (4 points)
+    'search_max_dimension': 960,    # Markers are searched on a copy at most this large
+    'max_residual': 0.05            # Reject registrations with a larger RMS error (inches)
+}
+
+# Lens undistortion remap tables (per camera, resolution and calibration)
+UNDISTORT_SETTINGS = {
+    'cache_directory': 'calibration_cache',
+    'max_cached_maps': 8            # In-memory map pairs; every map is also kept on disk
+}
+
+# Debug artifacts ('off', 'basic' = final masks and contours, 'verbose' = every intermediate)
+DEBUG_SETTINGS = {
+    'level': 'off',
+    'directory': 'debug',           # One timestamped sub-directory per run
+    'queue_size': 16,               # Pending images; more are dropped instead of blocking
+    'png_compression': 1            # 0-9; low values encode much faster
+}
+
+# Logging (levels are logging level names; loggers are named after their module)
+LOG_SETTINGS = {
+    'level': 'WARNING',             # Root level; INFO/DEBUG for troubleshooting
+    'module_levels': {},            # e.g. {'utils.export_pipeline': 'DEBUG'}
+    'rate_limit': 5.0,              # Records per second per message template
+    'rate_burst': 20,               # Records allowed at once before limiting
+    'queue_size': 10000             # Pending records; more are dropped
+}
+
+# Span tracing of capture, preview, export and calibration (Debug > Record Trace, or --trace FILE)
+TRACE_SETTINGS = {
+    'enabled': False,
+    'buffer_events': 200000,        # Most recent spans kept; older ones are dropped
+    'directory': 'traces'           # Saved as trace_<timestamp>.json; open in ui.perfetto.dev
+}
+
+# Station metrics: Prometheus endpoint and/or JSON snapshot file (--metrics-port PORT, --metrics-file FILE)
+METRICS_SETTINGS = {
+    'port': None,                   # e.g. 9464 to serve http://<host>:<port>/metrics
+    'host': '127.0.0.1',            # '0.0.0.0' to let a central Prometheus scrape the station
+    'snapshot_file': None,          # e.g. 'metrics.json'
+    'snapshot_interval_s': 30,
+    'station': ''                   # Name in the JSON snapshot; defaults to the host name
+}
+
+# Start-up timeline (python -m <package> --profile-startup, or set 'profile' here)
+STARTUP_SETTINGS = {
+    'profile': False,
+    'history_file': 'startup_profile.jsonl',   # One JSON line per profiled start, to track time-to-interactive
+    'report_timeout_ms': 15000                 # Report without a first frame if the camera never delivers one
+}
+
+# Point pickers snap clicks to the nearest strong edge or corner of the full-resolution frame
+SNAP_SETTINGS = {
+    'radius': 10,                   # Snapping distance in preview pixels; hold Shift to disable
+    'canny_low': 50,
+    'canny_high': 150,
+    'max_corners': 2000,
+    'corner_quality': 0.05          # Relative to the strongest corner in the frame
 }
 
 # File paths
 CAPTURE_DIRECTORY = "captures"
+SETTINGS_DIRECTORY = "settings"
+SETTINGS_EXTENSION = ".cncsettings"
 DEBUG_IMAGE_PREFIX = "debug_"
 CAPTURED_IMAGE_PREFIX = "captured_image_"
 
@@ -45,6 +140,25 @@ PREVIEW_BUFFER_SIZE = 2
 PREVIEW_UPDATE_INTERVAL = 0.03  # seconds
 PREVIEW_ERROR_DELAY = 0.1  # seconds
 
+# Live preview quality governor: lowers preview resolution, edge scale and frame rate to hold target_fps
+PREVIEW_GOVERNOR_SETTINGS = {
+    'enabled': True,
+    'target_fps': 15,
+    'smoothing': 0.2,               # Weight of the newest render time in the moving average
+    'degrade_above': 1.0,           # Step down when renders take more than this share of the frame budget
+    'restore_below': 0.5,           # Step up when the better level is expected to take less than this share
+    'dwell_s': 1.0,                 # Minimum time between two level changes
+    'memory_s': 10.0                # How long a level's measured cost is trusted
+}
+
+# Performance HUD under the preview (Debug > Performance HUD)
+PERF_HUD_SETTINGS = {
+    'visible': False,
+    'window_s': 2.0,                # Rolling window the rates and means are taken over
+    'refresh_ms': 500,              # HUD text update interval
+    'realtime_ratio': 0.9           # Flag the preview when it shows fewer of the camera's frames than this
+}
+
 # GUI settings
 GUI_SETTINGS = {
     'preview_min_width': 100,
@@ -54,5 +168,8 @@ GUI_SETTINGS = {
     'font_family': 'Arial',
     'font_size_small': 8,
     'font_size_normal': 10,
-    'font_size_large': 12
+    'font_size_large': 12,
+    'loupe_half_size': 15,          # Loupe shows 2x this many full-resolution pixels per side
+    'loupe_zoom': 6,
+    'loupe_refresh_ms': 16          # Redraw the loupe at most once per display frame
 } 
\ No newline at end of file
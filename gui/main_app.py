@@ -8,25 +8,71 @@ import time
 import threading
 from collections import deque
 from queue import Queue, Empty
-import traceback
+import logging
 from datetime import datetime
-import ezdxf
 import json
-import pickle
 
+from config import (DXF_SETTINGS, DEBUG_SETTINGS, FIDUCIAL_SETTINGS, SNAP_SETTINGS, SETTINGS_EXTENSION,
+                    STARTUP_SETTINGS, PERF_HUD_SETTINGS, PREVIEW_UPDATE_INTERVAL)
 from calibration.calibration_window import CalibrationWindow
-from utils.image_utils import color_based_edge_detection, simplify_contour, normalize_image_safe
+from calibration.pattern_detection import ChessboardDetector
+from calibration.auto_capture import CalibrationAutoCapture
+from calibration.solver import CalibrationView, CalibrationSolverProcess, board_object_points
+from utils.image_utils import (color_based_edge_detection, normalize_image_safe, preview_detection,
+                               compose_preview)
+from utils.geometry_utils import SIMPLIFY_METHODS
+from utils.export_pipeline import ExportPipeline
+from utils.undistort_utils import undistort_maps, UndistortMapCache, UNDISTORT_MODES
+from utils.vectorize_utils import VECTORIZERS
+from utils.snap_utils import EdgeSnapIndex
+from utils.pyramid_utils import ImagePyramid
+from utils.pipeline_params import PipelineParams
+from utils.settings_store import read_settings, write_settings
+from utils.startup_profiler import startup
+from utils.trace_utils import tracer
+from utils.perf_stats import PreviewStats, format_hud
+from utils.preview_governor import PreviewGovernor
+from utils import metrics
+from gui.zoom_loupe import ZoomLoupe
+from gui.preview_renderer import BufferPool, PhotoSlot
+from utils.debug_utils import debug_sink, DEBUG_LEVELS
 from utils.camera_utils import list_ffmpeg_cameras, build_camera_index_map, get_latest_image, print_camera_parameters
 
+log = logging.getLogger(__name__)
+
+# PipelineParams fields whose Tk variable has a different attribute name
+_PARAM_VARIABLES = {'camera': 'selected_camera'}
+
+# Saved settings whose Tk variable has a different attribute name
+_SETTINGS_VARIABLES = {'exposure': 'exposure_var', 'brightness': 'brightness_var', 'contrast': 'contrast_var'}
+
 class CNCVisionApp:
     def __init__(self, master):
         self.master = master
         self.master.title("CNC Vision")
         
-        # Add lens distortion parameters
+        # Add lens distortion parameters (calibration_size is the resolution they were solved at)
         self.camera_matrix = None
         self.dist_coeffs = None
+        self.calibration_size = None
         self.calibration_images = []
+        self.chessboard_detector = ChessboardDetector()
+        self.auto_capture = None
+        self.calibration_solver = None
+        
+        # Stage-cached export pipeline; tweaking one setting reruns only the stages after it
+        self.export_pipeline = ExportPipeline()
+
+        # Rolling fps, latency and stage timings of the live preview, shown by the HUD
+        self.preview_stats = PreviewStats()
+        self.hud_visible = tk.BooleanVar(master, value=PERF_HUD_SETTINGS['visible'])
+        self._hud_after = None
+
+        # Trades preview resolution, edge scale and frame rate for speed; never affects capture or export
+        self.preview_governor = PreviewGovernor()
+        # Remap tables at preview size; cheap to build and one per window size, so not persisted
+        self.preview_maps = UndistortMapCache(directory=None)
+        self.adaptive_preview = tk.BooleanVar(master, value=self.preview_governor.enabled)
         
         # Define color scheme
         self.colors = {
@@ -70,7 +116,8 @@ class CNCVisionApp:
         # Configure canvas scrolling
         self.main_canvas.configure(yscrollcommand=self.scrollbar.set)
         
-        # Bind canvas resizing
+        # Bind canvas resizing; preview workers read the width from this attribute
+        self.preview_canvas_width = 900
         self.main_canvas.bind('<Configure>', self.on_canvas_configure)
         
         # Layout canvas and scrollbar
@@ -81,12 +128,20 @@ class CNCVisionApp:
         self.scrollable_frame.grid_columnconfigure(0, weight=1)
 
         # Initialize all variables
-        self.initialize_variables()
+        with startup.phase('variables'):
+            self.initialize_variables()
         
         # Create UI components
-        self.create_preview_frame()
-        self.create_settings_frame()
-        self.create_control_buttons()
+        with startup.phase('widgets'):
+            self.create_preview_frame()
+            self.create_settings_frame()
+            self.create_control_buttons()
+        
+        # Workers read settings from an immutable snapshot, republished on every change
+        self.pipeline_params = None
+        self._params_suspended = False
+        self.publish_params()
+        self.trace_params()
         
         # Add mousewheel scrolling
         self.main_canvas.bind_all("<MouseWheel>", self._on_mousewheel)
@@ -97,8 +152,8 @@ class CNCVisionApp:
         # Bind resize event
         self.master.bind('<Configure>', self.on_window_resize)
         
-        # Start preview
-        self.open_live_preview()
+        # Camera discovery and the preview start once the window has been painted
+        self.master.bind('<Map>', self._on_first_map, add="+")
 
         # Add to __init__ after other initializations
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -121,6 +176,10 @@ class CNCVisionApp:
         self.reference_table_y = tk.DoubleVar(value=30.54024)  # Default Y coordinate on CNC table in inches
         self.use_reference_point = tk.BooleanVar(value=True)  # Enable reference point by default
         
+        # Fiducial markers at known table positions replace the reference point and rotation
+        self.fiducial_markers = dict(FIDUCIAL_SETTINGS['markers'])  # Marker id -> (table_x, table_y) inches
+        self.use_fiducials = tk.BooleanVar(value=bool(self.fiducial_markers))
+        
         # Table boundary box variables
         self.add_table_boundary = tk.BooleanVar(value=True)  # Enable table boundary box by default
         self.table_width = tk.DoubleVar(value=144.0)  # Table width in inches
@@ -129,12 +188,30 @@ class CNCVisionApp:
         # Edge detection resolution control
         self.edge_scale = tk.DoubleVar(value=1.0)  # 1.0 = full resolution, 2.0 = double resolution
         
+        # Polyline simplification (tolerance in inches, vertex budget for the whole export)
+        self.simplify_method = tk.StringVar(value=DXF_SETTINGS['simplify_method'])
+        self.simplify_tolerance = tk.DoubleVar(value=DXF_SETTINGS['simplify_tolerance'])
+        self.max_vertices = tk.IntVar(value=DXF_SETTINGS['max_vertices'])
+        
+        # Vectoriser: 'contours' traces region outlines, 'centerline' links Canny edges
+        self.vectorizer = tk.StringVar(value=DXF_SETTINGS['vectorizer'])
+        
+        # Progressive export: coarse overlay first, full-resolution result in the background
+        self.progressive_export = tk.BooleanVar(value=DXF_SETTINGS['progressive_export'])
+        self.export_generation = 0
+        self.export_result = None
+        self.export_overlay = None
+        
+        # Lens correction of exports: remap the whole image, or only the simplified vertices
+        self.undistort_mode = tk.StringVar(value=DXF_SETTINGS['undistort_mode'])
+        
         # Edge visualization color (BGR format)
         self.edge_color = [0, 255, 0]  # Default green
         
         # Background subtraction variables
         self.background_image = None
         self.background_edges = None
+        self.background_edges_raw = None  # Same, without lens correction ('points' exports)
         self.use_background_subtraction = tk.BooleanVar(value=False)
         
         # Color detection variables
@@ -156,15 +233,11 @@ class CNCVisionApp:
         self.capture_directory = "captures"
         os.makedirs(self.capture_directory, exist_ok=True)
 
-        self.camera_index_map = build_camera_index_map()
-        self.available_cameras = list(self.camera_index_map.values())
-
-        if not self.available_cameras:
-            messagebox.showerror("Camera Error", "No cameras detected via FFmpeg.")
-            self.master.destroy()
-            return
-
-        self.selected_camera.set(self.available_cameras[0])
+        # Filled in by start_camera after the first paint; probing cameras takes seconds
+        self.camera_index_map = {}
+        self.available_cameras = []
+        self.camera_discovery = None
+        self.selected_camera.set("Detecting cameras...")
 
         # Preview-related variables
         self.cap = None
@@ -189,6 +262,22 @@ class CNCVisionApp:
         self.preview_label_edges = tk.Label(self.preview_frame)
         self.preview_label_edges.grid(row=0, column=1, padx=2, pady=2, sticky="nsew")
 
+        # Persistent photos updated in place, fed from recycled RGB buffers
+        self.preview_slots = (PhotoSlot(self.preview_label_original), PhotoSlot(self.preview_label_edges))
+        self.preview_buffers = BufferPool()
+
+        # Shown while the governor has reduced preview quality
+        self.quality_label = tk.Label(self.preview_frame, anchor="w", font=('Arial', 9),
+                                      bg=self.colors['secondary'], fg=self.colors['accent2'])
+        self.quality_label.grid(row=2, column=0, columnspan=2, padx=4, sticky="ew")
+        self.quality_label.grid_remove()
+
+        # Performance HUD; gridded only while Debug > Performance HUD is on
+        self.hud_label = tk.Label(self.preview_frame, justify=tk.LEFT, anchor="w", font=('Courier', 9),
+                                  bg=self.colors['secondary'], fg=self.colors['text'])
+        if self.hud_visible.get():
+            self.toggle_hud()
+
     def create_settings_frame(self):
         """Create the settings frame with all control panels"""
         settings_frame = tk.Frame(self.scrollable_frame, bd=2, relief=tk.GROOVE, bg=self.colors['secondary'])
@@ -279,7 +368,7 @@ class CNCVisionApp:
         camera_grid.grid_columnconfigure(1, weight=1)
 
         tk.Label(camera_grid, text="Camera:", font=('Arial', 8)).grid(row=0, column=0, sticky="w")
-        self.camera_menu = tk.OptionMenu(camera_grid, self.selected_camera, *self.available_cameras, 
+        self.camera_menu = tk.OptionMenu(camera_grid, self.selected_camera, self.selected_camera.get(),
                                        command=self.change_camera)
         self.camera_menu.grid(row=0, column=1, sticky="ew", padx=2)
         self.camera_menu.configure(font=('Arial', 8))
@@ -444,6 +533,10 @@ class CNCVisionApp:
                  **{'bg': self.colors['accent1'], 'fg': 'white', 'relief': tk.RAISED, 
                     'font': ('Arial', 8), 'padx': 3, 'pady': 1}).grid(row=2, column=0, sticky="ew", pady=1)
 
+        tk.Checkbutton(ref_frame, text="Register from Fiducial Markers",
+                      variable=self.use_fiducials,
+                      font=('Arial', 8)).grid(row=3, column=0, sticky="w", pady=1)
+
         # Table boundary box settings
         boundary_frame = tk.Frame(dxf_frame, bg=self.colors['secondary'])
         boundary_frame.grid(row=3, column=0, sticky="ew", pady=2)
@@ -464,6 +557,36 @@ class CNCVisionApp:
         tk.Label(dim_frame, text="Table Height (inches):", font=('Arial', 8)).grid(row=1, column=0, sticky="w")
         tk.Entry(dim_frame, textvariable=self.table_height, width=6).grid(row=1, column=1, sticky="ew", padx=1)
 
+        # Polyline simplification settings
+        simplify_frame = tk.Frame(dxf_frame, bg=self.colors['secondary'])
+        simplify_frame.grid(row=4, column=0, sticky="ew", pady=2)
+        simplify_frame.grid_columnconfigure((0,1), weight=1)
+
+        tk.Label(simplify_frame, text="Simplify Method:", font=('Arial', 8)).grid(row=0, column=0, sticky="w")
+        method_menu = tk.OptionMenu(simplify_frame, self.simplify_method, *SIMPLIFY_METHODS)
+        method_menu.grid(row=0, column=1, sticky="ew", padx=1)
+        method_menu.configure(font=('Arial', 8))
+
+        tk.Label(simplify_frame, text="Tolerance (inches):", font=('Arial', 8)).grid(row=1, column=0, sticky="w")
+        tk.Entry(simplify_frame, textvariable=self.simplify_tolerance, width=6).grid(row=1, column=1, sticky="ew", padx=1)
+
+        tk.Label(simplify_frame, text="Max Vertices:", font=('Arial', 8)).grid(row=2, column=0, sticky="w")
+        tk.Entry(simplify_frame, textvariable=self.max_vertices, width=6).grid(row=2, column=1, sticky="ew", padx=1)
+
+        tk.Label(simplify_frame, text="Vectorizer:", font=('Arial', 8)).grid(row=3, column=0, sticky="w")
+        vectorizer_menu = tk.OptionMenu(simplify_frame, self.vectorizer, *VECTORIZERS)
+        vectorizer_menu.grid(row=3, column=1, sticky="ew", padx=1)
+        vectorizer_menu.configure(font=('Arial', 8))
+
+        tk.Checkbutton(simplify_frame, text="Progressive Export",
+                      variable=self.progressive_export,
+                      font=('Arial', 8)).grid(row=4, column=0, columnspan=2, sticky="w", pady=1)
+
+        tk.Label(simplify_frame, text="Undistort:", font=('Arial', 8)).grid(row=5, column=0, sticky="w")
+        undistort_menu = tk.OptionMenu(simplify_frame, self.undistort_mode, *UNDISTORT_MODES)
+        undistort_menu.grid(row=5, column=1, sticky="ew", padx=1)
+        undistort_menu.configure(font=('Arial', 8))
+
         # Add background subtraction panel right after DXF settings
         bg_frame = tk.LabelFrame(self.dxf_column, text="Background Subtraction", 
                                **{'bg': self.colors['secondary'], 'fg': self.colors['text'], 
@@ -526,7 +649,7 @@ class CNCVisionApp:
         # Update preview sizes if needed
         if hasattr(self, 'preview_frame'):
             # Calculate new preview width (1/2 of canvas width for each preview)
-            new_width = max(100, event.width // 2 - 10)  # Minimum width of 100px
+            self.preview_canvas_width = event.width
             if self.frame_buffer:
                 self.refresh_preview()
 
@@ -566,8 +689,8 @@ class CNCVisionApp:
                 actual_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
                 actual_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
                 
-                print(f"Resolution change requested: {width}x{height}")
-                print(f"Actual camera resolution: {actual_width}x{actual_height}")
+                log.info("Resolution change requested: %dx%d, actual camera resolution: %dx%d",
+                         width, height, actual_width, actual_height)
                 
                 # Scale inches_per_pixel based on resolution change
                 old_scale = self.inches_per_pixel.get()
@@ -577,22 +700,23 @@ class CNCVisionApp:
                 scale_ratio = (width_ratio + height_ratio) / 2
                 new_scale = old_scale / scale_ratio
                 self.inches_per_pixel.set(new_scale)
-                print(f"Scaled inches_per_pixel from {old_scale:.6f} to {new_scale:.6f}")
+                log.info("Scaled inches_per_pixel from %.6f to %.6f", old_scale, new_scale)
                 
                 # Update reference point if it exists
                 if hasattr(self, 'reference_point') and self.reference_point is not None:
                     old_x, old_y = self.reference_point
                     # Scale reference point to new resolution
-                    new_x = int(old_x * (actual_width / old_width))
-                    new_y = int(old_y * (actual_height / old_height))
+                    new_x = round(old_x * (actual_width / old_width), 2)
+                    new_y = round(old_y * (actual_height / old_height), 2)
                     self.reference_point = (new_x, new_y)
                     self.reference_point_resolution = (actual_width, actual_height)
-                    print(f"Reference point scaled from ({old_x}, {old_y}) to ({new_x}, {new_y})")
+                    self.publish_params()
+                    log.info("Reference point scaled from (%s, %s) to (%s, %s)", old_x, old_y, new_x, new_y)
                 
                 # Restart preview with new resolution
                 self.open_live_preview()
         except Exception as e:
-            print(f"Error changing resolution: {e}")
+            log.error("Error changing resolution: %s", e)
             messagebox.showerror("Resolution Error", f"Failed to change resolution: {e}")
 
     def change_camera(self, selection):
@@ -601,6 +725,54 @@ class CNCVisionApp:
         # Open preview with new camera without checking resolutions
         self.open_live_preview()
 
+    def _on_first_map(self, event):
+        """Start the camera once the main window is on screen"""
+        if event.widget is not self.master or self.camera_discovery is not None:
+            return
+        # Let the pending redraws run first, so the window is painted before the camera starts
+        self.master.after_idle(self.start_camera)
+
+    def start_camera(self):
+        """Discover cameras on a background thread, then open the preview"""
+        if self.camera_discovery is not None:
+            return
+        startup.mark('interactive')
+        self.master.after(STARTUP_SETTINGS['report_timeout_ms'], startup.report)
+        self.status_label.config(text="Detecting cameras...")
+        result = {}
+
+        def discover():
+            with startup.phase('discovery'):
+                result['cameras'] = build_camera_index_map()
+
+        self.camera_discovery = threading.Thread(target=discover, name="camera-discovery", daemon=True)
+        self.camera_discovery.start()
+        self._finish_camera_discovery(result)
+
+    def _finish_camera_discovery(self, result):
+        """Poll for the discovery result on the Tk thread, fill the camera menu and open the preview"""
+        if self.camera_discovery.is_alive():
+            self.master.after(50, self._finish_camera_discovery, result)
+            return
+
+        self.camera_index_map = result.get('cameras', {})
+        self.available_cameras = list(self.camera_index_map.values())
+        if not self.available_cameras:
+            messagebox.showerror("Camera Error", "No cameras detected via FFmpeg.")
+            self.master.destroy()
+            return
+
+        menu = self.camera_menu['menu']
+        menu.delete(0, 'end')
+        for name in self.available_cameras:
+            menu.add_command(label=name, command=tk._setit(self.selected_camera, name, self.change_camera))
+        # A camera restored from settings is kept when it is still connected
+        if self.selected_camera.get() not in self.available_cameras:
+            self.selected_camera.set(self.available_cameras[0])
+
+        with startup.phase('camera_open'):
+            self.open_live_preview()
+
     def open_live_preview(self):
         """Open live camera preview"""
         self.close_preview()
@@ -624,16 +796,18 @@ class CNCVisionApp:
                 actual_width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
                 actual_height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
                 
-                print(f"Opening camera with resolution: {width}x{height}")
-                print(f"Actual camera resolution: {actual_width}x{actual_height}")
+                log.info("Opening camera with resolution: %dx%d, actual camera resolution: %dx%d",
+                         width, height, actual_width, actual_height)
                 
                 self.cap = cap
+                self.preview_stats.reset()
+                self.preview_stats.nominal_fps = cap.get(cv2.CAP_PROP_FPS) or None
                 
                 # Apply initial camera settings
                 self.update_camera_settings()
                 
                 self.preview_running = True
-                self.preview_thread = threading.Thread(target=self.buffered_preview)
+                self.preview_thread = threading.Thread(target=self.buffered_preview, name="capture")
                 self.preview_thread.daemon = True
                 self.preview_thread.start()
                 self.status_label.config(text=f"Live preview: {target_camera_name} ({actual_width}x{actual_height})")
@@ -653,183 +827,176 @@ class CNCVisionApp:
         """Run the buffered preview loop"""
         while self.preview_running and self.cap:
             try:
-                ret, frame = self.cap.read()
+                start = time.perf_counter()
+                with tracer.span('cap.read'), self.preview_stats.stage('read'):
+                    ret, frame = self.cap.read()
+                captured_at = time.perf_counter()
                 if ret:
+                    metrics.frames_captured.inc()
+                    self.preview_stats.frame_captured()
                     self.frame_buffer.append(frame.copy())
-                    if self.frame_buffer:
+                    if self.auto_capture is not None:
+                        self.auto_capture.submit(self.frame_buffer[-1])
+                    if self.frame_buffer and self.preview_governor.should_render():
                         frame_to_process = self.frame_buffer[-1].copy()
-                        self.process_and_queue_gui_update(frame_to_process)
-                time.sleep(0.03)
+                        # Render time only: waiting for a slow camera is not something the governor can cut
+                        render_start = time.perf_counter()
+                        with tracer.span('preview_frame'):
+                            self.process_and_queue_gui_update(frame_to_process, captured_at)
+                        self.preview_governor.record(time.perf_counter() - render_start)
+                # Pace the loop; reading and rendering count towards the interval
+                time.sleep(max(0.0, PREVIEW_UPDATE_INTERVAL - (time.perf_counter() - start)))
             except Exception as e:
-                print(f"Error in buffered_preview: {e}")
-                print(f"Traceback: {traceback.format_exc()}")
+                log.exception("Error in buffered_preview: %s", e)
                 time.sleep(0.1)  # Add delay on error
 
-    def process_and_queue_gui_update(self, frame):
-        """Process frame and queue GUI update"""
+    def process_and_queue_gui_update(self, frame, captured_at=None):
+        """Process a frame with the current parameter snapshot and queue the GUI update"""
         try:
-            # Get dimensions through a thread-safe call
-            self.master.after_idle(self._get_dimensions_and_process, frame.copy())
+            # Runs on the capture thread; only the finished images go to the Tk thread
+            self.update_queue.put(self._render_preview(frame, self.pipeline_params, captured_at))
         except Exception as e:
-            print(f"Error in process_and_queue_gui_update: {e}")
+            log.error("Error in process_and_queue_gui_update: %s", e)
 
     def _get_dimensions_and_process(self, frame):
-        """Process frame update in the main thread"""
+        """Process a frame and update the GUI directly (main thread)"""
         try:
-            # Now we can safely get the canvas width
-            canvas_width = self.main_canvas.winfo_width()
-            if canvas_width < 10:  # Not yet properly initialized
-                canvas_width = 900  # Default width
-            
-            # Calculate preview width (1/2 of canvas width for each preview)
-            preview_width = max(100, (canvas_width // 2) - 10)
-            
-            # Calculate height maintaining aspect ratio
-            aspect_ratio = frame.shape[0] / frame.shape[1]
-            preview_height = int(preview_width * aspect_ratio)
-            
-            # Resize frame for preview
-            frame_resized = cv2.resize(frame, (preview_width, preview_height))
-
-            # Process edges at higher resolution if needed
-            if self.color_mode.get() and self.target_color is not None:
-                # Process at higher resolution if scale > 1.0
-                if self.edge_scale.get() > 1.0:
-                    scale = self.edge_scale.get()
-                    h, w = frame.shape[:2]
-                    frame_highres = cv2.resize(frame, (int(w * scale), int(h * scale)))
-                    edges, mask = color_based_edge_detection(
-                        frame_highres,
-                        self.target_color,
-                        tolerance_h=self.color_tolerance_h.get(),
-                        tolerance_s=self.color_tolerance_s.get(),
-                        tolerance_v=self.color_tolerance_v.get(),
-                        debug=False
-                    )
-                    # Scale down the edges for preview
-                    edges = cv2.resize(edges, (preview_width, preview_height), 
-                                     interpolation=cv2.INTER_AREA)
-                    mask = cv2.resize(mask, (preview_width, preview_height), 
-                                    interpolation=cv2.INTER_AREA)
-                else:
-                    edges, mask = color_based_edge_detection(
-                        frame_resized, 
-                        self.target_color,
-                        tolerance_h=self.color_tolerance_h.get(),
-                        tolerance_s=self.color_tolerance_s.get(),
-                        tolerance_v=self.color_tolerance_v.get(),
-                        debug=False
-                    )
-                
-                # Create visualization with original frame
-                edges_colored = frame_resized.copy()
-                # Add edges with selected color
-                edges_colored[edges > 0] = self.edge_color
-                # Add semi-transparent color mask
-                mask_colored = np.zeros_like(frame_resized)
-                mask_colored[mask > 0] = [0, 0, 255]  # Red for color mask
-                edges_colored = cv2.addWeighted(edges_colored, 1.0, mask_colored, 0.3, 0)
-                edges = edges_colored
-                
-            else:
-                # Process at higher resolution if scale > 1.0
-                if self.edge_scale.get() > 1.0:
-                    # Scale up the frame for edge detection
-                    scale = self.edge_scale.get()
-                    h, w = frame.shape[:2]
-                    frame_highres = cv2.resize(frame, (int(w * scale), int(h * scale)))
-                    gray = cv2.cvtColor(frame_highres, cv2.COLOR_BGR2GRAY)
-                    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-                    edges = cv2.Canny(blurred, self.canny_low.get(), self.canny_high.get())
-                    
-                    # Scale down the edges for preview
-                    edges = cv2.resize(edges, (preview_width, preview_height), 
-                                     interpolation=cv2.INTER_AREA)
-                    
-                    # Create visualization with original frame
-                    edges_colored = frame_resized.copy()
-                    edges_colored[edges > 0] = self.edge_color  # Use selected color
-                    edges = edges_colored
-                else:
-                    gray = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2GRAY)
-                    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-                    edges = cv2.Canny(blurred, self.canny_low.get(), self.canny_high.get())
-                    # Convert edges to colored visualization
-                    edges_colored = frame_resized.copy()
-                    edges_colored[edges > 0] = self.edge_color  # Use selected color
-                    edges = edges_colored
-
-            # Add scale indicator if calibrated
-            if hasattr(self, 'calibration_points') and len(self.calibration_points) == 2:
-                cv2.line(frame_resized, 
-                        (int(self.calibration_points[0][0] * preview_width/w), 
-                         int(self.calibration_points[0][1] * preview_height/h)),
-                        (int(self.calibration_points[1][0] * preview_width/w), 
-                         int(self.calibration_points[1][1] * preview_height/h)),
-                        (0, 255, 0), 2)
-                
-                # Add distance label
-                mid_x = (self.calibration_points[0][0] + self.calibration_points[1][0]) // 2
-                mid_y = (self.calibration_points[0][1] + self.calibration_points[1][1]) // 2
-                cv2.putText(frame_resized, 
-                           f"{self.known_distance.get():.2f}\"",
-                           (int(mid_x * preview_width/w), 
-                            int(mid_y * preview_height/h)),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-
-            # Update the GUI
-            self.update_gui_from_main_thread(frame_resized, edges, frame_resized)
-
+            with tracer.span('refresh_preview'):
+                self.update_gui_from_main_thread(*self._render_preview(frame, self.pipeline_params))
         except Exception as e:
-            print(f"Error in _get_dimensions_and_process: {e}")
+            log.error("Error in _get_dimensions_and_process: %s", e)
+
+    def _render_preview(self, frame, params, captured_at=None):
+        """
+        Build the (original, edges, captured_at) preview items for one frame
+        Both images are RGB, in buffers from preview_buffers that the Tk
+        thread releases after display. Reads only the params snapshot and
+        plain attributes, so it is safe to call from any thread. captured_at
+        is the frame's perf_counter() read time, for the HUD's latency.
+        """
+        stats = self.preview_stats
+        h, w = frame.shape[:2]
+        
+        # Calculate preview width (1/2 of canvas width for each preview)
+        preview_width = max(100, (self.preview_canvas_width // 2) - 10)
+        
+        # Calculate height maintaining aspect ratio
+        aspect_ratio = h / w
+        preview_height = int(preview_width * aspect_ratio)
+        
+        # The governor may cap edge_scale and detect on a smaller image; capture and export are unaffected
+        quality = self.preview_governor.quality
+        edge_scale = quality.edge_scale(params.edge_scale)
+
+        # Resize frame for preview
+        shape = (preview_height, preview_width, 3)
+        frame_resized = self.preview_buffers.acquire(shape)
+        original = self.preview_buffers.acquire(shape)
+        with tracer.span('resize'), stats.stage('resize'):
+            cv2.resize(frame, (preview_width, preview_height), dst=frame_resized)
+
+        # Show the preview lens-corrected, like captures and exports. Remapping at
+        # preview size is ~50x cheaper than at 5 MP; the full frame is corrected only
+        # when detection upsamples it (edge_scale > 1)
+        if params.camera_matrix is not None and params.dist_coeffs is not None:
+            undistort_start = time.perf_counter()
+            with tracer.span('undistort', full_frame=edge_scale > 1.0), stats.stage('undistort'):
+                corrected = self.preview_buffers.acquire(shape)
+                self.preview_maps.undistort(frame_resized, params.camera_matrix, params.dist_coeffs,
+                                            params.calibration_size or (w, h), params.camera, dst=corrected)
+                self.preview_buffers.release(frame_resized)
+                frame_resized = corrected
+                if edge_scale > 1.0:
+                    frame = self.undistort_image(frame, params)
+            self.preview_governor.record_undistort(time.perf_counter() - undistort_start)
+
+        # Convert to RGB once for both previews
+        cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB, dst=original)
+        with tracer.span('preview_edges', color_mode=params.color_mode, edge_scale=edge_scale,
+                         detect_scale=quality.detect_scale), stats.stage('edges'):
+            edges, mask = preview_detection(frame, frame_resized, params, edge_scale, quality.detect_scale)
+        self.preview_buffers.release(frame_resized)
+
+        # Edges and color mask composited in one pass, then the latest progressive export, if any
+        with stats.stage('overlay'):
+            overlay = compose_preview(original, edges, mask, params.edge_color, rgb=True,
+                                      out=self.preview_buffers.acquire(shape))
+            self._draw_export_overlay(overlay, w)
+
+        # Add scale indicator if calibrated
+        calibration_points = self.calibration_points
+        if len(calibration_points) == 2:
+            cv2.line(original, 
+                    (int(calibration_points[0][0] * preview_width/w), 
+                     int(calibration_points[0][1] * preview_height/h)),
+                    (int(calibration_points[1][0] * preview_width/w), 
+                     int(calibration_points[1][1] * preview_height/h)),
+                    (0, 255, 0), 2)
+            
+            # Add distance label
+            mid_x = (calibration_points[0][0] + calibration_points[1][0]) // 2
+            mid_y = (calibration_points[0][1] + calibration_points[1][1]) // 2
+            cv2.putText(original, 
+                       f"{params.known_distance:.2f}\"",
+                       (int(mid_x * preview_width/w), 
+                        int(mid_y * preview_height/h)),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        return original, overlay, captured_at
 
     def check_queue(self):
         """Check for pending GUI updates"""
         try:
+            # Only the newest of the pending previews is worth showing
+            latest = None
+            pending = 0
+            skipped = []
             while True:
-                # Get all pending updates
-                frame, edges, mask = self.update_queue.get_nowait()
-                self.update_gui_from_main_thread(frame, edges, mask)
+                if latest is not None:
+                    skipped.extend(latest[:2])
+                latest = self.update_queue.get_nowait()
+                pending += 1
         except Empty:
-            pass
+            quality_text = self.preview_governor.describe()
+            if quality_text != self.quality_label.cget('text'):
+                self.quality_label.config(text=quality_text)
+                if quality_text:
+                    self.quality_label.grid()
+                else:
+                    self.quality_label.grid_remove()
+            if latest is not None:
+                if pending > 1:
+                    metrics.frames_dropped.inc(pending - 1)
+                    self.preview_buffers.release(*skipped)
+                self.preview_stats.frames_dropped(pending - 1, pending)
+                self.update_gui_from_main_thread(*latest)
         finally:
             # Schedule the next queue check
             self.master.after(10, self.check_queue)
 
-    def update_gui_from_main_thread(self, frame, edges, _):
-        """Update GUI elements from the main thread"""
+    def update_gui_from_main_thread(self, frame, edges, captured_at=None):
+        """Show a rendered preview (RGB original and edges) and recycle its buffers (main thread)"""
         try:
-            # Handle frame - ensure proper color space conversion
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img_original = Image.fromarray(frame_rgb)
-            imgtk_original = ImageTk.PhotoImage(image=img_original)
-            
-            # Handle edges - ensure proper color space conversion
-            if len(edges.shape) == 2:  # If grayscale
-                edges_rgb = cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
-            else:  # If already RGB/BGR
-                edges_rgb = cv2.cvtColor(edges, cv2.COLOR_BGR2RGB)  # Convert BGR to RGB
-            img_edges = Image.fromarray(edges_rgb)
-            imgtk_edges = ImageTk.PhotoImage(image=img_edges)
-            
-            # Update the labels
-            self.preview_label_original.imgtk = imgtk_original
-            self.preview_label_original.configure(image=imgtk_original)
-            self.preview_label_edges.imgtk = imgtk_edges
-            self.preview_label_edges.configure(image=imgtk_edges)
+            if 'first_frame' not in startup.marks:
+                startup.mark('first_frame')
+                startup.report()
+            with tracer.span('present'), self.preview_stats.stage('photoimage'):
+                self.preview_slots[0].show(frame)
+                self.preview_slots[1].show(edges)
+            self.preview_stats.frame_displayed(captured_at)
             
         except Exception as e:
-            print(f"Error in update_gui_from_main_thread: {e}")
-            # Create blank images in case of error
-            blank = np.zeros((100, 100, 3), dtype=np.uint8)
-            self.preview_label_original.configure(image='')
-            self.preview_label_edges.configure(image='')
+            log.error("Error in update_gui_from_main_thread: %s", e)
+            for slot in self.preview_slots:
+                slot.clear()
+        finally:
+            # The photos hold their own copy of the pixels
+            self.preview_buffers.release(frame, edges)
 
     def refresh_preview(self):
         """Refresh the preview display"""
-        if self.frame_buffer:
-            frame = self.frame_buffer[-1]
-            self.process_and_queue_gui_update(frame)
+        # A running preview picks up the new parameters with its next frame
+        if self.frame_buffer and not self.preview_running:
+            self._get_dimensions_and_process(self.frame_buffer[-1])
 
     def toggle_exposure_controls(self):
         """Toggle exposure controls based on auto exposure setting"""
@@ -854,36 +1021,28 @@ class CNCVisionApp:
                 self.cap.set(cv2.CAP_PROP_CONTRAST, self.contrast_var.get())
                 
                 # Debug output
-                print(f"Camera settings updated:")
-                print(f"Auto Exposure: {self.auto_exposure.get()}")
-                print(f"Exposure: {self.exposure_var.get()}")
-                print(f"Brightness: {self.brightness_var.get()}")
-                print(f"Contrast: {self.contrast_var.get()}")
+                log.debug("Camera settings updated: auto exposure %s, exposure %s, brightness %s, contrast %s",
+                          self.auto_exposure.get(), self.exposure_var.get(),
+                          self.brightness_var.get(), self.contrast_var.get())
             except Exception as e:
-                print(f"Error updating camera settings: {str(e)}")
+                log.error("Error updating camera settings: %s", e)
 
     def open_calibration_window(self):
         """Open the calibration window"""
         try:
-            print("\nCalibration Window Debug:")
-            print(f"Frame buffer exists: {hasattr(self, 'frame_buffer')}")
-            if hasattr(self, 'frame_buffer'):
-                print(f"Frame buffer length: {len(self.frame_buffer) if self.frame_buffer else 0}")
-                print(f"Frame buffer type: {type(self.frame_buffer)}")
-                if self.frame_buffer:
-                    print(f"Latest frame shape: {self.frame_buffer[-1].shape if hasattr(self.frame_buffer[-1], 'shape') else 'No shape'}")
+            log.debug("Opening calibration window: %d frames buffered",
+                      len(self.frame_buffer) if self.frame_buffer else 0)
             
             if not self.frame_buffer:
                 messagebox.showerror("Error", "Camera preview must be running")
                 return
             
-            print("Creating CalibrationWindow...")
+            log.debug("Creating CalibrationWindow...")
             CalibrationWindow(self, self.inches_per_pixel, self.on_calibration_complete)
-            print("CalibrationWindow created successfully")
+            log.debug("CalibrationWindow created successfully")
             
         except Exception as e:
-            print(f"Error opening calibration window: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            log.exception("Error opening calibration window: %s", e)
             messagebox.showerror("Error", f"Failed to open calibration window: {str(e)}")
 
     def on_calibration_complete(self, new_scale):
@@ -891,6 +1050,23 @@ class CNCVisionApp:
         if new_scale is not None:
             self.status_label.config(text=f"Calibration updated: 1 pixel = {new_scale:.6f} inches") 
 
+    def _frame_edges(self, frame):
+        """Edge map of one frame with the current detection mode and thresholds"""
+        if self.color_mode.get() and self.target_color is not None:
+            edges, _ = color_based_edge_detection(
+                frame,
+                self.target_color,
+                tolerance_h=self.color_tolerance_h.get(),
+                tolerance_s=self.color_tolerance_s.get(),
+                tolerance_v=self.color_tolerance_v.get(),
+                debug=False
+            )
+            return edges
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        return cv2.Canny(blurred, self.canny_low.get(), self.canny_high.get())
+
+    @tracer.traced('capture_image')
     def capture_image(self):
         """Capture an image from the camera"""
         if self.cap is None or not self.cap.isOpened():
@@ -898,6 +1074,7 @@ class CNCVisionApp:
             return False
 
         try:
+            start = time.perf_counter()
             # Use current camera settings (they're already set from preview)
             time.sleep(0.5)  # Small delay to ensure settings are applied
             
@@ -906,60 +1083,52 @@ class CNCVisionApp:
             frames = []
             edges_list = []
             
-            print(f"Capturing {num_frames} frames for averaging...")
+            log.info("Capturing %d frames for averaging...", num_frames)
             self.status_label.config(text=f"Capturing {num_frames} frames...")
             
             for i in range(num_frames):
-                ret, frame = self.cap.read()
+                with tracer.span('cap.read', frame=i):
+                    ret, frame = self.cap.read()
                 if not ret or frame is None:
                     raise Exception("Failed to capture frame")
                 
                 frames.append(frame.copy())
                 
                 # Process edges for this frame
-                if self.color_mode.get() and self.target_color is not None:
-                    edges, _ = color_based_edge_detection(
-                        frame,
-                        self.target_color,
-                        tolerance_h=self.color_tolerance_h.get(),
-                        tolerance_s=self.color_tolerance_s.get(),
-                        tolerance_v=self.color_tolerance_v.get(),
-                        debug=False
-                    )
-                else:
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-                    edges = cv2.Canny(blurred, self.canny_low.get(), self.canny_high.get())
-                
-                edges_list.append(edges)
+                with tracer.span('frame_edges', frame=i):
+                    edges_list.append(self._frame_edges(frame))
                 time.sleep(0.05)  # Small delay between captures
             
-            # Average the frames
-            avg_frame = np.mean(frames, axis=0).astype(np.uint8)
-            
-            # Combine edges using bitwise OR
-            combined_edges = np.zeros_like(edges_list[0])
-            for edges in edges_list:
-                combined_edges = cv2.bitwise_or(combined_edges, edges)
+            with tracer.span('average'):
+                # Average the frames
+                avg_frame = np.mean(frames, axis=0).astype(np.uint8)
+
+                # Combine edges using bitwise OR
+                combined_edges = np.zeros_like(edges_list[0])
+                for edges in edges_list:
+                    combined_edges = cv2.bitwise_or(combined_edges, edges)
             
             # Save debug images
-            cv2.imwrite("debug_capture_raw.png", avg_frame)
-            cv2.imwrite("debug_combined_edges.png", combined_edges)
+            if debug_sink.enabled(2):
+                run = debug_sink.new_run('capture')
+                debug_sink.save("debug_capture_raw", avg_frame, level=2, run=run)
+                debug_sink.save("debug_combined_edges", combined_edges, level=2, run=run)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             image_path = f"captured_image_{timestamp}.png"
             
             # Save the averaged image
-            cv2.imwrite(image_path, avg_frame)
+            with tracer.span('imwrite'):
+                cv2.imwrite(image_path, avg_frame)
             
+            metrics.capture_seconds.observe(time.perf_counter() - start)
             self.image_path = image_path
             self.status_label.config(text=f"Image captured: {image_path}")
             
             return True
             
         except Exception as e:
-            print(f"Capture error: {str(e)}")
-            traceback.print_exc()
+            log.exception("Capture error: %s", e)
             messagebox.showerror("Capture Error", str(e))
             return False
 
@@ -972,16 +1141,107 @@ class CNCVisionApp:
         else:
             messagebox.showwarning("Warning", "No images found.")
 
+    def publish_params(self, *args):
+        """
+        Publish a new PipelineParams snapshot (Tk thread only)
+        Bound as a trace on every Tk variable it reads; call it directly after
+        changing one of the plain attributes it copies (target_color, edge_color,
+        camera calibration, reference_point). Does nothing while apply_settings
+        is setting variables in a batch.
+        """
+        if self._params_suspended:
+            return
+        previous = self.pipeline_params or PipelineParams()
+        values = {}
+        for name in PipelineParams.field_names():
+            variable = getattr(self, _PARAM_VARIABLES.get(name, name), None)
+            if isinstance(variable, tk.Variable):
+                try:
+                    values[name] = variable.get()
+                except (tk.TclError, ValueError):
+                    # Half-typed entry field; keep the last valid value
+                    values[name] = getattr(previous, name)
+
+        values.update(
+            target_color=tuple(int(c) for c in self.target_color) if self.target_color is not None else None,
+            edge_color=tuple(int(c) for c in self.edge_color),
+            camera_matrix=self.camera_matrix,
+            dist_coeffs=self.dist_coeffs,
+            calibration_size=tuple(self.calibration_size) if self.calibration_size is not None else None,
+            reference_point=tuple(self.reference_point) if self.reference_point is not None else None,
+        )
+        self.pipeline_params = PipelineParams(**values)
+        # Level costs measured with the old settings no longer apply
+        self.preview_governor.forget()
+
+    def trace_params(self):
+        """Republish the parameter snapshot whenever one of its Tk variables is written"""
+        for name in PipelineParams.field_names():
+            variable = getattr(self, _PARAM_VARIABLES.get(name, name), None)
+            if isinstance(variable, tk.Variable):
+                variable.trace_add('write', self.publish_params)
+
+    def get_export_params(self, params=None):
+        """Collect the export settings from a parameter snapshot into a plain dict"""
+        params = params if params is not None else self.pipeline_params
+        reference = None
+        if params.use_reference_point and params.reference_point is not None:
+            # Reference point pairs a camera pixel with its table position
+            reference = (params.reference_point, (params.reference_table_x, params.reference_table_y))
+
+        table_size = None
+        if params.add_table_boundary:
+            table_size = (float(params.table_width), float(params.table_height))
+
+        use_color = params.color_mode and params.target_color is not None
+        use_background = params.use_background_subtraction and self.background_edges is not None
+        # 'points' mode detects edges on the raw image, so it subtracts the raw background
+        background_edges = self.background_edges
+        if params.undistort_mode == 'points' and params.camera_matrix is not None:
+            background_edges = self.background_edges_raw
+        return {
+            'image_path': self.image_path,
+            'camera_matrix': params.camera_matrix,
+            'dist_coeffs': params.dist_coeffs,
+            'calibration_size': params.calibration_size,
+            'camera': params.camera,
+            'inches_per_pixel': params.inches_per_pixel,
+            'edge_scale': params.edge_scale,
+            'target_color': params.target_color if use_color else None,
+            'color_tolerance_h': params.color_tolerance_h,
+            'color_tolerance_s': params.color_tolerance_s,
+            'color_tolerance_v': params.color_tolerance_v,
+            'canny_low': params.canny_low,
+            'canny_high': params.canny_high,
+            'undistort_mode': params.undistort_mode,
+            'background_edges': background_edges if use_background else None,
+            'vectorizer': params.vectorizer,
+            'simplify_method': params.simplify_method,
+            'simplify_tolerance': params.simplify_tolerance,
+            'max_vertices': params.max_vertices,
+            'dxf_rotation': params.dxf_rotation,
+            'reference': reference,
+            'fiducial_markers': self.fiducial_markers if params.use_fiducials else None,
+            'table_size': table_size,
+        }
+
+    @tracer.traced('process_image')
     def process_image(self):
         """Process the current image and generate DXF"""
         if not self.image_path:
             messagebox.showerror("Error", "No image loaded or captured.")
             return
 
-        inches_per_pixel = self.inches_per_pixel.get()
-        if inches_per_pixel <= 0:
+        # One snapshot for the whole export; the worker never touches Tk variables
+        snapshot = self.pipeline_params
+        if snapshot.inches_per_pixel <= 0:
             messagebox.showerror("Error", "Inches per pixel must be greater than 0.")
             return
+        params = self.get_export_params(snapshot)
+
+        if snapshot.progressive_export:
+            self._process_image_progressive(params)
+            return
 
         # Create progress window
         progress_window = tk.Toplevel(self.master)
@@ -1007,238 +1267,8 @@ class CNCVisionApp:
 
         def process_in_thread():
             try:
-                image = cv2.imread(self.image_path)
-                
-                # Apply lens distortion correction if calibration is available
-                image = self.undistort_image(image)
-                
-                print(f"\nDXF Export Debug:")
-                print(f"Current inches_per_pixel: {inches_per_pixel:.6f}")
-                print(f"Image dimensions: {image.shape[1]}x{image.shape[0]} pixels")
-                
-                # Normalize the image to improve contrast
-                image_float = image.astype(np.float32)
-                image_normalized = cv2.normalize(image_float, None, 0, 255, cv2.NORM_MINMAX)
-                image = image_normalized.astype(np.uint8)
-                
-                # Process at higher resolution if scale > 1.0
-                if self.edge_scale.get() > 1.0:
-                    scale = self.edge_scale.get()
-                    h, w = image.shape[:2]
-                    image = cv2.resize(image, (int(w * scale), int(h * scale)))
-                    print(f"Processing at {w * scale}x{h * scale} resolution")
-                
-                if self.color_mode.get() and self.target_color is not None:
-                    edges, mask = color_based_edge_detection(
-                        image,
-                        self.target_color,
-                        tolerance_h=self.color_tolerance_h.get(),
-                        tolerance_s=self.color_tolerance_s.get(),
-                        tolerance_v=self.color_tolerance_v.get(),
-                        debug=True
-                    )
-                    # Create binary threshold from mask
-                    thresh = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)[1]
-                else:
-                    # Normal Canny edge detection with improved contrast
-                    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-                    edges = cv2.Canny(blurred, self.canny_low.get(), self.canny_high.get())
-                    # Create binary threshold from edges
-                    thresh = cv2.threshold(edges, 127, 255, cv2.THRESH_BINARY)[1]
-
-                # Apply background subtraction if enabled
-                if self.use_background_subtraction.get() and self.background_edges is not None:
-                    # Save original edges for debug
-                    cv2.imwrite("debug_original_edges.png", thresh)
-                    cv2.imwrite("debug_background_edges.png", self.background_edges)
-                    
-                    # Subtract background edges from current edges
-                    thresh = cv2.subtract(thresh, self.background_edges)
-                    
-                    # Ensure we don't have negative values
-                    thresh = cv2.threshold(thresh, 0, 255, cv2.THRESH_BINARY)[1]
-                    
-                    # Save debug image of subtracted result
-                    cv2.imwrite("debug_subtracted_edges.png", thresh)
-                    
-                    print("Background subtraction applied:")
-                    print(f"Original edges pixels: {np.count_nonzero(thresh)}")
-                    print(f"Background edges pixels: {np.count_nonzero(self.background_edges)}")
-                    print(f"Subtracted edges pixels: {np.count_nonzero(thresh)}")
-
-                # Save debug images
-                cv2.imwrite("thresh_debug.png", thresh)
-                cv2.imwrite("edges_debug.png", edges)
-
-                # Find contours with different methods to ensure we don't miss any
-                contours_external, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                contours_tree, _ = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-                
-                # Combine contours from both methods
-                all_contours = contours_external + contours_tree
-                
-                print(f"Contours found (External): {len(contours_external)}")
-                print(f"Contours found (Tree): {len(contours_tree)}")
-                print(f"Total unique contours: {len(all_contours)}")
-
-                # Create new DXF document with inches as units
-                doc = ezdxf.new(setup=True)
-                # Set DXF units to inches
-                doc.header['$INSUNITS'] = 1      # 1 = Inches
-                doc.header['$LUNITS'] = 2        # 2 = Decimal
-                doc.header['$MEASUREMENT'] = 1   # 1 = English (inches)
-                msp = doc.modelspace()
-
-                # Get image height for vertical flipping
-                img_height = image.shape[0]
-                valid_contours = 0
-                
-                # Get rotation angle in radians
-                rotation_angle = np.radians(self.dxf_rotation.get())
-                
-                # Debug image to visualize contours
-                debug_contours = image.copy()
-                
-                # Calculate reference point translation if enabled
-                ref_translation = (0.0, 0.0)
-                if self.use_reference_point.get() and self.reference_point is not None:
-                    ref_x, ref_y = self.reference_point
-                    ref_table_x, ref_table_y = self.reference_table_x.get(), self.reference_table_y.get()
-                    
-                    # Calculate translation needed to move reference point to table coordinates
-                    # This will shift the detected features relative to the fixed boundary box
-                    ref_translation = (
-                        ref_table_x - (ref_x * inches_per_pixel),
-                        ref_table_y - ((img_height - ref_y) * inches_per_pixel)
-                    )
-                    
-                    # Draw reference point on debug image
-                    cv2.circle(debug_contours, (ref_x, ref_y), 5, (0, 0, 255), -1)
-                    cv2.putText(debug_contours, f"Ref: ({ref_table_x:.1f}, {ref_table_y:.1f})",
-                              (ref_x + 10, ref_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-
-                # Add table boundary box if enabled
-                if self.add_table_boundary.get():
-                    table_width = self.table_width.get()
-                    table_height = self.table_height.get()
-                    
-                    # Fixed boundary box at (0,0) to (width,height)
-                    # Ensure exact dimensions by using float values
-                    corners = [
-                        (0.0, 0.0),  # Bottom left
-                        (float(table_width), 0.0),  # Bottom right
-                        (float(table_width), float(table_height)),  # Top right
-                        (0.0, float(table_height)),  # Top left
-                    ]
-                    
-                    # Add the boundary box to the DXF
-                    msp.add_lwpolyline(corners, close=True)
-                    
-                    # Draw boundary box on debug image
-                    # Convert DXF coordinates back to image coordinates for visualization
-                    debug_corners = []
-                    for x, y in corners:
-                        if self.use_reference_point.get():
-                            # Convert from DXF space to image space, accounting for reference point
-                            img_x = int((x - ref_translation[0]) / inches_per_pixel)
-                            img_y = int(img_height - (y - ref_translation[1]) / inches_per_pixel)
-                        else:
-                            # If no reference point, just convert from DXF space to image space
-                            img_x = int(x / inches_per_pixel)
-                            img_y = int(img_height - y / inches_per_pixel)
-                        debug_corners.append((img_x, img_y))
-                    
-                    # Draw the boundary box on the debug image
-                    for i in range(len(debug_corners)):
-                        cv2.line(debug_contours, 
-                                debug_corners[i], 
-                                debug_corners[(i + 1) % len(debug_corners)], 
-                                (255, 0, 0), 2)
-                
-                for i, contour in enumerate(all_contours):
-                    # Process larger contours with more detail
-                    area = cv2.contourArea(contour)
-                    if area < 1:  # Reduced minimum area to catch more edges
-                        continue
-                    
-                    # Calculate tolerance based on contour size
-                    if area > 1000:
-                        tolerance = 0.2  # More detail for large contours
-                    elif area > 100:
-                        tolerance = 0.3
-                    else:
-                        tolerance = 0.4  # More detail for small contours
-                    
-                    # Simplify while preserving more points
-                    simplified = simplify_contour(contour, tolerance=tolerance)
-                    
-                    # Debug: Print points for first few contours
-                    if i < 3:
-                        print(f"\nContour {i} debug:")
-                        print(f"Contour area: {area:.2f} pixels")
-                        print(f"Number of points before simplification: {len(contour)}")
-                        print(f"Number of points after simplification: {len(simplified)}")
-                        
-                        # Print first few points before and after scaling
-                        print("\nFirst few points:")
-                        for j in range(min(3, len(simplified))):
-                            orig_x, orig_y = simplified[j][0]
-                            scaled_x = orig_x * inches_per_pixel
-                            scaled_y = (img_height - orig_y) * inches_per_pixel
-                            print(f"Point {j}:")
-                            print(f"  Original: ({orig_x:.2f}, {orig_y:.2f})")
-                            print(f"  Scaled: ({scaled_x:.2f}, {scaled_y:.2f})")
-                    
-                    # Draw contour on debug image
-                    cv2.drawContours(debug_contours, [contour], -1, (0, 255, 0), 1)
-                    
-                    # Convert points, flip Y coordinates, and apply rotation
-                    points = []
-                    for pt in simplified:
-                        x = pt[0][0] * inches_per_pixel
-                        y = (img_height - pt[0][1]) * inches_per_pixel  # Flip Y coordinate
-                        
-                        # Apply rotation around the center of the image
-                        center_x = image.shape[1] * inches_per_pixel / 2
-                        center_y = image.shape[0] * inches_per_pixel / 2
-                        
-                        # Translate to origin, rotate, then translate back
-                        x_centered = x - center_x
-                        y_centered = y - center_y
-                        
-                        x_rotated = x_centered * np.cos(rotation_angle) - y_centered * np.sin(rotation_angle)
-                        y_rotated = x_centered * np.sin(rotation_angle) + y_centered * np.cos(rotation_angle)
-                        
-                        x_final = x_rotated + center_x
-                        y_final = y_rotated + center_y
-                        
-                        # Apply reference point translation if enabled
-                        if self.use_reference_point.get():
-                            x_final += ref_translation[0]
-                            y_final += ref_translation[1]
-                        
-                        # Check if point is within boundary box
-                        if self.add_table_boundary.get():
-                            if (0.0 <= x_final <= float(table_width) and 
-                                0.0 <= y_final <= float(table_height)):
-                                points.append((x_final, y_final))
-                        else:
-                            points.append((x_final, y_final))
-                    
-                    # Only add the polyline if we have enough points and at least some points are within bounds
-                    if len(points) > 2:
-                        try:
-                            msp.add_lwpolyline(points, close=True)
-                            valid_contours += 1
-                            print(f"Added polyline {valid_contours} with {len(points)} points")
-                        except Exception as e:
-                            print(f"Failed to add polyline: {e}")
-
-                # Save debug image with contours
-                cv2.imwrite("debug_contours.png", debug_contours)
-                
-                print(f"Valid contours processed: {valid_contours}")
+                result = self.export_pipeline.run(params)
+                doc, valid_contours = result.doc, result.valid_contours
 
                 # Close progress window and show file dialog in main thread
                 progress_window.destroy()
@@ -1247,13 +1277,88 @@ class CNCVisionApp:
                 self.master.after_idle(lambda: self._show_save_dialog(doc, valid_contours))
 
             except Exception as e:
-                print(f"Error in process_image: {str(e)}")
-                traceback.print_exc()
+                log.exception("Error in process_image: %s", e)
                 progress_window.destroy()
                 messagebox.showerror("Processing Error", str(e))
 
         # Start processing in a separate thread
-        threading.Thread(target=process_in_thread, daemon=True).start()
+        threading.Thread(target=process_in_thread, name="export", daemon=True).start()
+
+    def _process_image_progressive(self, params):
+        """Show a coarse export on the preview right away, then refine at full resolution"""
+        # Results of an older export that is still running are ignored
+        self.export_generation += 1
+        generation = self.export_generation
+        self.export_result = None
+        self.file_menu.entryconfig("Save DXF...", state=tk.DISABLED)
+        self.status_label.config(text="Generating coarse preview...")
+
+        def process_in_thread():
+            try:
+                coarse = self.export_pipeline.run(dict(params, debug=False),
+                                                  downscale=DXF_SETTINGS['coarse_scale'],
+                                                  until='simplify')
+                self.master.after_idle(self._on_export_result, generation, coarse, False)
+
+                result = self.export_pipeline.run(params)
+                self.master.after_idle(self._on_export_result, generation, result, True)
+            except Exception as e:
+                log.exception("Error in process_image: %s", e)
+                error = str(e)
+                self.master.after_idle(lambda: messagebox.showerror("Processing Error", error))
+
+        threading.Thread(target=process_in_thread, name="export", daemon=True).start()
+
+    def _on_export_result(self, generation, result, final):
+        """Show a coarse or final export result on the preview (main thread)"""
+        if generation != self.export_generation:
+            return
+
+        # Overlay in camera pixels; the preview rescales it to its own size
+        to_camera = np.array([[1.0 / result.scale, 0, 0], [0, 1.0 / result.scale, 0]])
+        self.export_overlay = (result.contour_set.transform(to_camera), final)
+
+        if final:
+            self.export_result = result
+            self.file_menu.entryconfig("Save DXF...", state=tk.NORMAL)
+            registration = ""
+            if result.registration:
+                registration = (f" Registered from {len(result.registration['markers'])} markers "
+                                f"({result.registration['residual']:.3f} in).")
+            self.status_label.config(
+                text=f"DXF ready: {result.valid_contours} contours.{registration} Use File > Save DXF... to save.")
+        else:
+            self.status_label.config(
+                text=f"Coarse preview: {len(result.contour_set)} contours. Refining at full resolution...")
+
+        if self.frame_buffer:
+            self.refresh_preview()
+        else:
+            # No live camera; show the overlay on the exported image itself
+            h, w = result.image.shape[:2]
+            frame = cv2.resize(result.image, (round(w / result.scale), round(h / result.scale)))
+            self._get_dimensions_and_process(frame)
+
+    def _draw_export_overlay(self, image, camera_width):
+        """Draw the latest export contours on a preview image of any size"""
+        if self.export_overlay is None:
+            return image
+        contour_set, final = self.export_overlay
+        factor = image.shape[1] / camera_width
+        contours = contour_set.transform(np.array([[factor, 0, 0], [0, factor, 0]])).to_cv_contours()
+
+        # Coarse result in orange, full-resolution result in magenta (the preview is RGB)
+        color = (255, 0, 255) if final else (255, 165, 0)
+        cv2.polylines(image, [c for c, closed in zip(contours, contour_set.closed) if closed], True, color, 1)
+        cv2.polylines(image, [c for c, closed in zip(contours, contour_set.closed) if not closed], False, color, 1)
+        return image
+
+    def save_export_result(self):
+        """Save the latest full-resolution progressive export"""
+        if self.export_result is None:
+            messagebox.showwarning("Warning", "No finished export to save yet.")
+            return
+        self._show_save_dialog(self.export_result.doc, self.export_result.valid_contours)
 
     def _show_save_dialog(self, doc, valid_contours):
         """Show the save dialog and save the DXF file"""
@@ -1262,10 +1367,13 @@ class CNCVisionApp:
                                                       filetypes=[("DXF files", "*.dxf")])
             if output_path:
                 doc.saveas(output_path)
+                size = os.path.getsize(output_path)
+                metrics.dxf_bytes.inc(size)
+                metrics.dxf_files.observe(size)
                 messagebox.showinfo("Success", f"DXF saved to: {output_path}")
                 self.status_label.config(text=f"DXF export complete. {valid_contours} contours processed.")
         except Exception as e:
-            print(f"Error saving DXF: {str(e)}")
+            log.exception("Error saving DXF: %s", e)
             messagebox.showerror("Save Error", str(e))
 
     def pick_color(self):
@@ -1278,9 +1386,8 @@ class CNCVisionApp:
         frame = self.frame_buffer[-1].copy()
         height, width = frame.shape[:2]
         preview_width, preview_height = width // 2, height // 2
-        preview_frame = cv2.resize(frame, (preview_width, preview_height))
-        preview_image = Image.fromarray(cv2.cvtColor(preview_frame, cv2.COLOR_BGR2RGB))
-        imgtk = ImageTk.PhotoImage(preview_image)
+        pyramid = ImagePyramid(frame)
+        imgtk = ImageTk.PhotoImage(Image.fromarray(pyramid.display(preview_width, preview_height)))
 
         # Create a Toplevel window for color picking
         picker_win = tk.Toplevel(self.master)
@@ -1292,18 +1399,15 @@ class CNCVisionApp:
         canvas.imgtk = imgtk  # Keep a reference!
         canvas.create_image(0, 0, anchor="nw", image=imgtk)
 
-        # Draw circle on mouse move
+        # Move the sampling circle on mouse move; the loupe shows full-resolution pixels
         radius = self.color_sample_radius.get()
-        circle = None
+        circle = canvas.create_oval(0, 0, 0, 0, outline="green", width=2, tags="circle")
+        loupe = ZoomLoupe(canvas, pyramid, (preview_width, preview_height))
 
         def on_mouse_move(event):
-            nonlocal circle
-            canvas.delete("circle")
             x, y = event.x, event.y
-            circle = canvas.create_oval(
-                x - radius, y - radius, x + radius, y + radius,
-                outline="green", width=2, tags="circle"
-            )
+            canvas.coords(circle, x - radius, y - radius, x + radius, y + radius)
+            loupe.move(x, y)
 
         def on_mouse_click(event):
             # Map coordinates back to original frame
@@ -1346,13 +1450,14 @@ class CNCVisionApp:
             return frame[center_y, center_x]  # Fallback to single pixel
             
         except Exception as e:
-            print(f"Error in get_average_color: {e}")
+            log.error("Error in get_average_color: %s", e)
             return frame[center_y, center_x]  # Fallback to single pixel
 
     def _update_color_selection(self, color):
         """Update color selection from main thread"""
         try:
             self.target_color = color
+            self.publish_params()
             self.color_mode.set(True)
             
             # Update color preview
@@ -1363,10 +1468,10 @@ class CNCVisionApp:
             
             # Print color values for debugging
             hsv_color = cv2.cvtColor(np.uint8([[color]]), cv2.COLOR_BGR2HSV)[0][0]
-            print(f"Selected color - BGR: {color}, HSV: {hsv_color}")
+            log.info("Selected color - BGR: %s, HSV: %s", color, hsv_color)
             
         except Exception as e:
-            print(f"Error updating color selection: {e}")
+            log.error("Error updating color selection: %s", e)
             messagebox.showerror("Error", f"Failed to update color selection: {e}")
 
     def capture_background(self):
@@ -1380,8 +1485,9 @@ class CNCVisionApp:
             num_frames = 10
             frames = []
             edges_list = []
+            raw_edges_list = []
             
-            print(f"Capturing {num_frames} frames for background...")
+            log.info("Capturing %d frames for background...", num_frames)
             self.status_label.config(text=f"Capturing background...")
             
             for i in range(num_frames):
@@ -1389,24 +1495,15 @@ class CNCVisionApp:
                 if not ret or frame is None:
                     raise Exception("Failed to capture frame")
                 
+                # Exports subtract the background from undistorted images, or from
+                # raw images when only the vertices are corrected
+                raw_frame = frame
+                frame = self.undistort_image(frame)
                 frames.append(frame.copy())
                 
                 # Process edges for this frame
-                if self.color_mode.get() and self.target_color is not None:
-                    edges, _ = color_based_edge_detection(
-                        frame,
-                        self.target_color,
-                        tolerance_h=self.color_tolerance_h.get(),
-                        tolerance_s=self.color_tolerance_s.get(),
-                        tolerance_v=self.color_tolerance_v.get(),
-                        debug=False
-                    )
-                else:
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-                    edges = cv2.Canny(blurred, self.canny_low.get(), self.canny_high.get())
-                
-                edges_list.append(edges)
+                edges_list.append(self._frame_edges(frame))
+                raw_edges_list.append(self._frame_edges(raw_frame) if raw_frame is not frame else edges_list[-1])
                 time.sleep(0.05)
             
             # Average the frames
@@ -1416,18 +1513,22 @@ class CNCVisionApp:
             self.background_edges = np.zeros_like(edges_list[0])
             for edges in edges_list:
                 self.background_edges = cv2.bitwise_or(self.background_edges, edges)
+            self.background_edges_raw = np.zeros_like(raw_edges_list[0])
+            for edges in raw_edges_list:
+                self.background_edges_raw = cv2.bitwise_or(self.background_edges_raw, edges)
             
             # Save debug images
-            cv2.imwrite("debug_background.png", self.background_image)
-            cv2.imwrite("debug_background_edges.png", self.background_edges)
+            if debug_sink.enabled(2):
+                run = debug_sink.new_run('background')
+                debug_sink.save("debug_background", self.background_image, level=2, run=run)
+                debug_sink.save("debug_background_edges", self.background_edges, level=2, run=run)
             
             self.status_label.config(text="Background captured successfully")
             self.use_background_subtraction.set(True)
             self.refresh_preview()
             
         except Exception as e:
-            print(f"Background capture error: {str(e)}")
-            traceback.print_exc()
+            log.exception("Background capture error: %s", e)
             messagebox.showerror("Background Capture Error", str(e))
 
     def pick_edge_color(self):
@@ -1440,6 +1541,7 @@ class CNCVisionApp:
             hex_color = color[1].lstrip('#')
             rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
             self.edge_color = [rgb[2], rgb[1], rgb[0]]  # Convert RGB to BGR
+            self.publish_params()
             
             # Update preview
             self.edge_color_preview.configure(bg=color[1])
@@ -1460,7 +1562,7 @@ class CNCVisionApp:
                                   f"Selected resolution: {selected_width}x{selected_height}\n"
                                   f"Actual camera resolution: {actual_width}x{actual_height}")
             except Exception as e:
-                print(f"Error checking resolution: {e}")
+                log.error("Error checking resolution: %s", e)
                 messagebox.showerror("Error", f"Failed to check resolution: {e}")
         else:
             messagebox.showwarning("Warning", "Camera must be initialized first")
@@ -1478,13 +1580,17 @@ class CNCVisionApp:
         # Store current resolution
         self.reference_point_resolution = (width, height)
         
+        # Clicks snap to full-resolution edges and corners once the index is built
+        snap = {'index': None}
+        threading.Thread(target=lambda: snap.update(index=EdgeSnapIndex(frame)), daemon=True).start()
+        
         # Create a larger preview window
         preview_width = min(1200, width)  # Increased from 800 to 1200
         preview_height = int(preview_width * (height / width))
         
-        preview_frame = cv2.resize(frame, (preview_width, preview_height))
-        preview_image = Image.fromarray(cv2.cvtColor(preview_frame, cv2.COLOR_BGR2RGB))
-        imgtk = ImageTk.PhotoImage(preview_image)
+        # One pyramid serves the preview and the full-resolution loupe
+        pyramid = ImagePyramid(frame)
+        imgtk = ImageTk.PhotoImage(Image.fromarray(pyramid.display(preview_width, preview_height)))
 
         # Create a Toplevel window for reference point selection
         picker_win = tk.Toplevel(self.master)
@@ -1525,73 +1631,55 @@ class CNCVisionApp:
         canvas.imgtk = imgtk  # Keep a reference!
         canvas.create_image(0, 0, anchor="nw", image=imgtk)
 
-        # Draw crosshair on mouse move
-        crosshair = None
+        # Crosshair items are created once and moved; the loupe redraws at display rate
         selected_point = None
-        zoom_rect = None
-        zoom_factor = 3.0  # Increased zoom factor for better visibility
-        zoom_size = 30  # Reduced zoom area size for more precise selection
+        crosshair = [canvas.create_line(0, 0, 0, 0, fill="red", width=1, tags="crosshair"),
+                     canvas.create_line(0, 0, 0, 0, fill="red", width=1, tags="crosshair"),
+                     canvas.create_oval(0, 0, 0, 0, outline="red", width=1, tags="crosshair")]
+        snap_marker = canvas.create_oval(0, 0, 0, 0, width=1, state=tk.HIDDEN)
+        loupe = ZoomLoupe(canvas, pyramid, (preview_width, preview_height))
+
+        def snap_event(event):
+            """Full-resolution click position, snapped unless Shift is held; returns (x, y, kind)"""
+            orig_x = canvas.canvasx(event.x) * (width / preview_width)
+            orig_y = canvas.canvasy(event.y) * (height / preview_height)
+            if snap['index'] is None or event.state & 0x0001:
+                return orig_x, orig_y, None
+            (orig_x, orig_y), kind = snap['index'].snap(
+                orig_x, orig_y, SNAP_SETTINGS['radius'] * width / preview_width)
+            return orig_x, orig_y, kind
 
         def on_mouse_move(event):
-            nonlocal crosshair, zoom_rect
-            canvas.delete("crosshair")
-            canvas.delete("zoom")
-            
             # Get canvas coordinates
             x = canvas.canvasx(event.x)
             y = canvas.canvasy(event.y)
             
             # Draw crosshair
-            crosshair = canvas.create_line(x, 0, x, preview_height, fill="red", width=1, tags="crosshair")
-            canvas.create_line(0, y, preview_width, y, fill="red", width=1, tags="crosshair")
-            canvas.create_oval(x-2, y-2, x+2, y+2, outline="red", width=1, tags="crosshair")  # Smaller crosshair dot
-            
-            # Create zoomed view
-            if 0 <= x < preview_width and 0 <= y < preview_height:
-                # Calculate zoom region
-                x1 = max(0, int(x - zoom_size))
-                y1 = max(0, int(y - zoom_size))
-                x2 = min(preview_width, int(x + zoom_size))
-                y2 = min(preview_height, int(y + zoom_size))
-                
-                # Get the region from the original image
-                region = preview_frame[y1:y2, x1:x2]
-                if region.size > 0:
-                    # Resize the region for zoom
-                    zoomed = cv2.resize(region, None, fx=zoom_factor, fy=zoom_factor)
-                    zoomed_rgb = cv2.cvtColor(zoomed, cv2.COLOR_BGR2RGB)
-                    zoomed_img = Image.fromarray(zoomed_rgb)
-                    zoomed_tk = ImageTk.PhotoImage(zoomed_img)
-                    
-                    # Draw zoomed view
-                    zoom_x = min(x + 20, preview_width - zoomed.shape[1])
-                    zoom_y = min(y + 20, preview_height - zoomed.shape[0])
-                    zoom_rect = canvas.create_image(zoom_x, zoom_y, 
-                                                  image=zoomed_tk, 
-                                                  anchor="nw", 
-                                                  tags="zoom")
-                    canvas.zoomed_tk = zoomed_tk  # Keep reference
-                    
-                    # Draw crosshair on zoomed view
-                    zoom_center_x = zoom_x + (x - x1) * zoom_factor
-                    zoom_center_y = zoom_y + (y - y1) * zoom_factor
-                    canvas.create_line(zoom_center_x, zoom_y, zoom_center_x, zoom_y + zoomed.shape[0], 
-                                     fill="red", width=1, tags="zoom")
-                    canvas.create_line(zoom_x, zoom_center_y, zoom_x + zoomed.shape[1], zoom_center_y, 
-                                     fill="red", width=1, tags="zoom")
-                    canvas.create_oval(zoom_center_x-1, zoom_center_y-1, zoom_center_x+1, zoom_center_y+1, 
-                                     fill="red", tags="zoom")  # Smaller zoom crosshair dot
+            canvas.coords(crosshair[0], x, 0, x, preview_height)
+            canvas.coords(crosshair[1], 0, y, preview_width, y)
+            canvas.coords(crosshair[2], x-2, y-2, x+2, y+2)
+            
+            # Where a click would snap to
+            snap_x, snap_y, kind = snap_event(event)
+            if kind is not None:
+                sx, sy = snap_x * (preview_width / width), snap_y * (preview_height / height)
+                canvas.coords(snap_marker, sx-5, sy-5, sx+5, sy+5)
+                canvas.itemconfigure(snap_marker, outline="yellow" if kind == 'corner' else "cyan",
+                                     state=tk.NORMAL)
+            else:
+                canvas.itemconfigure(snap_marker, state=tk.HIDDEN)
+            
+            # Zoomed view of the full-resolution frame
+            loupe.move(x, y)
 
         def on_mouse_click(event):
             nonlocal selected_point
-            # Get canvas coordinates
-            x = canvas.canvasx(event.x)
-            y = canvas.canvasy(event.y)
-            
-            # Map coordinates back to original frame
-            orig_x = int(x * (width / preview_width))
-            orig_y = int(y * (height / preview_height))
+            # Original frame coordinates, snapped to the nearest edge or corner
+            orig_x, orig_y, _ = snap_event(event)
+            orig_x, orig_y = round(orig_x, 2), round(orig_y, 2)
             selected_point = (orig_x, orig_y)
+            x = orig_x * (preview_width / width)
+            y = orig_y * (preview_height / height)
             
             # Draw permanent marker at selected point
             canvas.delete("marker")
@@ -1600,15 +1688,16 @@ class CNCVisionApp:
             
             # Add coordinates label
             canvas.create_text(x + 15, y - 15,
-                             text=f"({orig_x}, {orig_y})",
+                             text=f"({orig_x:.1f}, {orig_y:.1f})",
                              fill="red", font=('Arial', 10), tags="marker")
 
         def on_confirm():
             if selected_point:
                 self.reference_point = selected_point
+                self.publish_params()
                 self.use_reference_point.set(True)
                 self.refresh_preview()
-                self.status_label.config(text=f"Reference point set: ({selected_point[0]}, {selected_point[1]})")
+                self.status_label.config(text=f"Reference point set: ({selected_point[0]:.1f}, {selected_point[1]:.1f})")
             picker_win.destroy()
 
         def on_cancel():
@@ -1664,6 +1753,8 @@ class CNCVisionApp:
         file_menu.add_command(label="Capture Latest Image", command=self.capture_image)
         file_menu.add_command(label="Auto-Load Latest Capture", command=self.load_latest_capture)
         file_menu.add_command(label="Generate Simplified DXF", command=self.process_image)
+        file_menu.add_command(label="Save DXF...", command=self.save_export_result, state=tk.DISABLED)
+        self.file_menu = file_menu
         file_menu.add_separator()
         file_menu.add_command(label="Save Settings", command=self.save_settings)
         file_menu.add_command(label="Load Settings", command=self.load_settings)
@@ -1686,6 +1777,72 @@ class CNCVisionApp:
         lens_menu.add_command(label="Load Calibration", command=self.load_calibration)
         lens_menu.add_separator()
         lens_menu.add_command(label="Reset Calibration", command=self.reset_calibration)
+        
+        # Debug menu: verbosity of the debug images written under debug/<run>/
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Debug", menu=debug_menu)
+        self.debug_level = tk.StringVar(value=DEBUG_SETTINGS['level'])
+        for level in DEBUG_LEVELS:
+            debug_menu.add_radiobutton(label=f"Debug Images: {level.capitalize()}", value=level,
+                                       variable=self.debug_level,
+                                       command=lambda: debug_sink.set_level(self.debug_level.get()))
+        debug_menu.add_separator()
+        debug_menu.add_checkbutton(label="Performance HUD", variable=self.hud_visible, command=self.toggle_hud)
+        debug_menu.add_checkbutton(label="Adaptive Preview Quality", variable=self.adaptive_preview,
+                                   command=lambda: self.preview_governor.set_enabled(self.adaptive_preview.get()))
+        self.trace_recording = tk.BooleanVar(value=tracer.enabled)
+        debug_menu.add_checkbutton(label="Record Trace", variable=self.trace_recording, command=self.toggle_trace)
+        debug_menu.add_command(label="Save Trace...", command=self.save_trace)
+
+    def toggle_hud(self):
+        """Show or hide the preview performance HUD"""
+        self.preview_stats.enabled = self.hud_visible.get()
+        if self.hud_visible.get():
+            self.preview_stats.reset()
+            self.hud_label.grid(row=1, column=0, columnspan=2, padx=4, pady=(0, 2), sticky="ew")
+            self.update_hud()
+        else:
+            self.hud_label.grid_remove()
+
+    def update_hud(self):
+        """Refresh the HUD text while it is shown"""
+        if self._hud_after is not None:
+            self.master.after_cancel(self._hud_after)
+            self._hud_after = None
+        if not self.hud_visible.get():
+            return
+        text, realtime = format_hud(self.preview_stats.snapshot(), quality=self.preview_governor.describe())
+        self.hud_label.config(text=text, fg=self.colors['text'] if realtime else self.colors['accent2'])
+        self._hud_after = self.master.after(PERF_HUD_SETTINGS['refresh_ms'], self.update_hud)
+
+    def toggle_trace(self):
+        """Start or stop recording spans for the Chrome/Perfetto trace"""
+        if self.trace_recording.get():
+            tracer.start()
+            self.status_label.config(text="Recording trace...")
+        else:
+            tracer.stop()
+            self.status_label.config(text=f"Trace stopped: {len(tracer)} spans recorded")
+
+    def save_trace(self):
+        """Save the recorded spans as a Chrome trace (open in ui.perfetto.dev or chrome://tracing)"""
+        if not len(tracer):
+            messagebox.showwarning("Warning", "No trace recorded. Enable Debug > Record Trace first.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json")],
+            initialfile=datetime.now().strftime("trace_%Y%m%d_%H%M%S.json"),
+            title="Save Trace"
+        )
+        if not file_path:
+            return
+        try:
+            tracer.save(file_path)
+            self.status_label.config(text=f"Trace saved: {file_path}")
+        except OSError as e:
+            log.error("Could not save trace: %s", e)
+            messagebox.showerror("Error", f"Could not save trace: {e}")
 
     def open_distortion_window(self):
         """Open the distortion compensation window"""
@@ -1768,6 +1925,16 @@ class CNCVisionApp:
                               font=('Arial', 10), padx=20, pady=10)
         capture_btn.pack(pady=10)
         
+        # Auto-capture keeps sharp, still boards that add coverage; no clicking per shot
+        auto_btn = tk.Button(button_frame, text="Start Auto Capture",
+                             command=lambda: self.toggle_auto_capture(auto_btn),
+                             font=('Arial', 10), padx=20, pady=5)
+        auto_btn.pack(pady=5)
+        
+        # Live coverage heat map
+        self.coverage_label = tk.Label(button_frame)
+        self.coverage_label.pack(pady=5)
+        
         # Add status label
         status_label = tk.Label(button_frame, text="Images captured: 0", font=('Arial', 10))
         status_label.pack(pady=10)
@@ -1782,7 +1949,58 @@ class CNCVisionApp:
         self.cal_window = cal_window
         self.cal_status_label = status_label
         self.calibration_images = []
+        
+        def on_close():
+            self.stop_auto_capture()
+            if self.calibration_solver is not None:
+                self.calibration_solver.cancel()
+                self.calibration_solver = None
+            cal_window.destroy()
+        cal_window.protocol("WM_DELETE_WINDOW", on_close)
+
+    def toggle_auto_capture(self, button):
+        """Start or stop continuous calibration capture"""
+        if self.auto_capture is not None:
+            self.stop_auto_capture()
+            button.config(text="Start Auto Capture")
+            return
+        if not self.frame_buffer:
+            messagebox.showerror("Error", "Camera preview must be running")
+            return
+        self.auto_capture = CalibrationAutoCapture(self.chessboard_detector)
+        self.auto_capture.start()
+        button.config(text="Stop Auto Capture")
+        self.update_auto_capture()
+
+    def stop_auto_capture(self):
+        """Stop continuous calibration capture, keeping the frames collected so far"""
+        if self.auto_capture is not None:
+            self.auto_capture.stop()
+            self.calibration_images.extend(CalibrationView(frame, corners)
+                                           for frame, corners in self.auto_capture.take_new())
+            self.auto_capture = None
+
+    def update_auto_capture(self):
+        """Collect auto-captured frames and redraw the coverage map (main thread)"""
+        auto = self.auto_capture
+        if auto is None or not self.cal_window.winfo_exists():
+            return
+        self.calibration_images.extend(CalibrationView(frame, corners) for frame, corners in auto.take_new())
 
+        if self.frame_buffer:
+            heat = auto.render_heat_map(self.frame_buffer[-1], 360)
+            imgtk = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(heat, cv2.COLOR_BGR2RGB)))
+            self.coverage_label.imgtk = imgtk
+            self.coverage_label.configure(image=imgtk)
+
+        status_text = (f"Images captured: {len(self.calibration_images)} - "
+                       f"coverage {auto.coverage * 100:.0f}% - {auto.last_status}")
+        if auto.ready:
+            status_text += " - Ready to calibrate!"
+        self.cal_status_label.config(text=status_text)
+        self.master.after(200, self.update_auto_capture)
+
+    @tracer.traced('capture_calibration_image')
     def capture_calibration_image(self, cal_window):
         """Capture an image for calibration"""
         if not self.cap or not self.cap.isOpened():
@@ -1797,86 +2015,13 @@ class CNCVisionApp:
         # Create a debug window to show what the camera sees
         debug_frame = frame.copy()
         
-        # Try multiple detection methods with different pattern sizes
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Define different pattern sizes to try
-        pattern_sizes = [(8, 6), (6, 8), (7, 5), (5, 7), (9, 7), (7, 9)]
-        detection_flags = [
-            None,
-            cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_FAST_CHECK,
-            cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_FAST_CHECK + cv2.CALIB_CB_NORMALIZE_IMAGE,
-            cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE
-        ]
-        
-        ret = False
-        corners = None
-        successful_size = None
-        successful_flags = None
-        
-        # Try all combinations of pattern sizes and flags
-        for pattern_size in pattern_sizes:
-            for flags in detection_flags:
-                if flags is None:
-                    ret_temp, corners_temp = cv2.findChessboardCorners(gray, pattern_size)
-                else:
-                    ret_temp, corners_temp = cv2.findChessboardCorners(gray, pattern_size, flags)
-                
-                if ret_temp:
-                    ret = True
-                    corners = corners_temp
-                    successful_size = pattern_size
-                    successful_flags = flags
-                    break
-            if ret:
-                break
-        
-        # If still no detection, try with enhanced image
-        if not ret:
-            enhanced_gray = cv2.equalizeHist(gray)
-            for pattern_size in pattern_sizes:
-                for flags in detection_flags:
-                    if flags is None:
-                        ret_temp, corners_temp = cv2.findChessboardCorners(enhanced_gray, pattern_size)
-                    else:
-                        ret_temp, corners_temp = cv2.findChessboardCorners(enhanced_gray, pattern_size, flags)
-                    
-                    if ret_temp:
-                        ret = True
-                        corners = corners_temp
-                        successful_size = pattern_size
-                        successful_flags = flags
-                        gray = enhanced_gray  # Use enhanced image for refinement
-                        break
-                if ret:
-                    break
-        
-        # If still no detection, try with different preprocessing
-        if not ret:
-            # Try with Gaussian blur
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            for pattern_size in pattern_sizes:
-                for flags in detection_flags:
-                    if flags is None:
-                        ret_temp, corners_temp = cv2.findChessboardCorners(blurred, pattern_size)
-                    else:
-                        ret_temp, corners_temp = cv2.findChessboardCorners(blurred, pattern_size, flags)
-                    
-                    if ret_temp:
-                        ret = True
-                        corners = corners_temp
-                        successful_size = pattern_size
-                        successful_flags = flags
-                        gray = blurred
-                        break
-                if ret:
-                    break
+        # Coarse search on a downscaled copy, sub-pixel refinement at full resolution
+        with tracer.span('chessboard_detect'):
+            successful_size, corners_refined = self.chessboard_detector.detect(frame)
+        pattern_sizes = self.chessboard_detector.pattern_sizes
+        ret = successful_size is not None
         
         if ret:
-            # Refine corner positions
-            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-            corners_refined = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
-            
             # Check if this is a valid image for calibration
             # Accept any pattern size that was successfully detected
             expected_corners = successful_size[0] * successful_size[1]
@@ -1886,14 +2031,14 @@ class CNCVisionApp:
             # Draw corners
             cv2.drawChessboardCorners(debug_frame, successful_size, corners_refined, ret)
             
-            # Save the image and corners
-            self.calibration_images.append((frame.copy(), corners_refined))
+            # Keep the corners and a thumbnail; the full frame is not needed to solve
+            self.calibration_images.append(CalibrationView(frame, corners_refined))
             
             # Update status with validity information
             # Count valid images based on the pattern size that was actually detected
             valid_count = 0
-            for _, corners in self.calibration_images:
-                if corners.shape[0] == expected_corners:
+            for view in self.calibration_images:
+                if view.corners.shape[0] == expected_corners:
                     valid_count += 1
             
             total_count = len(self.calibration_images)
@@ -1961,19 +2106,23 @@ class CNCVisionApp:
         cv2.imshow('Calibration Preview', resized_debug)
         cv2.waitKey(500)  # Show for 500ms
 
+    @tracer.traced('calculate_calibration')
     def calculate_calibration(self, cal_window):
-        """Calculate camera calibration from captured images"""
+        """Calculate camera calibration from captured images in a background process"""
+        self.stop_auto_capture()
         if len(self.calibration_images) < 10:
             messagebox.showwarning("Warning", "Need at least 10 images for good calibration")
             return
+        if self.calibration_solver is not None:
+            return
             
         try:
             # Determine the pattern size from the first valid image
             pattern_size = None
-            for _, corners in self.calibration_images:
-                if corners.shape[0] > 0:
+            for view in self.calibration_images:
+                if view.corners.shape[0] > 0:
                     # Find the pattern size by trying to factor the corner count
-                    corner_count = corners.shape[0]
+                    corner_count = view.corners.shape[0]
                     for w in range(3, 12):  # Try widths from 3 to 11
                         if corner_count % w == 0:
                             h = corner_count // w
@@ -1987,28 +2136,20 @@ class CNCVisionApp:
                 messagebox.showerror("Calibration Error", "Could not determine pattern size from captured images.")
                 return
             
-            print(f"Detected pattern size: {pattern_size}")
-            
-            # Prepare object points for the detected pattern size
-            objp = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
-            objp[:,:2] = np.mgrid[0:pattern_size[0], 0:pattern_size[1]].T.reshape(-1, 2)
-            
-            # Arrays to store object points and image points
-            objpoints = []  # 3D points in real world space
-            imgpoints = []  # 2D points in image plane
+            log.info("Detected pattern size: %s", pattern_size)
             
-            # Check each image for valid corner detection
-            valid_images = 0
+            # Views must match the pattern and the resolution of the first image
+            objp = board_object_points(pattern_size)
             expected_corners = pattern_size[0] * pattern_size[1]
-            
-            for i, (frame, corners) in enumerate(self.calibration_images):
-                # Check if we have the expected number of corners
-                if corners.shape[0] == expected_corners:
-                    objpoints.append(objp)
-                    imgpoints.append(corners)
-                    valid_images += 1
+            img_size = self.calibration_images[0].image_size
+            imgpoints = []
+            for i, view in enumerate(self.calibration_images):
+                if view.corners.shape[0] == expected_corners and view.image_size == img_size:
+                    imgpoints.append(view.corners.reshape(-1, 2))
                 else:
-                    print(f"Image {i+1}: Expected {expected_corners} corners, found {corners.shape[0]}")
+                    log.warning("Image %d: Expected %d corners at %s, found %d at %s", i + 1,
+                                expected_corners, img_size, view.corners.shape[0], view.image_size)
+            valid_images = len(imgpoints)
             
             if valid_images < 5:
                 messagebox.showerror("Calibration Error", 
@@ -2019,45 +2160,67 @@ class CNCVisionApp:
                                    f"Try recapturing images with the pattern more clearly visible.")
                 return
             
-            # Get image size from first image
-            img_size = self.calibration_images[0][0].shape[:2][::-1]
-            
-            print(f"Calibrating with {valid_images} valid images using pattern size {pattern_size}...")
+            log.info("Calibrating with %d valid images using pattern size %s...", valid_images, pattern_size)
             
-            # Calculate camera matrix and distortion coefficients
-            ret, mtx, dist, rvecs, tvecs = cv2.calibrateCamera(
-                objpoints, imgpoints, img_size, None, None)
-                
-            if ret:
-                self.camera_matrix = mtx
-                self.dist_coeffs = dist
-                
-                # Calculate reprojection error
-                mean_error = 0
-                for i in range(len(objpoints)):
-                    imgpoints2, _ = cv2.projectPoints(objpoints[i], rvecs[i], tvecs[i], mtx, dist)
-                    error = cv2.norm(imgpoints[i], imgpoints2, cv2.NORM_L2)/len(imgpoints2)
-                    mean_error += error
-                
-                mean_error = mean_error/len(objpoints)
-                
-                messagebox.showinfo("Calibration Success", 
-                                  f"Camera calibration completed successfully!\n\n"
-                                  f"Pattern size used: {pattern_size}\n"
-                                  f"Valid images used: {valid_images}/{len(self.calibration_images)}\n"
-                                  f"Mean reprojection error: {mean_error:.4f} pixels\n\n"
-                                  f"Lower error values indicate better calibration.")
-                self.update_lens_status()  # Update the status indicator
-                cal_window.destroy()
-            else:
-                messagebox.showerror("Calibration Error", "Failed to calculate calibration parameters.")
+            # Solve in a separate process; the window shows progress meanwhile
+            self.calibration_solver = CalibrationSolverProcess(
+                np.repeat(objp[None], valid_images, axis=0), np.array(imgpoints), img_size)
+            self.calibration_solver_start = tracer.now()
+            self.cal_status_label.config(text="Calibrating...")
+            self.master.after(100, self.poll_calibration_solver, cal_window, pattern_size, valid_images, img_size)
                 
         except Exception as e:
-            print(f"Calibration error: {str(e)}")
+            log.exception("Calibration error: %s", e)
             messagebox.showerror("Calibration Error", 
                                f"Error during calibration:\n{str(e)}\n\n"
                                f"Try recapturing images with better lighting and pattern visibility.")
 
+    def poll_calibration_solver(self, cal_window, pattern_size, valid_images, img_size):
+        """Show solver progress and apply the result when it arrives (main thread)"""
+        solver = self.calibration_solver
+        if solver is None:
+            return
+        message = solver.poll()
+        while message is not None and message[0] == 'progress':
+            _, fraction, text = message
+            if cal_window.winfo_exists():
+                self.cal_status_label.config(text=f"Calibrating: {text} ({fraction * 100:.0f}%)")
+            message = solver.poll()
+        if message is None:
+            self.master.after(100, self.poll_calibration_solver, cal_window, pattern_size, valid_images, img_size)
+            return
+        
+        self.calibration_solver = None
+        kind, result, _ = message
+        # The solver runs in another process; show it as its own track
+        tracer.complete('calibration_solve', self.calibration_solver_start, track='calibration-solver',
+                        views=valid_images, outcome=kind)
+        if kind == 'error':
+            log.error("Calibration error: %s", result)
+            messagebox.showerror("Calibration Error", 
+                               f"Error during calibration:\n{result}\n\n"
+                               f"Try recapturing images with better lighting and pattern visibility.")
+            return
+        
+        self.camera_matrix = result['camera_matrix']
+        self.dist_coeffs = result['dist_coeffs']
+        self.calibration_size = tuple(img_size)
+        self.publish_params()
+        metrics.calibration_error.observe(result['rms'])
+        metrics.calibration_last_error.set(result['rms'])
+        used = len(result['kept'])
+        messagebox.showinfo("Calibration Success", 
+                          f"Camera calibration completed successfully!\n\n"
+                          f"Pattern size used: {pattern_size}\n"
+                          f"Valid images used: {used}/{len(self.calibration_images)}"
+                          f" ({valid_images - used} outliers dropped)\n"
+                          f"RMS reprojection error: {result['rms']:.4f} pixels\n"
+                          f"Worst view error: {float(result['view_errors'].max()):.4f} pixels\n\n"
+                          f"Lower error values indicate better calibration.")
+        self.update_lens_status()  # Update the status indicator
+        if cal_window.winfo_exists():
+            cal_window.destroy()
+
     def save_calibration(self):
         """Save camera calibration parameters"""
         if self.camera_matrix is None or self.dist_coeffs is None:
@@ -2071,9 +2234,11 @@ class CNCVisionApp:
         )
         
         if file_path:
+            extra = {} if self.calibration_size is None else {'image_size': np.array(self.calibration_size)}
             np.savez(file_path, 
                     camera_matrix=self.camera_matrix,
-                    dist_coeffs=self.dist_coeffs)
+                    dist_coeffs=self.dist_coeffs,
+                    **extra)
             messagebox.showinfo("Success", "Calibration data saved successfully!")
 
     def load_calibration(self):
@@ -2088,23 +2253,30 @@ class CNCVisionApp:
                 data = np.load(file_path)
                 self.camera_matrix = data['camera_matrix']
                 self.dist_coeffs = data['dist_coeffs']
+                # Older files have no resolution; they are assumed to match the images
+                self.calibration_size = tuple(int(v) for v in data['image_size']) if 'image_size' in data else None
+                self.publish_params()
                 self.update_lens_status()  # Update the status indicator
                 messagebox.showinfo("Success", "Calibration data loaded successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load calibration data: {str(e)}")
 
-    def undistort_image(self, image):
-        """Apply lens distortion correction to an image"""
-        if self.camera_matrix is None or self.dist_coeffs is None:
+    def undistort_image(self, image, params=None):
+        """Apply lens distortion correction to an image using the cached remap tables"""
+        params = params if params is not None else self.pipeline_params
+        if params.camera_matrix is None or params.dist_coeffs is None:
             return image
             
-        return cv2.undistort(image, self.camera_matrix, self.dist_coeffs)
+        return undistort_maps.undistort(image, params.camera_matrix, params.dist_coeffs,
+                                        params.calibration_size, params.camera)
 
     def reset_calibration(self):
         """Reset camera calibration parameters"""
         self.camera_matrix = None
         self.dist_coeffs = None
+        self.calibration_size = None
         self.calibration_images = []
+        self.publish_params()
         self.update_lens_status()  # Update the status indicator
         messagebox.showinfo("Calibration Reset", "Camera calibration parameters have been reset.")
 
@@ -2115,9 +2287,9 @@ class CNCVisionApp:
         else:
             self.lens_status_label.config(text="Disabled", fg="red")
 
-    def save_settings(self):
-        """Save all application settings to a file"""
-        settings = {
+    def collect_settings(self):
+        """Current application settings as a flat dict in the settings_store schema"""
+        return {
             # Camera settings
             'selected_camera': self.selected_camera.get(),
             'selected_resolution': self.selected_resolution.get(),
@@ -2132,10 +2304,16 @@ class CNCVisionApp:
             'canny_high': self.canny_high.get(),
             'edge_scale': self.edge_scale.get(),
             'edge_color': self.edge_color,
+            'simplify_method': self.simplify_method.get(),
+            'simplify_tolerance': self.simplify_tolerance.get(),
+            'max_vertices': self.max_vertices.get(),
+            'vectorizer': self.vectorizer.get(),
+            'progressive_export': self.progressive_export.get(),
+            'undistort_mode': self.undistort_mode.get(),
             
             # Color detection settings
             'color_mode': self.color_mode.get(),
-            'target_color': self.target_color.tolist() if self.target_color is not None else None,
+            'target_color': self.target_color,
             'color_tolerance_h': self.color_tolerance_h.get(),
             'color_tolerance_s': self.color_tolerance_s.get(),
             'color_tolerance_v': self.color_tolerance_v.get(),
@@ -2144,6 +2322,8 @@ class CNCVisionApp:
             # DXF settings
             'dxf_rotation': self.dxf_rotation.get(),
             'use_reference_point': self.use_reference_point.get(),
+            'use_fiducials': self.use_fiducials.get(),
+            'fiducial_markers': self.fiducial_markers,
             'reference_point': self.reference_point,
             'reference_point_resolution': self.reference_point_resolution,
             'reference_table_x': self.reference_table_x.get(),
@@ -2155,25 +2335,75 @@ class CNCVisionApp:
             # Background subtraction
             'use_background_subtraction': self.use_background_subtraction.get(),
             
-            # Calibration settings
-            'camera_matrix': self.camera_matrix.tolist() if self.camera_matrix is not None else None,
-            'dist_coeffs': self.dist_coeffs.tolist() if self.dist_coeffs is not None else None,
+            # Calibration settings (arrays are written to the binary sidecar)
+            'camera_matrix': self.camera_matrix,
+            'dist_coeffs': self.dist_coeffs,
+            'calibration_size': self.calibration_size,
             
             # Calibration points
             'calibration_points': self.calibration_points,
             'known_distance': self.known_distance.get()
         }
+
+    def apply_settings(self, values):
+        """
+        Apply validated settings (from settings_store.read_settings) in one batch
+        Parameter publishing is suspended while the variables are set; afterwards
+        the snapshot is published once, the camera reconfigured once and the
+        preview refreshed once.
+        """
+        source = (self.selected_camera.get(), self.selected_resolution.get())
+        self._params_suspended = True
+        try:
+            for key, value in values.items():
+                variable = getattr(self, _SETTINGS_VARIABLES.get(key, key), None)
+                if isinstance(variable, tk.Variable):
+                    variable.set(value)
+            
+            # Plain attributes
+            if 'edge_color' in values:
+                self.edge_color = list(values['edge_color'])
+                hex_color = '#{:02x}{:02x}{:02x}'.format(self.edge_color[2], self.edge_color[1], self.edge_color[0])
+                self.edge_color_preview.configure(bg=hex_color)
+            if 'target_color' in values:
+                if values['target_color'] is None:
+                    # Saved without a target color: clear the current one, as on start-up
+                    self.target_color = None
+                    self.color_preview.configure(bg='#808080')
+                else:
+                    self.target_color = np.array(values['target_color'])
+                    hex_color = '#{:02x}{:02x}{:02x}'.format(self.target_color[2], self.target_color[1],
+                                                              self.target_color[0])
+                    self.color_preview.configure(bg=hex_color)
+            for key in ('fiducial_markers', 'reference_point', 'reference_point_resolution',
+                        'camera_matrix', 'dist_coeffs', 'calibration_size', 'calibration_points'):
+                if key in values:
+                    setattr(self, key, values[key])
+        finally:
+            self._params_suspended = False
+        
+        self.update_lens_status()
+        self.publish_params()
         
+        # One camera reconfiguration: reopen for a new source, otherwise just the exposure controls
+        if self.cap is not None and (self.selected_camera.get(), self.selected_resolution.get()) != source:
+            self.open_live_preview()
+        else:
+            self.update_camera_settings()
+        self.refresh_preview()
+        log.info("Applied %d settings", len(values))
+
+    def save_settings(self):
+        """Save all application settings to a file"""
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".cncsettings",
-            filetypes=[("CNC Vision Settings", "*.cncsettings"), ("All files", "*.*")],
+            defaultextension=SETTINGS_EXTENSION,
+            filetypes=[("CNC Vision Settings", "*" + SETTINGS_EXTENSION), ("All files", "*.*")],
             title="Save Settings"
         )
         
         if file_path:
             try:
-                with open(file_path, 'wb') as f:
-                    pickle.dump(settings, f)
+                write_settings(file_path, self.collect_settings())
                 messagebox.showinfo("Success", f"Settings saved to: {file_path}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
@@ -2181,104 +2411,17 @@ class CNCVisionApp:
     def load_settings(self):
         """Load all application settings from a file"""
         file_path = filedialog.askopenfilename(
-            filetypes=[("CNC Vision Settings", "*.cncsettings"), ("All files", "*.*")],
+            filetypes=[("CNC Vision Settings", "*" + SETTINGS_EXTENSION), ("Legacy JSON settings", "*.json"),
+                       ("All files", "*.*")],
             title="Load Settings"
         )
         
         if file_path:
             try:
-                with open(file_path, 'rb') as f:
-                    settings = pickle.load(f)
-                
-                # Load camera settings
-                if 'selected_camera' in settings:
-                    self.selected_camera.set(settings['selected_camera'])
-                if 'selected_resolution' in settings:
-                    self.selected_resolution.set(settings['selected_resolution'])
-                if 'auto_exposure' in settings:
-                    self.auto_exposure.set(settings['auto_exposure'])
-                if 'exposure' in settings:
-                    self.exposure_var.set(settings['exposure'])
-                if 'brightness' in settings:
-                    self.brightness_var.set(settings['brightness'])
-                if 'contrast' in settings:
-                    self.contrast_var.set(settings['contrast'])
-                
-                # Load edge detection settings
-                if 'inches_per_pixel' in settings:
-                    self.inches_per_pixel.set(settings['inches_per_pixel'])
-                if 'canny_low' in settings:
-                    self.canny_low.set(settings['canny_low'])
-                if 'canny_high' in settings:
-                    self.canny_high.set(settings['canny_high'])
-                if 'edge_scale' in settings:
-                    self.edge_scale.set(settings['edge_scale'])
-                if 'edge_color' in settings:
-                    self.edge_color = settings['edge_color']
-                    # Update edge color preview
-                    hex_color = '#{:02x}{:02x}{:02x}'.format(self.edge_color[2], self.edge_color[1], self.edge_color[0])
-                    self.edge_color_preview.configure(bg=hex_color)
-                
-                # Load color detection settings
-                if 'color_mode' in settings:
-                    self.color_mode.set(settings['color_mode'])
-                if 'target_color' in settings and settings['target_color'] is not None:
-                    self.target_color = np.array(settings['target_color'])
-                    # Update color preview
-                    hex_color = '#{:02x}{:02x}{:02x}'.format(self.target_color[2], self.target_color[1], self.target_color[0])
-                    self.color_preview.configure(bg=hex_color)
-                if 'color_tolerance_h' in settings:
-                    self.color_tolerance_h.set(settings['color_tolerance_h'])
-                if 'color_tolerance_s' in settings:
-                    self.color_tolerance_s.set(settings['color_tolerance_s'])
-                if 'color_tolerance_v' in settings:
-                    self.color_tolerance_v.set(settings['color_tolerance_v'])
-                if 'color_sample_radius' in settings:
-                    self.color_sample_radius.set(settings['color_sample_radius'])
-                
-                # Load DXF settings
-                if 'dxf_rotation' in settings:
-                    self.dxf_rotation.set(settings['dxf_rotation'])
-                if 'use_reference_point' in settings:
-                    self.use_reference_point.set(settings['use_reference_point'])
-                if 'reference_point' in settings:
-                    self.reference_point = settings['reference_point']
-                if 'reference_point_resolution' in settings:
-                    self.reference_point_resolution = settings['reference_point_resolution']
-                if 'reference_table_x' in settings:
-                    self.reference_table_x.set(settings['reference_table_x'])
-                if 'reference_table_y' in settings:
-                    self.reference_table_y.set(settings['reference_table_y'])
-                if 'add_table_boundary' in settings:
-                    self.add_table_boundary.set(settings['add_table_boundary'])
-                if 'table_width' in settings:
-                    self.table_width.set(settings['table_width'])
-                if 'table_height' in settings:
-                    self.table_height.set(settings['table_height'])
-                
-                # Load background subtraction
-                if 'use_background_subtraction' in settings:
-                    self.use_background_subtraction.set(settings['use_background_subtraction'])
-                
-                # Load calibration settings
-                if 'camera_matrix' in settings and settings['camera_matrix'] is not None:
-                    self.camera_matrix = np.array(settings['camera_matrix'])
-                if 'dist_coeffs' in settings and settings['dist_coeffs'] is not None:
-                    self.dist_coeffs = np.array(settings['dist_coeffs'])
-                self.update_lens_status()
-                
-                # Load calibration points
-                if 'calibration_points' in settings:
-                    self.calibration_points = settings['calibration_points']
-                if 'known_distance' in settings:
-                    self.known_distance.set(settings['known_distance'])
-                
-                # Refresh preview to show updated settings
-                self.refresh_preview()
-                
+                # Validated as a whole before anything is applied
+                self.apply_settings(read_settings(file_path))
                 messagebox.showinfo("Success", f"Settings loaded from: {file_path}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load settings: {str(e)}")
-                print(f"Load settings error: {str(e)}")
-                traceback.print_exc()
\ No newline at end of file
+                log.exception("Load settings error: %s", e)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class BufferPool:
+    """
+    Recycled image buffers for the live preview
+    The capture thread renders each preview into buffers taken from the
+    pool; the Tk thread gives them back once their pixels are in a
+    PhotoImage (or the render was skipped). In steady state no image memory
+    is allocated per frame. Only buffers of the most recent shape are kept,
+    so resizing the window releases the old ones.
+    """
+
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        self._shape = None
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self, shape):
+        """A uint8 buffer of this shape with undefined contents"""
+        shape = tuple(shape)
+        with self._lock:
+            if shape != self._shape:
+                self._shape = shape
+                self._free = []
+            elif self._free:
+                return self._free.pop()
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, *buffers):
+        """Return buffers that are no longer read or written"""
+        with self._lock:
+            for buffer in buffers:
+                if buffer is not None and buffer.shape == self._shape and len(self._free) < self.max_free:
+                    self._free.append(buffer)
+
+
+class PhotoSlot:
+    """
+    One preview label backed by a persistent PhotoImage
+    show() pastes new RGB pixels into the existing photo; a new PhotoImage
+    is created (and the label reconfigured) only when the size changes.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self._photo = None
+        self._size = None
+
+    def show(self, rgb):
+        """Display an RGB uint8 array"""
+        image = Image.fromarray(rgb)
+        if image.size != self._size:
+            self._photo = ImageTk.PhotoImage(image=image)
+            self._size = image.size
+            self.label.configure(image=self._photo)
+            self.label.imgtk = self._photo
+        else:
+            self._photo.paste(image)
+
+    def clear(self):
+        """Show nothing; the next show() creates a new photo"""
+        self.label.configure(image='')
+        self._photo = None
+        self._size = None
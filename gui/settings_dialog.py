@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import os
+
+from config import SETTINGS_EXTENSION
 
 class SettingsDialog:
     def __init__(self, parent, settings_manager):
@@ -72,8 +73,8 @@ class SettingsDialog:
             messagebox.showerror("Error", "Please enter a settings name")
             return
             
-        if not filename.endswith('.json'):
-            filename += '.json'
+        if not filename.endswith(SETTINGS_EXTENSION):
+            filename += SETTINGS_EXTENSION
             
         if self.settings_manager.save_settings(filename):
             self.refresh_settings_list()
@@ -98,7 +99,7 @@ class SettingsDialog:
         filename = self.settings_listbox.get(selection[0])
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {filename}?"):
             try:
-                os.remove(os.path.join(self.settings_manager.settings_dir, filename))
+                self.settings_manager.delete_settings(filename)
                 self.refresh_settings_list()
                 messagebox.showinfo("Success", f"Deleted {filename}")
             except Exception as e:
@@ -0,0 +1,87 @@
+import tkinter as tk
+
+import numpy as np
+from PIL import Image, ImageTk
+
+from config import GUI_SETTINGS
+
+
+class ZoomLoupe:
+    """
+    Magnifier that follows the mouse over a picker canvas
+    Shows full-resolution pixels from an ImagePyramid around the pointer.
+    Mouse motion only records the latest position; the loupe is redrawn at
+    most once per refresh interval into a single PhotoImage that is reused,
+    and its canvas items are moved rather than recreated.
+    """
+
+    def __init__(self, canvas, pyramid, preview_size, half_size=GUI_SETTINGS['loupe_half_size'],
+                 zoom=GUI_SETTINGS['loupe_zoom'], refresh_ms=GUI_SETTINGS['loupe_refresh_ms']):
+        self.canvas = canvas
+        self.pyramid = pyramid
+        self.preview_width, self.preview_height = preview_size
+        self.half_size = half_size
+        self.zoom = zoom
+        self.refresh_ms = refresh_ms
+
+        side = 2 * half_size * zoom
+        self.side = side
+        self._buffer = np.zeros((side, side, 3), dtype=np.uint8)
+        self._photo = ImageTk.PhotoImage(Image.fromarray(self._buffer))
+        self._image_item = canvas.create_image(-side, -side, anchor="nw", image=self._photo, state=tk.HIDDEN)
+        self._lines = [canvas.create_line(0, 0, 0, 0, fill="red", width=1, state=tk.HIDDEN) for _ in range(2)]
+        self._pending = None
+        self._scheduled = None
+        canvas.bind("<Leave>", lambda event: self.hide(), add="+")
+        canvas.bind("<Destroy>", lambda event: self.destroy(), add="+")
+
+    def move(self, canvas_x, canvas_y):
+        """Request a redraw for the pointer at these canvas (preview) coordinates"""
+        self._pending = (canvas_x, canvas_y)
+        if self._scheduled is None:
+            self._scheduled = self.canvas.after(self.refresh_ms, self._redraw)
+
+    def hide(self):
+        """Hide the loupe until the next move"""
+        self._pending = None
+        for item in [self._image_item] + self._lines:
+            self.canvas.itemconfigure(item, state=tk.HIDDEN)
+
+    def destroy(self):
+        """Cancel a pending redraw (called when the canvas is destroyed)"""
+        if self._scheduled is not None:
+            self.canvas.after_cancel(self._scheduled)
+            self._scheduled = None
+
+    def _redraw(self):
+        self._scheduled = None
+        if self._pending is None:
+            return
+        x, y = self._pending
+        self._pending = None
+        if not (0 <= x < self.preview_width and 0 <= y < self.preview_height):
+            self.hide()
+            return
+
+        # Full-resolution pixels around the pointer, into the reused buffer and photo
+        width, height = self.pyramid.size
+        full_x = x * width / self.preview_width
+        full_y = y * height / self.preview_height
+        self.pyramid.loupe(full_x, full_y, self.half_size, self.zoom, out=self._buffer)
+        self._photo.paste(Image.fromarray(self._buffer))
+
+        # Keep the loupe inside the canvas, beside the pointer
+        side = self.side
+        left = x + 20 if x + 20 + side <= self.preview_width else x - 20 - side
+        top = y + 20 if y + 20 + side <= self.preview_height else y - 20 - side
+        left = min(max(left, 0), self.preview_width - side)
+        top = min(max(top, 0), self.preview_height - side)
+        centre_x = left + (full_x - round(full_x) + self.half_size + 0.5) * self.zoom
+        centre_y = top + (full_y - round(full_y) + self.half_size + 0.5) * self.zoom
+
+        self.canvas.coords(self._image_item, left, top)
+        self.canvas.coords(self._lines[0], centre_x, top, centre_x, top + side)
+        self.canvas.coords(self._lines[1], left, centre_y, left + side, centre_y)
+        for item in [self._image_item] + self._lines:
+            self.canvas.itemconfigure(item, state=tk.NORMAL)
+            self.canvas.tag_raise(item)
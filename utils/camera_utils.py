@@ -1,8 +1,11 @@
 import cv2
+import logging
 import subprocess
 import os
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
 def list_ffmpeg_cameras():
     """List available cameras using FFmpeg"""
     devices = []
@@ -19,7 +22,7 @@ def list_ffmpeg_cameras():
                 name = line.split('"')[1]
                 devices.append(name)
     except Exception as e:
-        print(f"Error listing cameras: {e}")
+        log.error("Error listing cameras: %s", e)
     return devices
 
 def build_camera_index_map():
@@ -56,7 +59,7 @@ def get_camera_resolutions(camera_index):
         cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
         
         if not cap.isOpened():
-            print(f"Failed to open camera {camera_index}")
+            log.error("Failed to open camera %s", camera_index)
             return []
 
         for width, height in test_resolutions:
@@ -72,13 +75,13 @@ def get_camera_resolutions(camera_index):
                 resolution = (actual_width, actual_height)
                 if resolution not in supported_resolutions:
                     supported_resolutions.append(resolution)
-                    print(f"Supported resolution: {actual_width}x{actual_height}")
+                    log.info("Supported resolution: %dx%d", actual_width, actual_height)
 
         cap.release()
         return supported_resolutions
 
     except Exception as e:
-        print(f"Error checking resolutions: {e}")
+        log.error("Error checking resolutions: %s", e)
         return []
 
 def get_latest_image(directory):
@@ -89,7 +92,7 @@ def get_latest_image(directory):
     return max(files, key=os.path.getctime)
 
 def print_camera_parameters(cap):
-    """Debug function to print camera parameters"""
+    """Debug function to log camera parameters"""
     params = {
         'BRIGHTNESS': cv2.CAP_PROP_BRIGHTNESS,
         'CONTRAST': cv2.CAP_PROP_CONTRAST,
@@ -99,7 +102,7 @@ def print_camera_parameters(cap):
         'AUTO_EXPOSURE': cv2.CAP_PROP_AUTO_EXPOSURE
     }
     
-    print("\nCamera Parameters:")
-    for name, param in params.items():
-        value = cap.get(param)
-        print(f"{name}: {value}") 
\ No newline at end of file
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    log.debug("Camera parameters: %s",
+              ", ".join(f"{name}={cap.get(param)}" for name, param in params.items())) 
\ No newline at end of file
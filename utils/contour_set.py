@@ -0,0 +1,204 @@
+import numpy as np
+
+from utils.geometry_utils import pack_contours, unpack_contours, contour_ids, simplify_packed
+
+
+class ContourSet:
+    """
+    Columnar storage for a set of contours / polylines
+    All vertices live in one (N, 2) array; contour k is
+    points[offsets[k]:offsets[k + 1]]. Per-contour metadata is kept in
+    parallel columns so whole-set operations never touch Python objects
+    per vertex.
+    """
+
+    def __init__(self, points, offsets, closed=True, hierarchy=None, layer='0', dtype=np.float64):
+        self.points = np.asarray(points, dtype=dtype).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        count = len(self.offsets) - 1
+
+        closed = np.asarray(closed, dtype=bool)
+        self.closed = np.full(count, bool(closed)) if closed.ndim == 0 else closed.copy()
+
+        # Hierarchy rows are OpenCV's [next, previous, first_child, parent]
+        if hierarchy is None:
+            self.hierarchy = np.full((count, 4), -1, dtype=np.int32)
+        else:
+            self.hierarchy = np.asarray(hierarchy, dtype=np.int32).reshape(count, 4).copy()
+
+        layer = np.asarray(layer, dtype=str)
+        self.layer = np.full(count, str(layer)) if layer.ndim == 0 else layer.copy()
+
+        self._compute_metrics()
+
+    @classmethod
+    def empty(cls, dtype=np.float64):
+        """Create a set with no contours"""
+        return cls(np.zeros((0, 2)), np.zeros(1, dtype=np.int64), dtype=dtype)
+
+    @classmethod
+    def from_contours(cls, contours, hierarchy=None, closed=True, layer='0', dtype=np.float64):
+        """
+        Build a set from OpenCV contours or (N, 2) polylines
+        hierarchy: the second value returned by cv2.findContours, if any
+        """
+        points, offsets = pack_contours(contours)
+        if hierarchy is not None:
+            hierarchy = np.asarray(hierarchy).reshape(-1, 4)
+        return cls(points, offsets, closed=closed, hierarchy=hierarchy, layer=layer, dtype=dtype)
+
+    @classmethod
+    def concatenate(cls, sets):
+        """Join several sets into one, keeping hierarchy indices consistent"""
+        sets = [s for s in sets if s is not None]
+        if not sets:
+            return cls.empty()
+
+        points = np.concatenate([s.points for s in sets])
+        offsets = [np.zeros(1, dtype=np.int64)]
+        hierarchy = []
+        vertex_base = contour_base = 0
+        for s in sets:
+            offsets.append(s.offsets[1:] + vertex_base)
+            h = s.hierarchy.copy()
+            h[h >= 0] += contour_base
+            hierarchy.append(h)
+            vertex_base += s.n_vertices
+            contour_base += len(s)
+
+        return cls(points, np.concatenate(offsets),
+                   closed=np.concatenate([s.closed for s in sets]),
+                   hierarchy=np.concatenate(hierarchy),
+                   layer=np.concatenate([s.layer for s in sets]),
+                   dtype=sets[0].points.dtype)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_vertices(self):
+        """Total number of vertices in the set"""
+        return int(self.offsets[-1])
+
+    @property
+    def counts(self):
+        """Number of vertices of every contour"""
+        return np.diff(self.offsets)
+
+    def contour(self, k):
+        """View of the vertices of contour k"""
+        return self.points[self.offsets[k]:self.offsets[k + 1]]
+
+    def _compute_metrics(self):
+        """Vectorised area, perimeter and bounding box for every contour"""
+        count = len(self)
+        self.area = np.zeros(count)
+        self.perimeter = np.zeros(count)
+        self.bbox = np.zeros((count, 4))  # x_min, y_min, x_max, y_max
+        if self.n_vertices == 0:
+            return
+
+        counts = self.counts
+        ids = contour_ids(self.offsets)
+        starts = self.offsets[:-1]
+        nonempty = counts > 0
+
+        # Successor of every vertex, wrapping to the first vertex of its contour
+        nxt = np.arange(1, self.n_vertices + 1)
+        nxt[self.offsets[1:][nonempty] - 1] = starts[nonempty]
+
+        p = self.points.astype(np.float64)
+        q = p[nxt]
+        cross = p[:, 0] * q[:, 1] - q[:, 0] * p[:, 1]
+        seg = np.hypot(q[:, 0] - p[:, 0], q[:, 1] - p[:, 1])
+
+        # Open polylines have no closing segment
+        is_last = np.zeros(self.n_vertices, dtype=bool)
+        is_last[self.offsets[1:][nonempty] - 1] = True
+        seg[is_last & ~self.closed[ids]] = 0.0
+
+        self.area = np.abs(np.bincount(ids, weights=cross, minlength=count)) / 2.0
+        self.area[~self.closed] = 0.0
+        self.perimeter = np.bincount(ids, weights=seg, minlength=count)
+
+        firsts = starts[nonempty]
+        self.bbox[nonempty, 0] = np.minimum.reduceat(p[:, 0], firsts)
+        self.bbox[nonempty, 1] = np.minimum.reduceat(p[:, 1], firsts)
+        self.bbox[nonempty, 2] = np.maximum.reduceat(p[:, 0], firsts)
+        self.bbox[nonempty, 3] = np.maximum.reduceat(p[:, 1], firsts)
+
+    def filter(self, mask):
+        """Keep only the contours selected by a per-contour boolean mask"""
+        mask = np.asarray(mask, dtype=bool)
+        keep_vertex = np.repeat(mask, self.counts)
+        counts = self.counts[mask]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # Re-point hierarchy links at the surviving contours; dropped ones become -1
+        remap = np.full(len(self) + 1, -1, dtype=np.int32)
+        remap[:-1][mask] = np.arange(int(mask.sum()), dtype=np.int32)
+        hierarchy = remap[self.hierarchy[mask]]
+
+        return ContourSet(self.points[keep_vertex], offsets, closed=self.closed[mask],
+                          hierarchy=hierarchy, layer=self.layer[mask], dtype=self.points.dtype)
+
+    def filter_vertices(self, keep):
+        """Keep only the vertices selected by a per-vertex boolean mask"""
+        keep = np.asarray(keep, dtype=bool)
+        counts = np.bincount(contour_ids(self.offsets)[keep], minlength=len(self))
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return ContourSet(self.points[keep], offsets, closed=self.closed,
+                          hierarchy=self.hierarchy, layer=self.layer, dtype=self.points.dtype)
+
+    def clip(self, x_min, y_min, x_max, y_max):
+        """Drop every vertex outside an axis-aligned box"""
+        x, y = self.points[:, 0], self.points[:, 1]
+        return self.filter_vertices((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max))
+
+    def drop_degenerate(self):
+        """Drop closed contours with fewer than 3 and open ones with fewer than 2 vertices"""
+        return self.filter(self.counts >= np.where(self.closed, 3, 2))
+
+    def transform(self, matrix):
+        """Apply a 2x3 affine or 3x3 projective matrix to every vertex at once"""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        p = self.points.astype(np.float64)
+        out = p @ matrix[:2, :2].T + matrix[:2, 2]
+        if matrix.shape[0] == 3:
+            w = p @ matrix[2, :2] + matrix[2, 2]
+            out /= w[:, None]
+        return ContourSet(out, self.offsets, closed=self.closed, hierarchy=self.hierarchy,
+                          layer=self.layer, dtype=self.points.dtype)
+
+    def simplify(self, tolerance, method='dp', max_vertices=None):
+        """
+        Simplify every contour in one batch
+        tolerance: maximum deviation in the units of the points
+        max_vertices: global vertex budget; contours that do not fit are dropped
+        """
+        points, offsets, kept = simplify_packed(self.points, self.offsets, tolerance,
+                                                method, max_vertices, self.closed)
+        remap = np.full(len(self) + 1, -1, dtype=np.int32)
+        remap[:-1][kept] = np.arange(int(kept.sum()), dtype=np.int32)
+        return ContourSet(points, offsets, closed=self.closed[kept],
+                          hierarchy=remap[self.hierarchy[kept]],
+                          layer=self.layer[kept], dtype=self.points.dtype)
+
+    def to_cv_contours(self):
+        """List of int32 (N, 1, 2) arrays for cv2 drawing functions"""
+        return unpack_contours(self.points, self.offsets)
+
+    def save(self, path):
+        """Serialise the set to a compressed .npz file"""
+        np.savez_compressed(path, points=self.points, offsets=self.offsets, closed=self.closed,
+                            hierarchy=self.hierarchy, layer=self.layer)
+
+    @classmethod
+    def load(cls, path):
+        """Load a set written by save()"""
+        with np.load(path) as data:
+            return cls(data['points'], data['offsets'], closed=data['closed'],
+                       hierarchy=data['hierarchy'], layer=data['layer'],
+                       dtype=data['points'].dtype)
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from queue import Queue, Full
+
+import cv2
+
+from config import DEBUG_SETTINGS
+from utils.trace_utils import tracer
+
+log = logging.getLogger(__name__)
+
+# Verbosity levels; an artifact is written when its level <= the sink level
+DEBUG_LEVELS = {'off': 0, 'basic': 1, 'verbose': 2}
+
+
+class DebugSink:
+    """
+    Asynchronous writer for debug images
+    Arrays are queued and PNG-encoded on a background thread, so the caller
+    never waits on compression or disk. The queue is bounded; when it is
+    full new artifacts are dropped rather than stalling the pipeline.
+    Each run writes into its own timestamped directory; new_run() returns
+    it and callers pass it to save(), so runs on different threads (an
+    export and a capture) never write into each other's directory.
+    """
+
+    def __init__(self, level=DEBUG_SETTINGS['level'], directory=DEBUG_SETTINGS['directory'],
+                 queue_size=DEBUG_SETTINGS['queue_size'], png_compression=DEBUG_SETTINGS['png_compression']):
+        self.level = DEBUG_LEVELS[level] if isinstance(level, str) else int(level)
+        self.directory = directory
+        self.png_compression = png_compression
+        self.session_directory = None
+        self.dropped = 0
+        self._queue = Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def set_level(self, level):
+        """Set verbosity by name ('off', 'basic', 'verbose') or number"""
+        self.level = DEBUG_LEVELS[level] if isinstance(level, str) else int(level)
+
+    def enabled(self, level=1):
+        """Whether artifacts of this level are currently written"""
+        return 0 < level <= self.level
+
+    def new_run(self, name):
+        """New artifact directory for one run, e.g. debug/20240101_120000_123456_export; pass it to save()"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.directory, f"{timestamp}_{name}")
+
+    def save(self, name, image, level=1, run=None):
+        """
+        Queue an image for writing as <run>/<name>.png
+        run: directory from new_run(); artifacts outside a run go to one session directory
+        Returns False if the level is disabled or the queue is full
+        """
+        if not self.enabled(level) or image is None:
+            return False
+        if run is None:
+            with self._lock:
+                if self.session_directory is None:
+                    self.session_directory = self.new_run('session')
+            run = self.session_directory
+
+        # Callers may keep modifying their buffers; cached read-only arrays are safe to share
+        if image.flags.writeable:
+            image = image.copy()
+
+        self._start()
+        try:
+            self._queue.put_nowait((os.path.join(run, f"{name}.png"), image))
+        except Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self):
+        """Block until every queued artifact has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self):
+        """Start the writer thread on first use"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, name="debug-sink", daemon=True)
+                self._thread.start()
+
+    def _writer(self):
+        """Encode and write queued images"""
+        while True:
+            path, image = self._queue.get()
+            try:
+                with tracer.span('debug_png', file=os.path.basename(path)):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression])
+            except Exception as e:
+                log.warning("Failed to write debug image %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+
+# Shared sink used by the GUI, the export pipeline and the image utilities
+debug_sink = DebugSink()
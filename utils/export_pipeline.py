@@ -0,0 +1,566 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from calibration.fiducials import register_table
+from config import DXF_SETTINGS, EXPORT_CACHE_MAX_BYTES, FIDUCIAL_SETTINGS
+from utils.contour_set import ContourSet
+from utils.debug_utils import debug_sink
+from utils.metrics import export_seconds, export_contours, export_vertices
+from utils.trace_utils import tracer
+from utils.undistort_utils import undistort_maps, undistort_points
+from utils.geometry_utils import table_transform
+from utils.image_utils import color_based_edge_detection
+from utils.vectorize_utils import trace_centerlines
+
+log = logging.getLogger(__name__)
+
+EXPORT_STAGES = ('load', 'undistort', 'normalize', 'detect', 'contours', 'simplify', 'undistort_points',
+                 'register', 'transform', 'write')
+
+
+def _digest_update(h, value):
+    """Feed a parameter value into a hash; arrays are hashed by content"""
+    if isinstance(value, np.ndarray):
+        h.update(f"nd{value.shape}{value.dtype}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for k in sorted(value):
+            h.update(f"k{k}".encode())
+            _digest_update(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"s{len(value)}".encode())
+        for item in value:
+            _digest_update(h, item)
+    else:
+        h.update(repr(value).encode())
+
+
+def stage_key(stage, parent_key, params):
+    """Cache key of a stage: its name, its input's key and the parameters it reads"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(stage.encode())
+    h.update((parent_key or '').encode())
+    _digest_update(h, params)
+    return h.hexdigest()
+
+
+def estimate_nbytes(value):
+    """Rough memory footprint of a cached stage output"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, ContourSet):
+        return value.points.nbytes + value.offsets.nbytes + len(value) * 80
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    return 64
+
+
+def _freeze(value):
+    """Make cached arrays read-only so later stages cannot modify them in place"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    elif isinstance(value, ContourSet):
+        value.points.flags.writeable = False
+    return value
+
+
+class StageCache:
+    """Thread-safe LRU cache of stage outputs bounded by total memory"""
+
+    def __init__(self, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """Store a value, evicting least recently used entries to stay under the cap"""
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_REDUCED_READ_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                       (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def load_stage(path, mtime=None, size=None, downscale=1.0):
+    """
+    Read the source image from disk (mtime/size only identify the file version)
+    downscale < 1 decodes at reduced size, which is much faster for JPEG sources
+    """
+    flags, factor = cv2.IMREAD_COLOR, 1
+    for f, flag in _REDUCED_READ_FLAGS:
+        if downscale * f <= 1.0:
+            flags, factor = flag, f
+            break
+    image = cv2.imread(path, flags)
+    if image is None:
+        raise Exception(f"Could not read image: {path}")
+
+    # Resize whatever reduction imread could not do itself
+    remaining = downscale * factor
+    if remaining < 1.0:
+        h, w = image.shape[:2]
+        image = cv2.resize(image, (max(1, round(w * remaining)), max(1, round(h * remaining))),
+                           interpolation=cv2.INTER_AREA)
+    return image
+
+
+def undistort_stage(image, maps=undistort_maps, camera_matrix=None, dist_coeffs=None, calibration_size=None,
+                    camera='default'):
+    """Apply lens distortion correction if calibration is available, with remap tables from maps"""
+    return maps.undistort(image, camera_matrix, dist_coeffs, calibration_size, camera)
+
+
+def normalize_stage(image, edge_scale=1.0):
+    """Stretch contrast to the full range, then upsample if edge_scale > 1"""
+    image_float = image.astype(np.float32)
+    image_normalized = cv2.normalize(image_float, None, 0, 255, cv2.NORM_MINMAX)
+    image = image_normalized.astype(np.uint8)
+
+    # Process at higher resolution if scale > 1.0
+    if edge_scale > 1.0:
+        h, w = image.shape[:2]
+        image = cv2.resize(image, (int(w * edge_scale), int(h * edge_scale)))
+        log.info("Processing at %dx%d resolution", int(w * edge_scale), int(h * edge_scale))
+    return image
+
+
+def detect_stage(image, run=None, target_color=None, tolerance_h=15, tolerance_s=100, tolerance_v=100,
+                 canny_low=50, canny_high=150, background_edges=None, debug=True):
+    """
+    Detect edges (Canny, or color mask when target_color is set)
+    run: debug_sink run directory for the debug images
+    Returns (edges, thresh) where thresh is the binary image to vectorise
+    """
+    if target_color is not None:
+        edges, mask = color_based_edge_detection(
+            image,
+            target_color,
+            tolerance_h=tolerance_h,
+            tolerance_s=tolerance_s,
+            tolerance_v=tolerance_v,
+            debug=debug,
+            run=run
+        )
+        # Create binary threshold from mask
+        thresh = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)[1]
+    else:
+        # Normal Canny edge detection with improved contrast
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        edges = cv2.Canny(blurred, canny_low, canny_high)
+        # Create binary threshold from edges
+        thresh = cv2.threshold(edges, 127, 255, cv2.THRESH_BINARY)[1]
+
+    # Apply background subtraction if enabled
+    if background_edges is not None:
+        # Background was captured at camera resolution; match the working image
+        if background_edges.shape[:2] != thresh.shape[:2]:
+            background_edges = cv2.resize(background_edges, (thresh.shape[1], thresh.shape[0]),
+                                          interpolation=cv2.INTER_NEAREST)
+        if debug:
+            # Save original edges for debug
+            debug_sink.save("debug_original_edges", thresh, level=2, run=run)
+            debug_sink.save("debug_background_edges", background_edges, level=2, run=run)
+
+        original_pixels = np.count_nonzero(thresh)
+
+        # Subtract background edges from current edges
+        thresh = cv2.subtract(thresh, background_edges)
+
+        # Ensure we don't have negative values
+        thresh = cv2.threshold(thresh, 0, 255, cv2.THRESH_BINARY)[1]
+
+        if debug:
+            # Save debug image of subtracted result
+            debug_sink.save("debug_subtracted_edges", thresh, level=2, run=run)
+
+        if log.isEnabledFor(logging.INFO):
+            log.info("Background subtraction applied: original edges %d px, background edges %d px, "
+                     "subtracted edges %d px", original_pixels, np.count_nonzero(background_edges),
+                     np.count_nonzero(thresh))
+
+    if debug:
+        # Save debug images
+        debug_sink.save("thresh_debug", thresh, run=run)
+        debug_sink.save("edges_debug", edges, run=run)
+    return edges, thresh
+
+
+def contours_stage(thresh, vectorizer='contours', min_area=3, link_gap=3, min_length=5):
+    """Vectorise the binary image into a ContourSet in working-image pixels"""
+    if vectorizer == 'centerline':
+        # Link thinned edge pixels into single polylines instead of double-sided loops
+        contour_set = trace_centerlines(thresh, max_gap=link_gap, min_length=min_length)
+        log.info("Centerlines found: %d (%d closed, %d open)", len(contour_set),
+                 int(contour_set.closed.sum()), int((~contour_set.closed).sum()))
+        return contour_set
+
+    # Find contours with different methods to ensure we don't miss any
+    contours_external, hierarchy_external = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours_tree, hierarchy_tree = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Combine contours from both methods
+    contour_set = ContourSet.concatenate([
+        ContourSet.from_contours(contours_external, hierarchy_external),
+        ContourSet.from_contours(contours_tree, hierarchy_tree)
+    ])
+
+    log.info("Contours found: %d external, %d tree, %d total",
+             len(contours_external), len(contours_tree), len(contour_set))
+
+    # Drop tiny contours
+    return contour_set.filter(contour_set.area >= min_area)
+
+
+def simplify_stage(contour_set, tolerance_px, method='dp', max_vertices=None):
+    """Simplify the whole set in one batch"""
+    simplified = contour_set.simplify(tolerance=tolerance_px, method=method, max_vertices=max_vertices)
+    log.info("Simplification (%s): %d -> %d vertices, %d/%d contours kept", method,
+             contour_set.n_vertices, simplified.n_vertices, len(simplified), len(contour_set))
+    return simplified
+
+
+def undistort_points_stage(contour_set, camera_matrix, dist_coeffs, image_size, calibration_size=None):
+    """Correct lens distortion of every vertex instead of remapping the image"""
+    points = undistort_points(contour_set.points, camera_matrix, dist_coeffs, image_size, calibration_size)
+    return ContourSet(points, contour_set.offsets, closed=contour_set.closed, hierarchy=contour_set.hierarchy,
+                      layer=contour_set.layer, dtype=contour_set.points.dtype)
+
+
+def register_stage(image, marker_positions, camera_matrix=None, dist_coeffs=None, calibration_size=None,
+                   downscale=1.0, settings=FIDUCIAL_SETTINGS):
+    """Table registration from fiducials on the raw image; {} when it fails"""
+    return register_table(image, marker_positions, camera_matrix, dist_coeffs, calibration_size,
+                          downscale, settings=settings) or {}
+
+
+def transform_stage(contour_set, matrix, table_size=None):
+    """Transform every vertex to table inches, clip to the table and drop degenerate contours"""
+    table_set = contour_set.transform(matrix)
+
+    # Debug: log points for first few contours
+    if log.isEnabledFor(logging.DEBUG):
+        for i in range(min(3, len(contour_set))):
+            log.debug("Contour %d: %d points after simplification", i, contour_set.counts[i])
+            for j, ((orig_x, orig_y), (scaled_x, scaled_y)) in enumerate(
+                    zip(contour_set.contour(i)[:3], table_set.contour(i)[:3])):
+                log.debug("  Point %d: original (%.2f, %.2f) -> scaled (%.2f, %.2f)",
+                          j, orig_x, orig_y, scaled_x, scaled_y)
+
+    # Drop points outside the boundary box, then contours left with too few points
+    if table_size is not None:
+        table_set = table_set.clip(0.0, 0.0, table_size[0], table_size[1])
+    return table_set.drop_degenerate()
+
+
+def table_boundary(table_size):
+    """Closed ContourSet for the table outline from (0,0) to (width,height)"""
+    table_width, table_height = float(table_size[0]), float(table_size[1])
+    return ContourSet.from_contours([np.array([
+        (0.0, 0.0),                    # Bottom left
+        (table_width, 0.0),            # Bottom right
+        (table_width, table_height),   # Top right
+        (0.0, table_height),           # Top left
+    ])])
+
+
+def write_stage(table_set, table_size=None):
+    """Build the DXF document; returns (doc, valid_contours)"""
+    # ezdxf takes a large share of start-up time; load it with the first export
+    import ezdxf
+
+    # Create new DXF document with inches as units
+    doc = ezdxf.new(setup=True)
+    # Set DXF units to inches
+    doc.header['$INSUNITS'] = 1      # 1 = Inches
+    doc.header['$LUNITS'] = 2        # 2 = Decimal
+    doc.header['$MEASUREMENT'] = 1   # 1 = English (inches)
+    msp = doc.modelspace()
+
+    # Add table boundary box if enabled
+    if table_size is not None:
+        msp.add_lwpolyline(table_boundary(table_size).points, close=True)
+
+    valid_contours = 0
+    for k in range(len(table_set)):
+        points = table_set.contour(k)
+        try:
+            msp.add_lwpolyline(points, close=bool(table_set.closed[k]),
+                               dxfattribs={'layer': table_set.layer[k]})
+            valid_contours += 1
+            log.debug("Added polyline %d with %d points", valid_contours, len(points))
+        except Exception as e:
+            log.warning("Failed to add polyline: %s", e)
+
+    log.info("Valid contours processed: %d", valid_contours)
+    return doc, valid_contours
+
+
+def render_debug_contours(image, contour_set, matrix, reference=None, table_size=None, scale=1.0):
+    """Draw reference point, table boundary and simplified contours on the working image"""
+    debug_contours = image.copy()
+
+    if reference is not None:
+        (ref_x, ref_y), (ref_table_x, ref_table_y) = reference
+        debug_ref = (int(ref_x * scale), int(ref_y * scale))
+        cv2.circle(debug_contours, debug_ref, 5, (0, 0, 255), -1)
+        cv2.putText(debug_contours, f"Ref: ({ref_table_x:.1f}, {ref_table_y:.1f})",
+                    (debug_ref[0] + 10, debug_ref[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+
+    if table_size is not None:
+        # Map the table outline back to image space with the inverse transform
+        debug_boundary = table_boundary(table_size).transform(np.linalg.inv(matrix))
+        cv2.polylines(debug_contours, debug_boundary.to_cv_contours(), True, (255, 0, 0), 2)
+
+    contours = contour_set.to_cv_contours()
+    cv2.polylines(debug_contours, [c for c, closed in zip(contours, contour_set.closed) if closed],
+                  True, (0, 255, 0), 1)
+    cv2.polylines(debug_contours, [c for c, closed in zip(contours, contour_set.closed) if not closed],
+                  False, (0, 255, 0), 1)
+    return debug_contours
+
+
+class ExportResult:
+    """Outputs of one pipeline run plus per-stage timings"""
+
+    def __init__(self):
+        self.doc = None
+        self.valid_contours = 0
+        self.image = None
+        self.contour_set = None
+        self.table_set = None
+        self.registration = None
+        self.scale = 1.0
+        self.timings = OrderedDict()
+        self.cached = OrderedDict()
+
+
+class ExportPipeline:
+    """
+    Image-to-DXF export split into explicit, individually cached stages
+    Each stage is keyed by its input's key plus only the parameters it reads,
+    so changing e.g. dxf_rotation reruns transform and write only. The write
+    stage is never cached: its ezdxf Document is mutable and callers own it.
+    """
+
+    def __init__(self, cache=None, maps=None):
+        self.cache = cache if cache is not None else StageCache()
+        # Remap tables are shared with the preview unless the caller brings its own UndistortMapCache
+        self.maps = maps if maps is not None else undistort_maps
+
+    def _run_stage(self, result, name, parent_key, params, func, *inputs, cache=True):
+        """
+        Return (key, output) of a stage, computing and caching it on a miss
+        cache: False always recomputes the stage and keeps its output out of the cache
+        """
+        key = stage_key(name, parent_key, params)
+        start = time.perf_counter()
+        with tracer.span(name) as span:
+            output = self.cache.get(key) if cache else None
+            result.cached[name] = output is not None
+            span.set(cached=output is not None)
+            if output is None and cache:
+                output = _freeze(func(*inputs, **params))
+                self.cache.put(key, output)
+            elif output is None:
+                output = func(*inputs, **params)
+        result.timings[name] = time.perf_counter() - start
+        return key, output
+
+    def run(self, params, downscale=1.0, until='write'):
+        """
+        Run the export for a dict of parameters (see CNCVisionApp.get_export_params)
+        downscale: read the image at this fraction of its size for a fast coarse pass
+        until: name of the last stage to run; 'simplify' also corrects vertices in 'points' mode
+        Returns an ExportResult
+        """
+        start = time.perf_counter()
+        with tracer.span('export', downscale=downscale, until=until):
+            result = self._run(params, downscale, until)
+        export_seconds.observe(time.perf_counter() - start, 'full' if downscale >= 1.0 else 'coarse')
+        if result.doc is not None:
+            export_contours.observe(result.valid_contours)
+            export_vertices.observe(result.table_set.n_vertices)
+        return result
+
+    def _run(self, params, downscale, until):
+        result = ExportResult()
+        debug = params.get('debug', True)
+        # Every debug artifact of this export goes to its own directory, whatever other threads save
+        run = debug_sink.new_run('export') if debug and debug_sink.enabled(1) else None
+        edge_scale = max(1.0, params['edge_scale']) if downscale >= 1.0 else 1.0
+        # Working pixels per camera pixel
+        scale = downscale * edge_scale
+        result.scale = scale
+
+        path = params['image_path']
+        stat = os.stat(path)
+        key, image = self._run_stage(result, 'load', None,
+                                     {'path': path, 'mtime': stat.st_mtime, 'size': stat.st_size,
+                                      'downscale': downscale},
+                                     load_stage)
+        load_key, raw_image = key, image
+
+        # The map cache rescales the intrinsics when the image (or a coarse
+        # pass) differs from the calibration resolution
+        calibration_size = params.get('calibration_size')
+        if calibration_size is None:
+            calibration_size = (round(image.shape[1] / downscale), round(image.shape[0] / downscale))
+        # 'points' mode detects on the raw image and corrects only the simplified
+        # vertices: no full-frame remap and no interpolation blur on the edges
+        undistort_vertices = (params.get('undistort_mode', 'image') == 'points'
+                              and params['camera_matrix'] is not None and params['dist_coeffs'] is not None)
+        if not undistort_vertices:
+            key, image = self._run_stage(result, 'undistort', key,
+                                         {'camera_matrix': params['camera_matrix'],
+                                          'dist_coeffs': params['dist_coeffs'],
+                                          'calibration_size': tuple(calibration_size),
+                                          'camera': params.get('camera', 'default')},
+                                         undistort_stage, image, self.maps)
+
+        log.info("DXF export: inches_per_pixel %.6f, image %dx%d pixels",
+                 params['inches_per_pixel'], image.shape[1], image.shape[0])
+        # Camera image size; contours are in working pixels (camera pixels * scale)
+        img_width, img_height = image.shape[1] / downscale, image.shape[0] / downscale
+
+        key, image = self._run_stage(result, 'normalize', key, {'edge_scale': edge_scale},
+                                     normalize_stage, image)
+        result.image = image
+
+        # Only the parameters of the active detection mode are part of the key
+        detect_params = {'background_edges': params['background_edges'],
+                         'debug': debug and debug_sink.enabled(1)}
+        if params['target_color'] is not None:
+            detect_params.update(target_color=np.asarray(params['target_color']),
+                                 tolerance_h=params['color_tolerance_h'],
+                                 tolerance_s=params['color_tolerance_s'],
+                                 tolerance_v=params['color_tolerance_v'])
+        else:
+            detect_params.update(canny_low=params['canny_low'], canny_high=params['canny_high'])
+        key, (_, thresh) = self._run_stage(result, 'detect', key, detect_params, detect_stage, image, run)
+
+        # Centerline linking only applies to Canny edge maps; color masks are filled regions
+        vectorizer = params['vectorizer'] if params['target_color'] is None else 'contours'
+        contour_params = {'vectorizer': vectorizer}
+        if vectorizer == 'centerline':
+            contour_params.update(link_gap=DXF_SETTINGS['edge_link_gap'],
+                                  min_length=DXF_SETTINGS['min_polyline_length'])
+        else:
+            contour_params.update(min_area=DXF_SETTINGS['min_contour_area'])
+        key, contour_set = self._run_stage(result, 'contours', key, contour_params,
+                                           contours_stage, thresh)
+
+        # Tolerance is in inches; one working pixel is smaller when edge_scale > 1
+        key, contour_set = self._run_stage(
+            result, 'simplify', key,
+            {'tolerance_px': params['simplify_tolerance'] / (params['inches_per_pixel'] / scale),
+             'method': params['simplify_method'],
+             'max_vertices': params['max_vertices']},
+            simplify_stage, contour_set)
+        raw_contour_set = contour_set
+        if undistort_vertices:
+            key, contour_set = self._run_stage(
+                result, 'undistort_points', key,
+                {'camera_matrix': params['camera_matrix'],
+                 'dist_coeffs': params['dist_coeffs'],
+                 'image_size': (img_width * scale, img_height * scale),
+                 'calibration_size': tuple(calibration_size)},
+                undistort_points_stage, contour_set)
+        result.contour_set = contour_set
+        if until == 'simplify':
+            return self._finish(result)
+
+        # Fiducials seen on this capture fix the table transform directly; without
+        # them (or when they fail) fall back to the manual calibration
+        registration = None
+        if params.get('fiducial_markers'):
+            _, registration = self._run_stage(result, 'register', load_key,
+                                              {'marker_positions': params['fiducial_markers'],
+                                               'camera_matrix': params['camera_matrix'],
+                                               'dist_coeffs': params['dist_coeffs'],
+                                               'calibration_size': tuple(calibration_size),
+                                               'downscale': downscale,
+                                               'settings': FIDUCIAL_SETTINGS},
+                                              register_stage, raw_image)
+        result.registration = registration or None
+
+        reference = params['reference']
+        if registration:
+            # The registration maps camera pixels; contours are in working pixels
+            matrix = registration['matrix'] @ np.diag([1.0 / scale, 1.0 / scale, 1.0])
+            reference = None
+        else:
+            # Working pixels -> table inches: scale, flip Y, rotate about the centre, then
+            # shift so the reference point lands on its table coordinates
+            matrix = table_transform((img_width, img_height), params['inches_per_pixel'],
+                                     params['dxf_rotation'], reference, scale)
+        key, table_set = self._run_stage(result, 'transform', key,
+                                         {'matrix': matrix, 'table_size': params['table_size']},
+                                         transform_stage, contour_set)
+        result.table_set = table_set
+
+        if debug and not result.cached['transform'] and debug_sink.enabled(1):
+            # Save debug image with contours; in 'points' mode the working image is
+            # still distorted, so draw the vertices before correction
+            debug_sink.save("debug_contours", render_debug_contours(
+                image, raw_contour_set, matrix, reference, params['table_size'], scale), run=run)
+
+        # A fresh Document on every run, so edits to one result never reach another
+        key, (doc, valid_contours) = self._run_stage(result, 'write', key,
+                                                     {'table_size': params['table_size']},
+                                                     write_stage, table_set, cache=False)
+        result.doc, result.valid_contours = doc, valid_contours
+        return self._finish(result)
+
+    def _finish(self, result):
+        """Report stage timings and return the result"""
+        if log.isEnabledFor(logging.INFO):
+            log.info("Export stages: %s", ", ".join(
+                f"{name} {t * 1000:.1f} ms{' (cached)' if result.cached[name] else ''}"
+                for name, t in result.timings.items()))
+        return result
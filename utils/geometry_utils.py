@@ -0,0 +1,350 @@
+import cv2
+import numpy as np
+
+SIMPLIFY_METHODS = ('dp', 'vw')
+
+
+def pack_contours(contours):
+    """
+    Pack a list of OpenCV contours into one vertex array plus offsets
+    Contour k occupies points[offsets[k]:offsets[k + 1]]
+    """
+    counts = np.array([len(c) for c in contours], dtype=np.int64)
+    offsets = np.zeros(len(contours) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    if len(contours) == 0:
+        return np.zeros((0, 2), dtype=np.float64), offsets
+    points = np.concatenate([np.asarray(c, dtype=np.float64).reshape(-1, 2) for c in contours])
+    return points, offsets
+
+
+def unpack_contours(points, offsets, dtype=np.int32):
+    """Split packed points back into a list of OpenCV-style (N, 1, 2) contours"""
+    points = np.asarray(points)
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        points = np.rint(points)
+    points = points.astype(dtype, copy=False)
+    return [points[offsets[k]:offsets[k + 1]].reshape(-1, 1, 2) for k in range(len(offsets) - 1)]
+
+
+def contour_ids(offsets):
+    """Index of the owning contour for every packed vertex"""
+    counts = np.diff(offsets)
+    return np.repeat(np.arange(len(counts)), counts)
+
+
+def _closed_flags(closed, count):
+    """Broadcast a bool or per-contour sequence of bools to an array"""
+    closed = np.asarray(closed, dtype=bool)
+    if closed.ndim == 0:
+        closed = np.full(count, bool(closed))
+    return closed
+
+
+def _first_argmax(values, ids, firsts):
+    """Per-group maximum and the flat index of its first occurrence"""
+    group_max = np.maximum.reduceat(values, firsts)
+    hits = np.flatnonzero(values == group_max[ids])
+    _, first = np.unique(ids[hits], return_index=True)
+    return group_max, hits[first]
+
+
+def _ring_layout(points, offsets, closed):
+    """
+    Lay every contour out as independent chains on an extended vertex array
+    Open polylines are one chain between their end points. Closed rings are
+    split at the first vertex and the vertex farthest from it, and the first
+    vertex is repeated after the last one so both halves are contiguous.
+    Returns (ext_points, ext_to_orig, is_copy, chain_start, chain_end,
+    anchors) where anchors are extended indices that are always kept.
+    """
+    counts = np.diff(offsets)
+    ring = closed & (counts > 2)
+    ext_counts = counts + ring
+    ext_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(ext_counts, out=ext_offsets[1:])
+
+    ids = np.repeat(np.arange(len(counts)), ext_counts)
+    local = np.arange(ext_offsets[-1]) - ext_offsets[:-1][ids]
+    is_copy = local == counts[ids]
+    ext_to_orig = np.where(is_copy, offsets[:-1][ids], offsets[:-1][ids] + local)
+    ext_points = points[ext_to_orig]
+
+    nonempty = np.flatnonzero(counts > 0)
+    first = ext_offsets[:-1][nonempty]
+    last = ext_offsets[1:][nonempty] - 1
+
+    # Farthest vertex from the first one splits each ring into two chains
+    rings = np.flatnonzero(ring)
+    far = np.zeros(0, dtype=np.int64)
+    if len(rings):
+        delta = ext_points - ext_points[ext_offsets[:-1][ids]]
+        dist = np.einsum('ij,ij->i', delta, delta)
+        dist[is_copy] = -1.0
+        _, far_all = _first_argmax(dist, ids, ext_offsets[:-1][counts > 0])
+        far = far_all[np.searchsorted(nonempty, rings)]
+
+    ring_mask = ring[nonempty]
+    chain_start = np.concatenate([first[~ring_mask], first[ring_mask], far])
+    chain_end = np.concatenate([last[~ring_mask], far, last[ring_mask]])
+    anchors = np.concatenate([first, last, far])
+    return ext_points, ext_to_orig, is_copy, chain_start, chain_end, anchors
+
+
+def _scatter_back(ext_values, ext_to_orig, is_copy, size):
+    """Copy per-vertex values from the extended layout back to packed order"""
+    values = np.zeros(size, dtype=np.float64)
+    values[ext_to_orig[~is_copy]] = ext_values[~is_copy]
+    return values
+
+
+def douglas_peucker_importance(points, offsets, closed=True, tolerance=0.0):
+    """
+    Douglas-Peucker significance of every vertex of every contour at once
+    A vertex survives simplification at tolerance t iff importance >= t and
+    anchor vertices are +inf. All chains are split level by level in one
+    vectorised pass instead of one recursive call per contour.
+    tolerance: chains deviating less than this are not split further and
+    their vertices get importance 0; importances are exact for every
+    threshold >= tolerance, which is all a vertex budget ever asks for
+    """
+    points = np.asarray(points, dtype=np.float64)
+    closed = _closed_flags(closed, len(offsets) - 1)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    ext_points, ext_to_orig, is_copy, seg_start, seg_end, anchors = _ring_layout(points, offsets, closed)
+    importance = np.zeros(len(ext_points), dtype=np.float64)
+    importance[anchors] = np.inf
+    parent = np.full(len(seg_start), np.inf)
+
+    while len(seg_start):
+        keep = seg_end - seg_start > 1
+        seg_start, seg_end, parent = seg_start[keep], seg_end[keep], parent[keep]
+        if not len(seg_start):
+            break
+
+        # Flat list of every interior vertex of every active segment
+        lengths = seg_end - seg_start - 1
+        seg_ids = np.repeat(np.arange(len(lengths)), lengths)
+        firsts = np.cumsum(lengths) - lengths
+        idx = seg_start[seg_ids] + 1 + (np.arange(int(lengths.sum())) - firsts[seg_ids])
+
+        # Perpendicular distance to the chord, point distance for degenerate chords
+        a = ext_points[seg_start][seg_ids]
+        ab = ext_points[seg_end][seg_ids] - a
+        ap = ext_points[idx] - a
+        norm = np.hypot(ab[:, 0], ab[:, 1])
+        cross = np.abs(ab[:, 0] * ap[:, 1] - ab[:, 1] * ap[:, 0])
+        dist = np.where(norm > 0, cross / np.where(norm > 0, norm, 1.0), np.hypot(ap[:, 0], ap[:, 1]))
+
+        seg_max, split_pos = _first_argmax(dist, seg_ids, firsts)
+        significant = seg_max >= tolerance
+        if not significant.all():
+            seg_start, seg_end, parent = seg_start[significant], seg_end[significant], parent[significant]
+            seg_max, split_pos = seg_max[significant], split_pos[significant]
+        split = idx[split_pos]
+
+        # Clamp to the parent so importance never increases down the tree
+        value = np.minimum(seg_max, parent)
+        importance[split] = value
+
+        seg_start = np.concatenate([seg_start, split])
+        seg_end = np.concatenate([split, seg_end])
+        parent = np.concatenate([value, value])
+
+    return _scatter_back(importance, ext_to_orig, is_copy, len(points))
+
+
+def visvalingam_importance(points, offsets, closed=True):
+    """
+    Visvalingam-Whyatt effective area of every vertex of every contour at once
+    Each round removes, across all contours simultaneously, every vertex whose
+    triangle area is a local minimum among its live neighbours. Importance is
+    kept monotone per contour so thresholding matches sequential elimination.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    closed = _closed_flags(closed, len(offsets) - 1)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    ext_points, ext_to_orig, is_copy, chain_start, chain_end, anchors = _ring_layout(points, offsets, closed)
+    size = len(ext_points)
+    importance = np.zeros(size, dtype=np.float64)
+    importance[anchors] = np.inf
+
+    # Doubly linked list over each chain; chain ends point at themselves
+    prev_idx = np.arange(size) - 1
+    next_idx = np.arange(size) + 1
+    chain_id = np.full(size, -1, dtype=np.int64)
+    lengths = chain_end - chain_start + 1
+    members = np.repeat(chain_start, lengths) + (np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+    chain_id[members] = np.repeat(np.arange(len(chain_start)), lengths)
+    prev_idx[chain_start] = chain_start
+    next_idx[chain_end] = chain_end
+    floor = np.zeros(len(chain_start), dtype=np.float64)
+
+    live = np.zeros(size, dtype=bool)
+    live[members] = True
+    live[anchors] = False
+    candidates = np.flatnonzero(live)
+
+    area = np.full(size, np.inf)
+    while len(candidates):
+        a = ext_points[prev_idx[candidates]]
+        b = ext_points[candidates]
+        c = ext_points[next_idx[candidates]]
+        area[candidates] = 0.5 * np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) -
+                                        (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1]))
+
+        # Strict (area, index) ordering guarantees no two neighbours go together
+        def less(i, j):
+            return (area[i] < area[j]) | ((area[i] == area[j]) & (i < j))
+
+        p, n = prev_idx[candidates], next_idx[candidates]
+        minimum = (less(candidates, p) | ~live[p]) & (less(candidates, n) | ~live[n])
+        removed = candidates[minimum]
+
+        chains = chain_id[removed]
+        importance[removed] = np.maximum(area[removed], floor[chains])
+        np.maximum.at(floor, chains, importance[removed])
+
+        # Unlink removed vertices; neighbours are never removed in the same round
+        next_idx[prev_idx[removed]] = next_idx[removed]
+        prev_idx[next_idx[removed]] = prev_idx[removed]
+        live[removed] = False
+        area[removed] = np.inf
+        candidates = candidates[~minimum]
+
+    return _scatter_back(importance, ext_to_orig, is_copy, len(points))
+
+
+def table_transform(image_size, inches_per_pixel, rotation_degrees=0.0, reference=None, scale=1.0):
+    """
+    3x3 matrix mapping working-image pixels to CNC table inches
+    image_size: (width, height) of the camera image in pixels
+    inches_per_pixel: camera pixel size in inches
+    rotation_degrees: rotation about the image centre
+    reference: optional ((ref_x, ref_y), (table_x, table_y)) pairing a camera
+    pixel with its table position
+    scale: working-image pixels per camera pixel (edge_scale)
+    The Y axis is flipped so the table origin is bottom-left.
+    """
+    width, height = image_size
+    ipp = inches_per_pixel
+
+    # Pixels -> inches with Y flipped
+    to_inches = np.array([[ipp / scale, 0.0, 0.0],
+                          [0.0, -ipp / scale, height * ipp],
+                          [0.0, 0.0, 1.0]])
+
+    # Rotate about the image centre
+    cx, cy = width * ipp / 2, height * ipp / 2
+    angle = np.radians(rotation_degrees)
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    rotate = np.array([[cos_a, -sin_a, cx - cx * cos_a + cy * sin_a],
+                       [sin_a, cos_a, cy - cx * sin_a - cy * cos_a],
+                       [0.0, 0.0, 1.0]])
+
+    matrix = rotate @ to_inches
+    if reference is not None:
+        (ref_x, ref_y), (table_x, table_y) = reference
+        matrix[0, 2] += table_x - ref_x * ipp
+        matrix[1, 2] += table_y - (height - ref_y) * ipp
+    return matrix
+
+
+def select_vertices(importance, offsets, threshold, max_vertices=None):
+    """
+    Choose which vertices to keep for an importance threshold and vertex budget
+    If the threshold keeps more than max_vertices in total the threshold is
+    raised globally until the budget fits. If the anchors alone exceed the
+    budget, the least significant contours are dropped entirely.
+    Returns (keep_mask, contour_mask).
+    """
+    n_contours = len(offsets) - 1
+    keep = importance >= threshold
+    contour_mask = np.ones(n_contours, dtype=bool)
+    if max_vertices is None or int(keep.sum()) <= max_vertices:
+        return keep, contour_mask
+
+    ids = contour_ids(offsets)
+    anchor = np.isinf(importance)
+    anchor_counts = np.bincount(ids[anchor], minlength=n_contours)
+
+    if anchor_counts.sum() > max_vertices:
+        # Rank contours by their largest finite importance (their overall size)
+        finite = np.where(anchor, 0.0, importance)
+        significance = np.zeros(n_contours)
+        np.maximum.at(significance, ids, finite)
+        order = np.argsort(-significance, kind='stable')
+        fits = np.cumsum(anchor_counts[order]) <= max_vertices
+        contour_mask[:] = False
+        contour_mask[order[fits]] = True
+        return anchor & contour_mask[ids], contour_mask
+
+    # Keep the highest finite importances that fit next to the anchors
+    room = max_vertices - int(anchor_counts.sum())
+    finite_idx = np.flatnonzero(keep & ~anchor)
+    if room <= 0:
+        return anchor.copy(), contour_mask
+    best = finite_idx[np.argpartition(-importance[finite_idx], room - 1)[:room]]
+    keep = anchor.copy()
+    keep[best] = True
+    return keep, contour_mask
+
+
+def _approx_poly_dp(points, offsets, tolerance, closed):
+    """
+    cv2.approxPolyDP of every packed contour; returns (points, offsets)
+    Only for whole-pixel coordinates (approxPolyDP would round anything
+    else to int32 or float32); returns None for other points.
+    """
+    pixels = points.astype(np.int32)
+    if not np.array_equal(pixels, points):
+        return None
+    closed = _closed_flags(closed, len(offsets) - 1)
+    pieces = [cv2.approxPolyDP(pixels[start:end], tolerance, bool(ring)).reshape(-1, 2)
+              for start, end, ring in zip(offsets[:-1].tolist(), offsets[1:].tolist(), closed.tolist())
+              if end > start]
+    counts = np.zeros(len(offsets) - 1, dtype=np.int64)
+    counts[np.diff(offsets) > 0] = [len(piece) for piece in pieces]
+    new_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    simplified = np.concatenate(pieces) if pieces else pixels[:0]
+    return simplified.astype(points.dtype), new_offsets
+
+
+def simplify_packed(points, offsets, tolerance, method='dp', max_vertices=None, closed=True):
+    """
+    Simplify packed contours in one batch
+    tolerance: maximum deviation in the same units as points (for 'vw' the
+    area threshold is tolerance squared)
+    Returns (points, offsets, contour_mask) for the simplified set, where
+    contour_mask marks which input contours survived the vertex budget.
+    Pixel contours under 'dp' go through approxPolyDP; vertex importances
+    are only computed when the result exceeds max_vertices.
+    """
+    if method not in SIMPLIFY_METHODS:
+        raise ValueError(f"Unknown simplification method: {method}")
+
+    points = np.asarray(points)
+    if method == 'dp':
+        fast = _approx_poly_dp(points, offsets, tolerance, closed)
+        if fast is not None and (max_vertices is None or fast[1][-1] <= max_vertices):
+            return fast[0], fast[1], np.ones(len(offsets) - 1, dtype=bool)
+
+        importance = douglas_peucker_importance(points, offsets, closed, tolerance)
+        threshold = tolerance
+    else:
+        importance = visvalingam_importance(points, offsets, closed)
+        threshold = tolerance * tolerance
+
+    keep, contour_mask = select_vertices(importance, offsets, threshold, max_vertices)
+
+    ids = contour_ids(offsets)
+    keep &= contour_mask[ids]
+    counts = np.bincount(ids[keep], minlength=len(offsets) - 1)[contour_mask]
+    new_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    return points[keep], new_offsets, contour_mask
@@ -1,6 +1,12 @@
 import cv2
+import functools
+import logging
 import numpy as np
 
+from utils.debug_utils import debug_sink
+
+log = logging.getLogger(__name__)
+
 def simplify_contour(contour, tolerance=0.1):
     """
     Simplify contour while preserving maximum detail
@@ -23,9 +29,11 @@ def normalize_image_safe(image):
     image_normalized = (255 * (image_float - current_min) / (current_max - current_min))
     return image_normalized.clip(0, 255).astype(np.uint8)
 
-def color_based_edge_detection(image, target_color, tolerance_h=30, tolerance_s=50, tolerance_v=50, debug=False):
+def color_based_edge_detection(image, target_color, tolerance_h=30, tolerance_s=50, tolerance_v=50, debug=False,
+                               run=None):
     """
     Combined version with both numeric safety and previous improvements
+    run: debug_sink run directory for the debug images
     """
     try:
         # Normalize the image to match the target color range
@@ -79,18 +87,105 @@ def color_based_edge_detection(image, target_color, tolerance_h=30, tolerance_s=
         edges = cv2.Canny(mask, 50, 150)
         edges = cv2.dilate(edges, kernel, iterations=1)
         
-        if debug:
+        if debug and debug_sink.enabled(2):
             # Save debug images
-            cv2.imwrite('normalized_input_debug.png', image_normalized)
-            cv2.imwrite('mask_debug.png', mask)
+            debug_sink.save('normalized_input_debug', image_normalized, level=2, run=run)
+            debug_sink.save('mask_debug', mask, level=2, run=run)
             debug_vis = image.copy()
             debug_vis[mask > 0] = [0, 255, 0]
-            cv2.imwrite('color_detection_debug.png', debug_vis)
+            debug_sink.save('color_detection_debug', debug_vis, level=2, run=run)
         
         return edges, mask
         
     except Exception as e:
-        if debug:
-            print(f"Error in color detection: {str(e)}")
+        log.error("Error in color detection: %s", e)
         h, w = image.shape[:2]
-        return np.zeros((h, w), dtype=np.uint8), np.zeros((h, w), dtype=np.uint8) 
\ No newline at end of file
+        return np.zeros((h, w), dtype=np.uint8), np.zeros((h, w), dtype=np.uint8) 
+
+def preview_detection(frame, frame_resized, params, edge_scale=None, detect_scale=1.0):
+    """
+    Edge map (and color mask, or None) for the live preview, at preview size
+    frame: full camera frame; frame_resized: the same frame at preview size (BGR)
+    params: PipelineParams snapshot (edge/color settings, edge_scale)
+    edge_scale: overrides params.edge_scale (the preview governor caps it)
+    detect_scale: when edge_scale <= 1, detect on the preview shrunk by this factor
+    """
+    h, w = frame.shape[:2]
+    preview_height, preview_width = frame_resized.shape[:2]
+    edge_scale = params.edge_scale if edge_scale is None else edge_scale
+    # Detection runs on the preview, or on the upscaled full frame when edge_scale > 1
+    if edge_scale > 1.0:
+        source = cv2.resize(frame, (int(w * edge_scale), int(h * edge_scale)))
+    elif detect_scale < 1.0:
+        source = cv2.resize(frame_resized, (max(1, int(preview_width * detect_scale)),
+                                            max(1, int(preview_height * detect_scale))),
+                            interpolation=cv2.INTER_AREA)
+    else:
+        source = frame_resized
+
+    if params.color_mode and params.target_color is not None:
+        edges, mask = color_based_edge_detection(
+            source,
+            np.array(params.target_color, dtype=np.uint8),
+            tolerance_h=params.color_tolerance_h,
+            tolerance_s=params.color_tolerance_s,
+            tolerance_v=params.color_tolerance_v,
+            debug=False
+        )
+    else:
+        gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        edges = cv2.Canny(blurred, params.canny_low, params.canny_high)
+        mask = None
+
+    if source is not frame_resized:
+        # Bring the edges to preview size (area-averaged down, or nearest up from a reduced detection)
+        interpolation = cv2.INTER_AREA if edge_scale > 1.0 else cv2.INTER_NEAREST
+        edges = cv2.resize(edges, (preview_width, preview_height), interpolation=interpolation)
+        if mask is not None:
+            mask = cv2.resize(mask, (preview_width, preview_height), interpolation=interpolation)
+    return edges, mask
+
+
+@functools.lru_cache(maxsize=4)
+def _solid_image(shape, color):
+    """Read-only image of one color, shared between calls"""
+    image = np.empty(shape, dtype=np.uint8)
+    image[:] = color
+    image.flags.writeable = False
+    return image
+
+
+# Added to the red channel under the color mask (a 30% red wash)
+MASK_TINT = 77
+
+
+def compose_preview(base, edges, mask, edge_color, rgb=False, out=None):
+    """
+    Draw edges in edge_color and wash the color mask red over a preview image
+    base: preview image (BGR, or RGB when rgb is set); left unchanged
+    edge_color: BGR color of the edges
+    out: preallocated array of base's shape to compose into
+    Returns out: base copied once, then only the masked pixels are written.
+    """
+    if out is None:
+        out = np.empty_like(base)
+    np.copyto(out, base)
+    color = tuple(int(c) for c in (edge_color[::-1] if rgb else edge_color))
+    # A masked copy from a solid image is far faster than numpy boolean indexing
+    cv2.copyTo(_solid_image(base.shape, color), edges, out)
+    if mask is not None:
+        tint = (MASK_TINT, 0, 0, 0) if rgb else (0, 0, MASK_TINT, 0)
+        cv2.add(out, tint, dst=out, mask=mask)
+    return out
+
+
+def preview_edges(frame, frame_resized, params):
+    """
+    Edge visualisation for the live preview
+    frame: full camera frame; frame_resized: the same frame at preview size
+    params: PipelineParams snapshot (edge/color settings, edge_scale)
+    Returns a BGR image at preview size with the edges (and color mask) drawn in.
+    """
+    edges, mask = preview_detection(frame, frame_resized, params)
+    return compose_preview(frame_resized, edges, mask, params.edge_color)
\ No newline at end of file
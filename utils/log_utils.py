@@ -0,0 +1,89 @@
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+from config import LOG_SETTINGS
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per message template
+    Each (logger, format string) pair may log `burst` records at once and
+    `rate` records per second after that; the rest are dropped and counted.
+    The next record that gets through reports how many were suppressed.
+    """
+
+    def __init__(self, rate=LOG_SETTINGS['rate_limit'], burst=LOG_SETTINGS['rate_burst']):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1.0, now, 0)
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def setup_logging(level=LOG_SETTINGS['level'], module_levels=LOG_SETTINGS['module_levels']):
+    """
+    Configure application logging once at startup
+    Records are rate limited and queued on the calling thread; a background
+    listener formats and writes them, so logging never blocks on console I/O.
+    level: root level name, e.g. 'WARNING'
+    module_levels: {logger name: level name} overrides, e.g. {'utils.export_pipeline': 'DEBUG'}
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    handler = DroppingQueueHandler(queue.Queue(LOG_SETTINGS['queue_size']))
+    handler.addFilter(RateLimitFilter())
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
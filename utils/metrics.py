@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_SETTINGS
+
+log = logging.getLogger(__name__)
+
+# Bucket upper bounds (the +Inf bucket is implicit)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+PIXEL_ERROR_BUCKETS = (0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+    return '{' + ','.join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    """Named metric with one value per combination of label values"""
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _check(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) for the text format"""
+        raise NotImplementedError
+
+    def snapshot(self):
+        """JSON-serialisable values, keyed by comma-joined label values"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+    kind = 'counter'
+
+    def inc(self, amount=1, *labels):
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [('', labels, (), value) for labels, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return {','.join(map(str, k)): v for k, v in self._values.items()}
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. the last calibration error"""
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = value
+
+    samples = Counter.samples
+    snapshot = Counter.snapshot
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets, plus their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        self._check(labels)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for labels, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += n
+                    result.append(('_bucket', labels, (('le', _format_value(bound)),), cumulative))
+                result.append(('_sum', labels, (), total))
+                result.append(('_count', labels, (), count))
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {','.join(map(str, k)): {'count': count, 'sum': total,
+                                            'mean': total / count if count else None,
+                                            'buckets': dict(zip(map(_format_value, self.buckets + (float('inf'),)),
+                                                                counts))}
+                    for k, (counts, total, count) in self._values.items()}
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms of the station
+    Updates take one uncontended lock, so they are cheap enough for the
+    preview loop. render() gives the Prometheus text format; snapshot() a
+    dict for the JSON file. Both read the values under the same locks.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self.started = time.time()
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, buckets, labelnames=()):
+        return self._add(Histogram(name, help_text, buckets, labelnames))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, extra, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_label_text(metric.labelnames, labels, extra)} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, station=None):
+        """All metrics as a JSON-serialisable dict; histogram buckets hold per-bucket, not cumulative, counts"""
+        return {
+            'station': station or METRICS_SETTINGS['station'] or platform.node(),
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'uptime_s': round(time.time() - self.started, 1),
+            'metrics': {name: {'type': m.kind, 'labels': list(m.labelnames), 'values': m.snapshot()}
+                        for name, m in self._metrics.items()},
+        }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug("Metrics request from %s: " + format, self.client_address[0], *args)
+
+
+class MetricsExporter:
+    """
+    Optional outputs of a registry: an HTTP endpoint serving /metrics for
+    Prometheus, and a JSON snapshot file rewritten every interval. Both run
+    on daemon threads and read the registry only when asked.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._server = None
+        self._snapshot_stop = threading.Event()
+        self._snapshot_thread = None
+
+    def serve(self, port=METRICS_SETTINGS['port'], host=METRICS_SETTINGS['host']):
+        """Start serving http://host:port/metrics; returns the bound (host, port)"""
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        address = self._server.server_address[:2]
+        log.info("Serving metrics on http://%s:%d/metrics", *address)
+        return address
+
+    def write_snapshot(self, path):
+        """Write the registry snapshot to path atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.registry.snapshot(), f, indent=1)
+        os.replace(temporary, path)
+
+    def start_snapshots(self, path, interval=METRICS_SETTINGS['snapshot_interval_s']):
+        """Rewrite the snapshot file every interval seconds, and once more on stop()"""
+        def loop():
+            while not self._snapshot_stop.wait(interval):
+                self._write_logged(path)
+            self._write_logged(path)
+
+        self._snapshot_thread = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+        self._snapshot_thread.start()
+        log.info("Writing metrics snapshots to %s every %g s", path, interval)
+
+    def _write_logged(self, path):
+        try:
+            self.write_snapshot(path)
+        except OSError as e:
+            log.warning("Could not write metrics snapshot %s: %s", path, e)
+
+    def stop(self):
+        """Stop the endpoint and write a final snapshot"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._snapshot_thread is not None:
+            self._snapshot_stop.set()
+            self._snapshot_thread.join(timeout=5.0)
+            self._snapshot_thread = None
+
+
+# Shared by the GUI, the export pipeline and the calibration code
+metrics = MetricsRegistry()
+exporter = MetricsExporter(metrics)
+
+frames_captured = metrics.counter('cnc_frames_captured_total', "Frames read from the camera by the preview")
+frames_dropped = metrics.counter('cnc_frames_dropped_total',
+                                 "Preview renders discarded because a newer one was already queued")
+capture_seconds = metrics.histogram('cnc_capture_duration_seconds',
+                                    "Duration of an averaged still capture", SECONDS_BUCKETS)
+export_seconds = metrics.histogram('cnc_export_duration_seconds',
+                                   "Duration of an export pipeline run", SECONDS_BUCKETS, ('pass',))
+export_contours = metrics.histogram('cnc_export_contours', "Contours written per DXF export", COUNT_BUCKETS)
+export_vertices = metrics.histogram('cnc_export_vertices', "Vertices written per DXF export", COUNT_BUCKETS)
+dxf_bytes = metrics.counter('cnc_dxf_bytes_written_total', "Bytes of DXF files saved")
+dxf_files = metrics.histogram('cnc_dxf_file_bytes', "Size of each saved DXF file", BYTES_BUCKETS)
+calibration_error = metrics.histogram('cnc_calibration_rms_error_pixels',
+                                      "RMS reprojection error of lens calibrations", PIXEL_ERROR_BUCKETS)
+calibration_last_error = metrics.gauge('cnc_calibration_last_rms_error_pixels',
+                                       "RMS reprojection error of the latest lens calibration")
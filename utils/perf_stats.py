@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import deque
+
+from config import PERF_HUD_SETTINGS
+
+# Preview stages shown in the HUD, in pipeline order
+PREVIEW_STAGES = ('read', 'undistort', 'resize', 'edges', 'overlay', 'photoimage')
+
+
+class _NullStage:
+    """Stage timer returned while statistics are off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class PreviewStats:
+    """
+    Rolling-window statistics of the live preview pipeline
+    The capture thread reports each frame it reads and the time of every
+    stage; the Tk thread reports each frame it shows (with the capture time,
+    for latency) and the renders it skipped because a newer one was already
+    queued. Samples older than `window` seconds are discarded, so the
+    figures follow parameter changes within a couple of seconds.
+    """
+
+    def __init__(self, window=PERF_HUD_SETTINGS['window_s'], enabled=PERF_HUD_SETTINGS['visible']):
+        self.window = window
+        self.enabled = enabled
+        self.queue_depth = 0
+        self.nominal_fps = None
+        self._captured = deque()
+        self._displayed = deque()
+        self._dropped = deque()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Context manager timing one preview stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """Add one duration of a stage"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            samples = self._stages.setdefault(name, deque())
+            samples.append((now, seconds))
+            self._prune(samples, now)
+
+    def frame_captured(self):
+        """A frame was read from the camera"""
+        self._add(self._captured, 1)
+
+    def frame_displayed(self, captured_at=None):
+        """A frame was shown; captured_at is its perf_counter() read time, for latency"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._add(self._displayed, now - captured_at if captured_at is not None else None)
+
+    def frames_dropped(self, count, queue_depth):
+        """Renders discarded unseen because a newer one was queued behind them"""
+        self.queue_depth = queue_depth
+        if count:
+            self._add(self._dropped, count)
+
+    def _add(self, samples, value):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            samples.append((now, value))
+            self._prune(samples, now)
+
+    def _prune(self, samples, now):
+        while samples and now - samples[0][0] > self.window:
+            samples.popleft()
+
+    def _rate(self, samples):
+        """Events per second between the oldest and newest sample in the window"""
+        if len(samples) < 2:
+            return 0.0
+        return (len(samples) - 1) / max(samples[-1][0] - samples[0][0], 1e-6)
+
+    def snapshot(self):
+        """
+        Current figures as a dict
+        nominal_fps: frame rate the camera reports (None if unknown)
+        camera_fps, display_fps: frames per second read and shown
+        latency_ms, latency_max_ms: capture-to-display latency (mean, worst)
+        stages: {stage: mean milliseconds}; dropped: renders skipped in the window
+        """
+        now = time.perf_counter()
+        with self._lock:
+            for samples in (self._captured, self._displayed, self._dropped, *self._stages.values()):
+                self._prune(samples, now)
+            latencies = [v for _, v in self._displayed if v is not None]
+            stages = {name: sum(v for _, v in s) / len(s) * 1000 for name, s in self._stages.items() if s}
+            return {
+                'nominal_fps': self.nominal_fps,
+                'camera_fps': self._rate(self._captured),
+                'display_fps': self._rate(self._displayed),
+                'latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+                'latency_max_ms': max(latencies) * 1000 if latencies else None,
+                'stages': stages,
+                'dropped': sum(v for _, v in self._dropped),
+                'queue_depth': self.queue_depth,
+                'window_s': self.window,
+            }
+
+    def reset(self):
+        """Discard all samples"""
+        with self._lock:
+            for samples in (self._captured, self._displayed, self._dropped):
+                samples.clear()
+            self._stages.clear()
+
+
+def format_hud(snapshot, realtime_ratio=PERF_HUD_SETTINGS['realtime_ratio'], quality=""):
+    """
+    HUD text for a snapshot, and whether the preview keeps up with the camera
+    The preview is behind when it reads fewer than realtime_ratio of the
+    camera's nominal frame rate, or shows fewer than that share of the
+    frames it reads.
+    quality: description of reduced preview quality, if any
+    """
+    nominal, camera_fps, display_fps = snapshot['nominal_fps'], snapshot['camera_fps'], snapshot['display_fps']
+    realtime = display_fps >= realtime_ratio * camera_fps
+    if nominal:
+        realtime = realtime and camera_fps >= realtime_ratio * nominal
+    nominal_text = f" of {nominal:.0f}" if nominal else ""
+    latency = snapshot['latency_ms']
+    latency_text = f"{latency:.0f} ms (max {snapshot['latency_max_ms']:.0f})" if latency is not None else "-"
+    stages = snapshot['stages']
+    stage_text = "  ".join(f"{name} {stages[name]:.1f}" for name in PREVIEW_STAGES if name in stages)
+    lines = [
+        f"camera {camera_fps:5.1f}{nominal_text} fps   shown {display_fps:5.1f} fps   latency {latency_text}"
+        + ("" if realtime else "   BELOW REAL TIME"),
+        f"stages (ms): {stage_text or '-'}",
+        f"dropped {snapshot['dropped']} in {snapshot['window_s']:g} s   queue {snapshot['queue_depth']}",
+    ]
+    if quality:
+        lines.append(quality)
+    return "\n".join(lines), realtime
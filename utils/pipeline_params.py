@@ -0,0 +1,68 @@
+from dataclasses import dataclass, fields
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PipelineParams:
+    """
+    Immutable snapshot of every setting the preview and export workers read
+    The Tk thread builds a new instance whenever a traced variable changes
+    and publishes it by replacing one attribute; workers take that reference
+    once per frame or export and never touch Tk variables.
+    """
+
+    camera: str = ''
+    inches_per_pixel: float = 0.0604
+    edge_scale: float = 1.0
+
+    # Edge and color detection
+    canny_low: int = 50
+    canny_high: int = 150
+    color_mode: bool = False
+    target_color: Optional[Tuple[int, int, int]] = None  # BGR
+    color_tolerance_h: int = 15
+    color_tolerance_s: int = 100
+    color_tolerance_v: int = 100
+    edge_color: Tuple[int, int, int] = (0, 255, 0)  # BGR
+    use_background_subtraction: bool = False
+
+    # Lens correction
+    camera_matrix: Optional[np.ndarray] = None
+    dist_coeffs: Optional[np.ndarray] = None
+    calibration_size: Optional[Tuple[int, int]] = None
+    undistort_mode: str = 'image'
+
+    # Vectorisation and simplification
+    vectorizer: str = 'contours'
+    simplify_method: str = 'dp'
+    simplify_tolerance: float = 0.03
+    max_vertices: int = 200000
+    progressive_export: bool = True
+
+    # Table alignment
+    dxf_rotation: float = 0.0
+    use_reference_point: bool = True
+    reference_point: Optional[Tuple[float, float]] = None
+    reference_table_x: float = 0.0
+    reference_table_y: float = 0.0
+    use_fiducials: bool = False
+    add_table_boundary: bool = True
+    table_width: float = 144.0
+    table_height: float = 61.0
+    known_distance: float = 1.0
+
+    def __post_init__(self):
+        # Arrays are shared with the workers; make sure nobody can change them in place
+        for name in ('camera_matrix', 'dist_coeffs'):
+            value = getattr(self, name)
+            if value is not None:
+                value = np.array(value, dtype=np.float64)
+                value.flags.writeable = False
+                object.__setattr__(self, name, value)
+
+    @classmethod
+    def field_names(cls):
+        """Names of all parameters"""
+        return [f.name for f in fields(cls)]
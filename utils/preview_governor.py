@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+
+from config import PREVIEW_GOVERNOR_SETTINGS
+
+log = logging.getLogger(__name__)
+
+
+class QualityLevel:
+    """
+    One step of preview degradation
+    edge_scale_cap: highest edge_scale the preview detects at (None = as set)
+    detect_scale: fraction of the preview size edges are detected at
+    skip: preview renders skipped after each processed frame
+    """
+
+    def __init__(self, name, edge_scale_cap=None, detect_scale=1.0, skip=0):
+        self.name = name
+        self.edge_scale_cap = edge_scale_cap
+        self.detect_scale = detect_scale
+        self.skip = skip
+
+    def edge_scale(self, edge_scale):
+        """The edge_scale the preview uses at this level"""
+        return edge_scale if self.edge_scale_cap is None else min(edge_scale, self.edge_scale_cap)
+
+
+# From full quality to the cheapest preview; each step removes the most expensive work first.
+# The preview is lens-corrected at preview size; only edge_scale > 1 also remaps the full
+# frame, so the edge_scale 1 cap removes the largest calibrated cost as well.
+QUALITY_LEVELS = (
+    QualityLevel("full"),
+    QualityLevel("edge scale <= 1.5", edge_scale_cap=1.5),
+    QualityLevel("edge scale 1", edge_scale_cap=1.0),
+    QualityLevel("detect at 3/4 size", edge_scale_cap=1.0, detect_scale=0.75),
+    QualityLevel("detect at 1/2 size", edge_scale_cap=1.0, detect_scale=0.5),
+    QualityLevel("every 2nd frame", edge_scale_cap=1.0, detect_scale=0.5, skip=1),
+    QualityLevel("every 3rd frame", edge_scale_cap=1.0, detect_scale=0.5, skip=2),
+)
+
+
+class PreviewGovernor:
+    """
+    Adjusts live preview quality to hold a target frame rate
+    The capture thread reports how long each preview render took, not
+    counting the wait for the camera, which no level can shorten. The
+    governor keeps a moving average and steps one QualityLevel down when
+    renders overrun the frame budget, and back up when they would fit
+    comfortably at the better level. A change must persist for `dwell`
+    seconds before the next one, and the measured cost of each level is
+    remembered for `memory` seconds (or until the settings change), so the
+    preview does not oscillate between two levels.
+    Only the preview is governed; capture and export always run at full
+    quality.
+    """
+
+    def __init__(self, settings=PREVIEW_GOVERNOR_SETTINGS, levels=QUALITY_LEVELS):
+        self.levels = levels
+        self.enabled = settings['enabled']
+        self.target_fps = settings['target_fps']
+        self.smoothing = settings['smoothing']
+        self.degrade_above = settings['degrade_above']
+        self.restore_below = settings['restore_below']
+        self.dwell = settings['dwell_s']
+        self.memory = settings['memory_s']
+        self.level = 0
+        self.average = None
+        self.undistort_average = None
+        self._costs = {}
+        self._changed = 0.0
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def budget(self):
+        """Seconds one preview frame may take at the target rate"""
+        return 1.0 / self.target_fps
+
+    @property
+    def quality(self):
+        """The QualityLevel the preview currently renders at"""
+        return self.levels[self.level] if self.enabled else self.levels[0]
+
+    def set_enabled(self, enabled):
+        """Turn governing on or off; off restores full quality"""
+        with self._lock:
+            self.enabled = enabled
+            self.level = 0
+            self.average = None
+            self.undistort_average = None
+            self._costs.clear()
+
+    def forget(self):
+        """Drop remembered level costs, e.g. after edge_scale, the detection mode or the calibration changed"""
+        with self._lock:
+            self._costs.clear()
+            self.undistort_average = None
+
+    def should_render(self):
+        """Whether the capture thread should render this frame (False = skipped by the level)"""
+        skip = self.quality.skip
+        if not skip:
+            return True
+        with self._lock:
+            if self._skipped >= skip:
+                self._skipped = 0
+                return True
+            self._skipped += 1
+            return False
+
+    def record(self, seconds):
+        """Report how long one preview render took (excluding the camera read); may change the level"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self.average is None:
+                self.average = seconds
+            else:
+                self.average += self.smoothing * (seconds - self.average)
+            # Typical cost of each level, for deciding whether a better one would fit
+            self._costs[self.level] = (self.average, now)
+            if now - self._changed < self.dwell:
+                return
+
+            # Skipped frames spread the render cost over several frame periods
+            per_frame = self.average / (self.quality.skip + 1)
+            if per_frame > self.degrade_above * self.budget and self.level < len(self.levels) - 1:
+                self._change(self.level + 1, now)
+            elif self.level > 0:
+                better = self.level - 1
+                cost, measured = self._costs.get(better, (None, 0.0))
+                if cost is None or now - measured > self.memory:
+                    # Not measured lately; assume it costs what the current level does
+                    better_per_frame = per_frame
+                else:
+                    better_per_frame = cost / (self.levels[better].skip + 1)
+                if better_per_frame < self.restore_below * self.budget:
+                    self._change(better, now)
+
+    def record_undistort(self, seconds):
+        """Report the lens-correction part of one preview render, for describe()"""
+        with self._lock:
+            if self.undistort_average is None:
+                self.undistort_average = seconds
+            else:
+                self.undistort_average += self.smoothing * (seconds - self.undistort_average)
+
+    def _change(self, level, now):
+        log.info("Preview quality %s -> %s (render %.1f ms, budget %.1f ms)", self.levels[self.level].name,
+                 self.levels[level].name, self.average * 1000, self.budget * 1000)
+        self.level = level
+        self._changed = now
+        self._skipped = 0
+        # The average restarts from the new level's last known cost
+        self.average = self._costs.get(level, (self.average, now))[0]
+
+    def describe(self):
+        """Short operator-facing text for the current level, or '' at full quality"""
+        if not self.enabled or self.level == 0:
+            return ""
+        average, undistort = self.average, self.undistort_average
+        cost = f"render {average * 1000:.0f} ms" if average is not None else "render -"
+        if undistort is not None:
+            cost += f" incl. undistort {undistort * 1000:.0f} ms"
+        return (f"Preview quality reduced to hold {self.target_fps:g} fps: "
+                f"{self.quality.name} (level {self.level}/{len(self.levels) - 1}; "
+                f"{cost}, budget {self.budget * 1000:.0f} ms)")
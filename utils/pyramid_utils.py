@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+
+
+class ImagePyramid:
+    """
+    Display pyramid of one frame, built once when a picker opens
+    Level 0 is the full-resolution frame converted to RGB; every further
+    level halves the size with pyrDown. Previews are resized from the
+    smallest level that is still at least as large as requested, and the
+    loupe samples level 0 directly.
+    """
+
+    def __init__(self, frame, min_dimension=256):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if frame.ndim == 3 else cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
+        self.levels = [rgb]
+        while min(self.levels[-1].shape[:2]) // 2 >= min_dimension:
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+
+    @property
+    def size(self):
+        """(width, height) of the full-resolution frame"""
+        h, w = self.levels[0].shape[:2]
+        return w, h
+
+    def display(self, width, height):
+        """RGB image of the frame at (width, height), resized from the nearest larger level"""
+        source = self.levels[0]
+        for level in self.levels[1:]:
+            if level.shape[1] < width or level.shape[0] < height:
+                break
+            source = level
+        if source.shape[1] == width and source.shape[0] == height:
+            return source
+        return cv2.resize(source, (width, height), interpolation=cv2.INTER_AREA)
+
+    def loupe(self, x, y, half_size, zoom, out=None):
+        """
+        Magnified full-resolution neighbourhood of (x, y)
+        Samples (2 * half_size) full-resolution pixels per side and scales them by
+        zoom with nearest-neighbour so individual pixels stay visible. Areas past
+        the frame border are black. out: optional reusable output buffer.
+        """
+        full = self.levels[0]
+        h, w = full.shape[:2]
+        side = 2 * half_size
+        x0, y0 = int(round(x)) - half_size, int(round(y)) - half_size
+
+        region = np.zeros((side, side, 3), dtype=np.uint8)
+        sx0, sy0 = max(0, x0), max(0, y0)
+        sx1, sy1 = min(w, x0 + side), min(h, y0 + side)
+        if sx1 > sx0 and sy1 > sy0:
+            region[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = full[sy0:sy1, sx0:sx1]
+        return cv2.resize(region, (side * zoom, side * zoom), dst=out, interpolation=cv2.INTER_NEAREST)
@@ -0,0 +1,282 @@
+import io
+import json
+import logging
+import os
+import pickle
+
+import numpy as np
+
+from config import SETTINGS_EXTENSION
+from utils.geometry_utils import SIMPLIFY_METHODS
+from utils.undistort_utils import UNDISTORT_MODES
+from utils.vectorize_utils import VECTORIZERS
+
+log = logging.getLogger(__name__)
+
+# Version 1: {"version": 1, "settings": {...}, "arrays": "<sidecar .npz>"}
+# Older files (flat JSON, pickled .cncsettings, nested capture JSON) are version 0
+SETTINGS_VERSION = 1
+
+
+def _bool(value):
+    if isinstance(value, str):
+        if value.lower() in ('1', 'true', 'yes', 'on'):
+            return True
+        if value.lower() in ('0', 'false', 'no', 'off'):
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    return bool(value)
+
+
+def _int(value):
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    result = float(value)
+    if result != round(result):
+        raise ValueError(f"not an integer: {value!r}")
+    return int(result)
+
+
+def _float(value):
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    return float(value)
+
+
+def _choice(options):
+    def convert(value):
+        if value not in options:
+            raise ValueError(f"not one of {', '.join(options)}: {value!r}")
+        return value
+    return convert
+
+
+def _optional(convert):
+    return lambda value: None if value is None else convert(value)
+
+
+def _color(value):
+    color = tuple(_int(c) for c in value)
+    if len(color) != 3 or not all(0 <= c <= 255 for c in color):
+        raise ValueError(f"not a BGR color: {value!r}")
+    return color
+
+
+def _pair(value):
+    pair = tuple(float(v) for v in value)
+    if len(pair) != 2:
+        raise ValueError(f"not an (x, y) pair: {value!r}")
+    return pair
+
+
+def _size(value):
+    size = tuple(_int(v) for v in value)
+    if len(size) != 2 or min(size) <= 0:
+        raise ValueError(f"not a (width, height) size: {value!r}")
+    return size
+
+
+def _markers(value):
+    # JSON object keys are strings; marker ids are ints
+    return {_int(k): _pair(v) for k, v in dict(value).items()}
+
+
+def _points(value):
+    return [_pair(p) for p in value]
+
+
+def _array(shape):
+    def convert(value):
+        array = np.array(value, dtype=np.float64)
+        if shape is not None and array.shape != shape:
+            raise ValueError(f"expected shape {shape}, got {array.shape}")
+        if not np.all(np.isfinite(array)):
+            raise ValueError("contains non-finite values")
+        return array
+    return _optional(convert)
+
+
+# Every setting the application saves, with its validator. Keys not listed
+# here are dropped with a warning when a file is read.
+SETTINGS_SCHEMA = {
+    # Camera
+    'selected_camera': str,
+    'selected_resolution': str,
+    'auto_exposure': _bool,
+    'exposure': _int,
+    'brightness': _int,
+    'contrast': _int,
+
+    # Edge detection
+    'inches_per_pixel': _float,
+    'canny_low': _int,
+    'canny_high': _int,
+    'edge_scale': _float,
+    'edge_color': _color,
+    'use_background_subtraction': _bool,
+
+    # Simplification
+    'simplify_method': _choice(SIMPLIFY_METHODS),
+    'simplify_tolerance': _float,
+    'max_vertices': _int,
+    'vectorizer': _choice(VECTORIZERS),
+    'progressive_export': _bool,
+    'undistort_mode': _choice(UNDISTORT_MODES),
+
+    # Color detection
+    'color_mode': _bool,
+    'target_color': _optional(_color),
+    'color_tolerance_h': _int,
+    'color_tolerance_s': _int,
+    'color_tolerance_v': _int,
+    'color_sample_radius': _int,
+
+    # DXF and table alignment
+    'dxf_rotation': _float,
+    'use_reference_point': _bool,
+    'use_fiducials': _bool,
+    'fiducial_markers': _markers,
+    'reference_point': _optional(_pair),
+    'reference_point_resolution': _size,
+    'reference_table_x': _float,
+    'reference_table_y': _float,
+    'add_table_boundary': _bool,
+    'table_width': _float,
+    'table_height': _float,
+
+    # Calibration
+    'camera_matrix': _array((3, 3)),
+    'dist_coeffs': _array(None),
+    'calibration_size': _optional(_size),
+    'calibration_points': _points,
+    'known_distance': _float,
+}
+
+# Stored in the binary sidecar rather than the JSON document
+ARRAY_SETTINGS = ('camera_matrix', 'dist_coeffs')
+
+
+def validate_settings(settings):
+    """
+    Check and normalise a flat settings dict against SETTINGS_SCHEMA
+    Unknown keys are dropped; a value of the wrong type raises ValueError
+    naming every offending key, so nothing is applied from a bad file.
+    """
+    values, errors = {}, []
+    for key, value in settings.items():
+        convert = SETTINGS_SCHEMA.get(key)
+        if convert is None:
+            log.warning("Ignoring unknown setting %r", key)
+            continue
+        try:
+            values[key] = convert(value)
+        except (TypeError, ValueError) as e:
+            errors.append(f"{key}: {e}")
+    if errors:
+        raise ValueError("Invalid settings: " + "; ".join(errors))
+    return values
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """Unpickler for legacy settings files; they only ever held builtin containers"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"refusing to load {module}.{name} from a settings file")
+
+
+def _migrate(document):
+    """Flat settings dict from any version-0 layout"""
+    if not isinstance(document, dict):
+        raise ValueError("Settings file does not contain a settings object")
+    # Nested capture JSON groups the same flat keys by section
+    if any(isinstance(value, dict) and key.endswith('_settings') for key, value in document.items()):
+        flat = {}
+        for key, value in document.items():
+            if isinstance(value, dict) and key.endswith('_settings'):
+                flat.update(value)
+            else:
+                flat[key] = value
+        return flat
+    return dict(document)
+
+
+def sidecar_path(path):
+    """Path of the binary array sidecar belonging to a settings file"""
+    return path + '.npz'
+
+
+def read_settings(path):
+    """
+    Read and validate a settings file of any supported format
+    Returns a flat dict of validated values (only the keys the file sets).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data[:1] == b'\x80':
+        # Legacy pickled .cncsettings
+        document = _PlainUnpickler(io.BytesIO(data)).load()
+        version = 0
+    else:
+        document = json.loads(data.decode('utf-8'))
+        version = document.get('version', 0) if isinstance(document, dict) else 0
+
+    if version == 0:
+        settings = _migrate(document)
+        log.info("Migrating version-0 settings file %s", path)
+    elif version == SETTINGS_VERSION:
+        settings = dict(document.get('settings', {}))
+        arrays = document.get('arrays')
+        if arrays:
+            with np.load(os.path.join(os.path.dirname(path), arrays), allow_pickle=False) as sidecar:
+                settings.update({key: sidecar[key] for key in sidecar.files})
+    else:
+        raise ValueError(f"Unsupported settings version {version} (this build reads up to {SETTINGS_VERSION})")
+
+    return validate_settings(settings)
+
+
+def write_settings(path, settings):
+    """
+    Validate and write settings in the current format
+    Array settings go to a .npz sidecar next to the JSON document; both are
+    written to temporary files first so a failed save leaves the old pair intact.
+    """
+    values = validate_settings(settings)
+    arrays = {key: values.pop(key) for key in ARRAY_SETTINGS if values.get(key) is not None}
+    for key in ARRAY_SETTINGS:
+        values.pop(key, None)
+
+    document = {
+        'version': SETTINGS_VERSION,
+        'settings': values,
+    }
+    sidecar = sidecar_path(path)
+    if arrays:
+        document['arrays'] = os.path.basename(sidecar)
+        with open(sidecar + '.tmp', 'wb') as f:
+            np.savez(f, **arrays)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(document, f, indent=4)
+
+    if arrays:
+        os.replace(sidecar + '.tmp', sidecar)
+    elif os.path.exists(sidecar):
+        os.remove(sidecar)
+    os.replace(path + '.tmp', path)
+    log.info("Settings saved to %s (%d values, %d arrays)", path, len(values), len(arrays))
+
+
+def delete_settings(path):
+    """Remove a settings file and its sidecar"""
+    os.remove(path)
+    if os.path.exists(sidecar_path(path)):
+        os.remove(sidecar_path(path))
+
+
+def list_settings(directory):
+    """Settings files in a directory, newest format and legacy JSON alike"""
+    try:
+        return sorted(f for f in os.listdir(directory) if f.endswith((SETTINGS_EXTENSION, '.json')))
+    except OSError:
+        return []
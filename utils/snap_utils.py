@@ -0,0 +1,96 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from config import SNAP_SETTINGS
+
+log = logging.getLogger(__name__)
+
+
+def _nearest_feature_index(features, shape):
+    """
+    Distance to and position of the nearest feature pixel for every pixel
+    features: (N, 2) int (x, y) positions of feature pixels
+    Returns (distance float32 image, label image, (N + 1, 2) label -> position table)
+    """
+    h, w = shape
+    mask = np.full((h, w), 255, dtype=np.uint8)
+    mask[features[:, 1], features[:, 0]] = 0
+    distance, labels = cv2.distanceTransformWithLabels(mask, cv2.DIST_L2, cv2.DIST_MASK_5,
+                                                       labelType=cv2.DIST_LABEL_PIXEL)
+    # Every zero pixel gets its own label; label 0 is unused
+    positions = np.zeros((labels.max() + 1, 2), dtype=np.float64)
+    positions[labels[features[:, 1], features[:, 0]]] = features
+    return distance, labels, positions
+
+
+class EdgeSnapIndex:
+    """
+    Nearest strong edge and corner lookup for point pickers
+    Built once per frame at full resolution: Canny edges and sub-pixel
+    corners each get a distance transform whose labels point at the
+    nearest feature, so snapping any position is a constant-time lookup.
+    Corners win over edges when one is within corner_radius.
+    """
+
+    def __init__(self, frame, canny_low=SNAP_SETTINGS['canny_low'], canny_high=SNAP_SETTINGS['canny_high'],
+                 max_corners=SNAP_SETTINGS['max_corners'], corner_quality=SNAP_SETTINGS['corner_quality']):
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self.shape = gray.shape[:2]
+
+        edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), canny_low, canny_high)
+        edge_pixels = cv2.findNonZero(edges)
+        self._edges = None
+        if edge_pixels is not None:
+            self._edges = _nearest_feature_index(edge_pixels.reshape(-1, 2), self.shape)
+
+        self._corners = None
+        self.corners = np.zeros((0, 2), dtype=np.float64)
+        corners = cv2.goodFeaturesToTrack(gray, max_corners, corner_quality, 5)
+        if corners is not None:
+            corners = cv2.cornerSubPix(gray, corners, (5, 5), (-1, -1),
+                                       (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01))
+            self.corners = corners.reshape(-1, 2).astype(np.float64)
+            # The index is built on rounded corner pixels and returns the sub-pixel position
+            h, w = self.shape
+            pixels = np.clip(np.rint(self.corners), 0, (w - 1, h - 1)).astype(np.int64)
+            pixels, first = np.unique(pixels, axis=0, return_index=True)
+            distance, labels, _ = _nearest_feature_index(pixels, self.shape)
+            positions = np.zeros((labels.max() + 1, 2), dtype=np.float64)
+            positions[labels[pixels[:, 1], pixels[:, 0]]] = self.corners[first]
+            self._corners = (distance, labels, positions)
+
+        log.debug("Snap index for %dx%d frame: %d edge pixels, %d corners, built in %.1f ms",
+                  self.shape[1], self.shape[0], 0 if edge_pixels is None else len(edge_pixels),
+                  len(self.corners), (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _lookup(index, x, y):
+        """(distance, position) of the nearest feature of one index"""
+        distance, labels, positions = index
+        return float(distance[y, x]), positions[labels[y, x]]
+
+    def snap(self, x, y, radius, corner_radius=None):
+        """
+        Snap a full-resolution position to the nearest corner or edge pixel
+        radius / corner_radius: largest snapping distance in full-resolution pixels
+        (corner_radius defaults to radius)
+        Returns ((x, y), kind) with kind 'corner', 'edge' or None when nothing is close
+        """
+        h, w = self.shape
+        xi = int(min(max(round(x), 0), w - 1))
+        yi = int(min(max(round(y), 0), h - 1))
+        corner_radius = radius if corner_radius is None else corner_radius
+
+        if self._corners is not None:
+            distance, position = self._lookup(self._corners, xi, yi)
+            if distance <= corner_radius:
+                return (float(position[0]), float(position[1])), 'corner'
+        if self._edges is not None:
+            distance, position = self._lookup(self._edges, xi, yi)
+            if distance <= radius:
+                return (float(position[0]), float(position[1])), 'edge'
+        return (float(x), float(y)), None
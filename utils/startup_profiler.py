@@ -0,0 +1,95 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import STARTUP_SETTINGS
+
+log = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Timeline of application start-up
+    Times are seconds since this module was imported, which __main__ does
+    before anything else. phase() records a span (imports, discovery, widget
+    construction, camera open), mark() a single moment (first paint, first
+    frame). Recording is always on and costs a clock read; only an enabled
+    profiler logs the report and appends it to the history file.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.enabled = STARTUP_SETTINGS['profile']
+        self.history_file = STARTUP_SETTINGS['history_file']
+        self.phases = []
+        self.marks = {}
+        self._reported = False
+        self._lock = threading.Lock()
+
+    def now(self):
+        """Seconds since start-up began"""
+        return time.perf_counter() - self.origin
+
+    def enable(self, history_file=None):
+        """Log the timeline and record it in the history file once start-up completes"""
+        self.enabled = True
+        if history_file is not None:
+            self.history_file = history_file
+
+    @contextmanager
+    def phase(self, name):
+        """Record the duration of the enclosed block as one phase"""
+        start = self.now()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, start, self.now()))
+
+    def mark(self, name):
+        """Record the first time a moment is reached; later calls are ignored"""
+        with self._lock:
+            self.marks.setdefault(name, self.now())
+
+    @property
+    def time_to_interactive(self):
+        """Seconds until the first paint with a running event loop, or None"""
+        return self.marks.get('interactive')
+
+    def summary(self):
+        """Timeline as a JSON-serialisable dict"""
+        with self._lock:
+            tti = self.marks.get('interactive')
+            return {
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'time_to_interactive': round(tti, 4) if tti is not None else None,
+                'phases': [{'name': n, 'start': round(s, 4), 'duration': round(e - s, 4)} for n, s, e in self.phases],
+                'marks': {n: round(t, 4) for n, t in self.marks.items()},
+            }
+
+    def report(self):
+        """Log the timeline and append it to the history file (once, when enabled)"""
+        with self._lock:
+            if self._reported or not self.enabled:
+                return
+            self._reported = True
+        summary = self.summary()
+        lines = [f"  {p['start'] * 1000:8.1f} ms  {p['name']:<20} {p['duration'] * 1000:8.1f} ms"
+                 for p in summary['phases']]
+        lines += [f"  {t * 1000:8.1f} ms  {n} (mark)" for n, t in sorted(summary['marks'].items(), key=lambda m: m[1])]
+        tti = summary['time_to_interactive']
+        log.info("Start-up timeline (time to interactive %s):\n%s",
+                 f"{tti * 1000:.1f} ms" if tti is not None else "not reached", "\n".join(lines))
+        if self.history_file:
+            try:
+                with open(self.history_file, 'a') as f:
+                    f.write(json.dumps(summary) + "\n")
+            except OSError as e:
+                log.warning("Could not record start-up profile in %s: %s", self.history_file, e)
+
+
+# Shared by __main__ and the application; its clock starts at first import
+startup = StartupProfiler()
@@ -0,0 +1,187 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config import TRACE_SETTINGS
+
+log = logging.getLogger(__name__)
+
+
+class _NullSpan:
+    """Span returned while tracing is off: entering and leaving it does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """One timed block; recorded as a complete event when it exits"""
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.start, end, threading.get_native_id(), self.args)
+        return False
+
+    def set(self, **args):
+        """Attach values known only inside the block (counts, cache hits)"""
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Span recorder for the capture, preview, export and calibration paths
+    Spans from every thread go into one bounded buffer (the oldest are dropped
+    when it is full) and are saved as Chrome trace JSON, which chrome://tracing
+    and ui.perfetto.dev show as one timeline with a track per thread. While
+    tracing is off span() returns a shared no-op object, so an instrumented
+    block costs one attribute check.
+    """
+
+    def __init__(self, enabled=TRACE_SETTINGS['enabled'], buffer_events=TRACE_SETTINGS['buffer_events']):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self._events = deque(maxlen=buffer_events)
+        self._threads = {}
+        self._tracks = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Discard recorded spans and start recording"""
+        self.clear()
+        self.enabled = True
+
+    def stop(self):
+        """Stop recording; recorded spans are kept until saved or cleared"""
+        self.enabled = False
+
+    def clear(self):
+        """Discard recorded spans"""
+        with self._lock:
+            self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+    def span(self, name, **args):
+        """Context manager timing the enclosed block on the current thread's track"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def traced(self, name=None):
+        """Decorator wrapping every call of a function in a span"""
+        def decorate(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, label, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def now(self):
+        """Clock used for spans, for use with complete()"""
+        return time.perf_counter()
+
+    def complete(self, name, start, end=None, track=None, **args):
+        """
+        Record a span measured by the caller, e.g. one that starts and ends in different callbacks
+        start, end: values of now(); end defaults to the current time
+        track: name of a separate timeline row (e.g. work done in another process);
+        defaults to the current thread
+        """
+        if not self.enabled:
+            return
+        end = time.perf_counter() if end is None else end
+        if track is None:
+            ident = threading.get_native_id()
+        else:
+            with self._lock:
+                ident = self._tracks.setdefault(track, -1 - len(self._tracks))
+        self._record(name, start, end, ident, args, track)
+
+    def instant(self, name, **args):
+        """Record a single moment on the current thread's track"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._record(name, now, None, threading.get_native_id(), args)
+
+    def _record(self, name, start, end, ident, args, track=None):
+        if ident not in self._threads:
+            with self._lock:
+                self._threads[ident] = track or threading.current_thread().name
+        self._events.append((name, start, end, ident, args))
+
+    def events(self):
+        """Recorded spans as Chrome trace event dicts (microseconds since tracer creation)"""
+        with self._lock:
+            records = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'cnc_vision'}}]
+        for ident, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ident,
+                           'args': {'name': thread_name}})
+        for name, start, end, ident, args in records:
+            event = {'name': name, 'pid': pid, 'tid': ident, 'ts': round((start - self.origin) * 1e6, 1)}
+            if end is None:
+                event.update(ph='i', s='t')
+            else:
+                event.update(ph='X', dur=round((end - start) * 1e6, 1))
+            if args:
+                event['args'] = {k: v if isinstance(v, (int, float, str, bool)) or v is None else repr(v)
+                                 for k, v in args.items()}
+            events.append(event)
+        return events
+
+    def save(self, path=None):
+        """
+        Write recorded spans as Chrome trace JSON; returns the path
+        path: defaults to <TRACE_SETTINGS directory>/trace_<timestamp>.json
+        """
+        if path is None:
+            directory = TRACE_SETTINGS['directory']
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, datetime.now().strftime("trace_%Y%m%d_%H%M%S.json"))
+        events = self.events()
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        log.info("Saved %d trace events to %s", len(events), path)
+        return path
+
+
+# Shared by the GUI, the export pipeline, the debug sink and the calibration workers
+tracer = Tracer()
@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from config import UNDISTORT_SETTINGS
+
+log = logging.getLogger(__name__)
+
+# Export lens correction: remap the whole 'image', or correct only the simplified 'points'
+UNDISTORT_MODES = ('image', 'points')
+
+
+def calibration_hash(camera_matrix, dist_coeffs, calibration_size):
+    """Short content hash identifying one calibration"""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(np.ascontiguousarray(camera_matrix, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(dist_coeffs, dtype=np.float64).ravel().tobytes())
+    h.update(repr(tuple(int(v) for v in calibration_size)).encode())
+    return h.hexdigest()
+
+
+def rescale_camera_matrix(camera_matrix, from_size, to_size):
+    """
+    Camera matrix for the same lens at another resolution
+    Focal lengths and principal point scale with the image; distortion
+    coefficients are resolution independent.
+    """
+    sx = to_size[0] / float(from_size[0])
+    sy = to_size[1] / float(from_size[1])
+    scaled = np.array(camera_matrix, dtype=np.float64)
+    scaled[0] *= sx
+    scaled[1] *= sy
+    return scaled
+
+
+# The default 5 iterations leave visible error towards the corners of wide lenses
+UNDISTORT_POINTS_CRITERIA = (cv2.TERM_CRITERIA_COUNT + cv2.TERM_CRITERIA_EPS, 20, 1e-6)
+
+
+def undistort_points(points, camera_matrix, dist_coeffs, image_size, calibration_size=None):
+    """
+    Correct lens distortion of (N, 2) pixel coordinates in one call
+    image_size: (width, height) of the image the points were measured on; the
+    camera matrix is rescaled to it from calibration_size
+    Returns (N, 2) float64 coordinates in the same pixel frame as cv2.undistort
+    would produce, without resampling any image.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if camera_matrix is None or dist_coeffs is None or len(points) == 0:
+        return points
+    matrix = np.asarray(camera_matrix, dtype=np.float64)
+    if calibration_size is not None and tuple(calibration_size) != tuple(image_size):
+        matrix = rescale_camera_matrix(matrix, calibration_size, image_size)
+    corrected = cv2.undistortPoints(points.reshape(-1, 1, 2), matrix, dist_coeffs, P=matrix,
+                                    criteria=UNDISTORT_POINTS_CRITERIA)
+    return corrected.reshape(-1, 2)
+
+
+class UndistortMapCache:
+    """
+    Undistortion remap tables, built once per (camera, resolution, calibration)
+    Maps are computed with initUndistortRectifyMap in fixed-point CV_16SC2
+    form, kept in memory, and persisted as .npz so a restart does not pay
+    for them again. undistort() is then a single cv2.remap.
+    directory: where maps are persisted; None keeps them in memory only
+    """
+
+    def __init__(self, directory=UNDISTORT_SETTINGS['cache_directory'],
+                 max_entries=UNDISTORT_SETTINGS['max_cached_maps']):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        camera, (w, h), digest = key
+        safe_camera = "".join(c if c.isalnum() else "_" for c in str(camera))
+        return os.path.join(self.directory, f"undistort_{safe_camera}_{w}x{h}_{digest}.npz")
+
+    def get_maps(self, camera_matrix, dist_coeffs, image_size, calibration_size=None, camera='default'):
+        """
+        Return (map1, map2) for images of image_size (width, height)
+        calibration_size: resolution the calibration was computed at; the camera
+        matrix is rescaled when it differs from image_size
+        """
+        image_size = (int(image_size[0]), int(image_size[1]))
+        calibration_size = tuple(calibration_size) if calibration_size is not None else image_size
+        key = (camera, image_size, calibration_hash(camera_matrix, dist_coeffs, calibration_size))
+
+        with self._lock:
+            maps = self._maps.get(key)
+        if maps is not None:
+            return maps
+
+        path = self._path(key) if self.directory else None
+        maps = None
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    maps = (data['map1'], data['map2'])
+            except Exception as e:
+                log.warning("Ignoring unreadable undistortion map %s: %s", path, e)
+
+        if maps is None:
+            matrix = camera_matrix
+            if calibration_size != image_size:
+                matrix = rescale_camera_matrix(camera_matrix, calibration_size, image_size)
+            maps = cv2.initUndistortRectifyMap(matrix, dist_coeffs, None, matrix, image_size, cv2.CV_16SC2)
+            log.info("Built undistortion maps for %s at %dx%d", camera, *image_size)
+            if path:
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                    np.savez(path, map1=maps[0], map2=maps[1])
+                except OSError as e:
+                    log.warning("Could not persist undistortion map %s: %s", path, e)
+
+        with self._lock:
+            if len(self._maps) >= self.max_entries:
+                self._maps.pop(next(iter(self._maps)))
+            self._maps[key] = maps
+        return maps
+
+    def undistort(self, image, camera_matrix, dist_coeffs, calibration_size=None, camera='default', dst=None):
+        """
+        Undistort an image of any resolution with the cached maps
+        dst: optional output buffer of the image's shape and type
+        """
+        if camera_matrix is None or dist_coeffs is None:
+            return image
+        h, w = image.shape[:2]
+        map1, map2 = self.get_maps(camera_matrix, dist_coeffs, (w, h), calibration_size, camera)
+        return cv2.remap(image, map1, map2, cv2.INTER_LINEAR, dst=dst)
+
+
+# Shared by the preview, capture and export paths
+undistort_maps = UndistortMapCache()
@@ -0,0 +1,208 @@
+import cv2
+import numpy as np
+
+from utils.contour_set import ContourSet
+
+# 'contours' traces region outlines, 'centerline' links Canny edges
+VECTORIZERS = ('contours', 'centerline')
+
+
+def _neighbours(img):
+    """
+    Return the 8 neighbours of every pixel of a 0/1 image as
+    (P2..P9) in Zhang-Suen order: N, NE, E, SE, S, SW, W, NW
+    """
+    p = np.pad(img, 1)
+    h, w = img.shape
+    return [
+        p[0:h, 1:w + 1],      # N
+        p[0:h, 2:w + 2],      # NE
+        p[1:h + 1, 2:w + 2],  # E
+        p[2:h + 2, 2:w + 2],  # SE
+        p[2:h + 2, 1:w + 1],  # S
+        p[2:h + 2, 0:w],      # SW
+        p[1:h + 1, 0:w],      # W
+        p[0:h, 0:w],          # NW
+    ]
+
+
+def _neighbour_count(img):
+    """Number of set 8-neighbours of every pixel"""
+    kernel = np.ones((3, 3), np.float32)
+    kernel[1, 1] = 0
+    return cv2.filter2D(img, cv2.CV_16S, kernel, borderType=cv2.BORDER_CONSTANT)
+
+
+def thin_edges(edges):
+    """
+    Thin a binary edge map to 1-pixel-wide 8-connected curves
+    Uses OpenCV's contrib thinning when available, otherwise a vectorised
+    Zhang-Suen pass, followed by removal of redundant staircase corners.
+    """
+    img = (edges > 0).astype(np.uint8)
+    ximgproc = getattr(cv2, 'ximgproc', None)
+    if ximgproc is not None:
+        img = (ximgproc.thinning(img * 255) > 0).astype(np.uint8)
+    else:
+        while True:
+            changed = False
+            for step in (0, 1):
+                n, ne, e, se, s, sw, w, nw = _neighbours(img)
+                ring = [n, ne, e, se, s, sw, w, nw, n]
+                count = n + ne + e + se + s + sw + w + nw
+                transitions = sum(((ring[i] == 0) & (ring[i + 1] == 1)).astype(np.uint8) for i in range(8))
+                if step == 0:
+                    cond = (n * e * s == 0) & (e * s * w == 0)
+                else:
+                    cond = (n * e * w == 0) & (n * s * w == 0)
+                remove = (img == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & cond
+                if remove.any():
+                    img[remove] = 0
+                    changed = True
+            if not changed:
+                break
+
+    # Drop the inner corner of every L-shaped step; its two 4-neighbours stay
+    # diagonally connected, so connectivity is unchanged but chains stay simple
+    for a, b, c, d, e in ((0, 2, 4, 5, 6), (2, 4, 6, 7, 0), (4, 6, 0, 1, 2), (6, 0, 2, 3, 4)):
+        nb = _neighbours(img)
+        corner = (img == 1) & (nb[a] == 1) & (nb[b] == 1) & (nb[c] == 0) & (nb[d] == 0) & (nb[e] == 0)
+        img[corner] = 0
+    return img
+
+
+def _join_gaps(polylines, closed, max_gap):
+    """
+    Greedily join open polyline ends that lie within max_gap pixels
+    Each end is used at most once; chains that meet themselves become closed.
+    """
+    open_ids = [i for i, c in enumerate(closed) if not c and len(polylines[i]) > 0]
+    if not open_ids or max_gap <= 0:
+        return polylines, closed
+
+    # End points: (polyline, 0 = head / 1 = tail)
+    ends = np.array([(i, side) for i in open_ids for side in (0, 1)], dtype=np.int64)
+    coords = np.array([polylines[i][0] if side == 0 else polylines[i][-1] for i, side in ends], dtype=np.float64)
+
+    # Bucket ends on a grid so candidate pairs come only from nearby cells
+    cell = max(float(max_gap), 1.0)
+    keys = np.floor(coords / cell).astype(np.int64)
+    buckets = {}
+    for k, key in enumerate(map(tuple, keys)):
+        buckets.setdefault(key, []).append(k)
+
+    pairs = []
+    for k, (kx, ky) in enumerate(keys):
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in buckets.get((kx + dx, ky + dy), ()):
+                    if j <= k or (ends[j][0] == ends[k][0] and len(polylines[ends[k][0]]) < 3):
+                        continue
+                    dist = np.hypot(*(coords[j] - coords[k]))
+                    if dist <= max_gap:
+                        pairs.append((dist, k, j))
+    pairs.sort()
+
+    link = {}
+    for _, k, j in pairs:
+        if k not in link and j not in link:
+            link[k] = j
+            link[j] = k
+
+    # Walk linked chains: enter a polyline at one end, leave at the other
+    end_index = {(int(i), int(side)): k for k, (i, side) in enumerate(ends)}
+    visited = set()
+    merged, merged_closed = [], []
+    for start in open_ids:
+        if start in visited:
+            continue
+
+        # Rewind to a free end; coming back to the start means a ring
+        poly, entry, ring = start, 0, False
+        while end_index[(poly, entry)] in link:
+            prev_poly, prev_side = (int(v) for v in ends[link[end_index[(poly, entry)]]])
+            if prev_poly == start:
+                ring = True
+                poly, entry = start, 0
+                break
+            poly, entry = prev_poly, 1 - prev_side
+
+        pieces = []
+        while True:
+            visited.add(poly)
+            pieces.append(polylines[poly] if entry == 0 else polylines[poly][::-1])
+            exit_key = end_index[(poly, 1 - entry)]
+            if exit_key not in link:
+                break
+            poly, entry = (int(v) for v in ends[link[exit_key]])
+            if poly in visited:
+                break
+        merged.append(np.concatenate(pieces))
+        merged_closed.append(ring)
+
+    out = [p for p, c in zip(polylines, closed) if c] + merged
+    out_closed = [True] * sum(1 for c in closed if c) + merged_closed
+    return out, out_closed
+
+
+def trace_centerlines(edges, max_gap=3, min_length=5):
+    """
+    Vectorise a binary edge map into centreline polylines
+    Unlike findContours, every 1-pixel edge becomes a single polyline instead
+    of a thin closed loop around both sides of it.
+    edges: binary edge image (e.g. Canny output)
+    max_gap: join open ends closer than this many pixels
+    min_length: drop polylines with fewer pixels than this
+    Returns a ContourSet in pixel coordinates with the closed column set.
+    """
+    skeleton = thin_edges(edges)
+    count = _neighbour_count(skeleton) * skeleton
+
+    # Split the skeleton at junctions; what is left are simple chains and rings
+    junctions = (count >= 3).astype(np.uint8)
+    chains = skeleton & (1 - junctions)
+    chain_count = _neighbour_count(chains) * chains
+    endpoint = (chains == 1) & (chain_count <= 1)
+
+    # Junction clusters become single nodes that chains can attach to
+    _, node_labels, _, node_centers = cv2.connectedComponentsWithStats(junctions, connectivity=8)
+    node_near = cv2.dilate(node_labels.astype(np.float32), np.ones((3, 3), np.uint8))
+
+    # Border following traces an open chain out and back, a ring once
+    traced, _ = cv2.findContours(chains, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    polylines, closed = [], []
+    for contour in traced:
+        pts = contour.reshape(-1, 2)
+        if len(pts) < 2:
+            continue
+        is_end = endpoint[pts[:, 1], pts[:, 0]]
+        end_pos = np.flatnonzero(is_end)
+        if len(end_pos) == 0:
+            polylines.append(pts.astype(np.float64))
+            closed.append(True)
+            continue
+
+        # Start at one end and stop at the other
+        pts = np.roll(pts, -end_pos[0], axis=0)
+        rest = np.flatnonzero(endpoint[pts[1:, 1], pts[1:, 0]])
+        stop = rest[0] + 1 if len(rest) else len(pts) - 1
+        line = pts[:stop + 1].astype(np.float64)
+
+        # Reattach the ends that were cut off at a junction
+        head, tail = [], []
+        label = int(node_near[int(line[0, 1]), int(line[0, 0])])
+        if label > 0:
+            head = [node_centers[label]]
+        label = int(node_near[int(line[-1, 1]), int(line[-1, 0])])
+        if label > 0:
+            tail = [node_centers[label]]
+        if head or tail:
+            line = np.concatenate([np.array(head).reshape(-1, 2), line, np.array(tail).reshape(-1, 2)])
+        polylines.append(line)
+        closed.append(False)
+
+    polylines, closed = _join_gaps(polylines, closed, max_gap)
+
+    keep = [i for i, p in enumerate(polylines) if len(p) >= min_length]
+    return ContourSet.from_contours([polylines[i] for i in keep], closed=[closed[i] for i in keep])